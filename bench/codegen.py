@@ -0,0 +1,53 @@
+# bench/codegen.py
+# Generated direct-coded parser against the table-driven parser.
+# Usage: python -m bench.codegen [--size N] [--repeat R]
+import argparse
+import importlib.util
+import os
+import tempfile
+from bench.suite import best_time
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.codegen import write_module
+from syntax_parser.predictive_parser import PredictiveParser
+
+GRAMMARS = {
+    'sample': ({'S': [['A', 'B', 'C']], 'A': [['a', 'b', 'A'], ['a', 'b']],
+                'B': [['b'], ['B', 'C']], 'C': [['c'], ['c', 'C']]},
+               {'S': [['A', 'b', 'C']]},
+               lambda n: 'ab' * n + 'b' + 'c' * n),
+    'expression': ({'E': [['E', '+', 'T'], ['T']], 'T': [['T', '*', 'F'], ['F']],
+                    'F': [['(', 'E', ')'], ['i']]},
+                   None,
+                   lambda n: '+'.join(['i*(i+i)'] * (n // 4))),
+}
+
+def load_generated(compiled, directory):
+    path = os.path.join(directory, 'generated_parser.py')
+    write_module(path, compiled)
+    spec = importlib.util.spec_from_file_location('generated_parser', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Generated parser against the table-driven parser.")
+    arg_parser.add_argument('--size', type=int, default=100000, help="approximate tokens per input")
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, (grammar, rewrites, make_input) in GRAMMARS.items():
+            analyzer = GrammarAnalyzer(grammar, rewrites)
+            analyzer.run_full_analysis()
+            parser = PredictiveParser(analyzer.parsing_table, analyzer.final_grammar.keys(), analyzer.start_symbol)
+            generated = load_generated(parser.compiled, directory)
+            text = make_input(args.size)
+
+            table_time, table_ok = best_time(lambda: parser.recognize(text), args.repeat)
+            direct_time, direct_ok = best_time(lambda: generated.recognize(text), args.repeat)
+            assert table_ok and direct_ok, name
+            print(f"{name:<11} {len(text):>8} tokens  table {len(text) / table_time / 1e6:6.2f} M tok/s  "
+                  f"generated {len(text) / direct_time / 1e6:6.2f} M tok/s  ({table_time / direct_time:.2f}x)")
+
+if __name__ == '__main__':
+    main()
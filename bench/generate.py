@@ -0,0 +1,138 @@
+# bench/generate.py
+# Synthetic LL(1) grammars of a chosen size and shape, and accepted or
+# rejected inputs of a chosen length for them.
+import random
+from grammar.analyzer import GrammarAnalyzer
+
+# Terminals are single characters from here on, so inputs need no lexer
+# and stay clear of the ε and $ symbols
+TERMINAL_BASE = 0x4E00
+EPSILON = 'ε'
+
+def terminal_names(count):
+    return [chr(TERMINAL_BASE + i) for i in range(count)]
+
+def random_grammar(nonterminals=50, terminals=20, max_length=5, alternatives=3, nullable=0.2, seed=0):
+    """
+    {nt: [[symbols...]]} grammar with N0 as start symbol. Alternatives of a
+    non-terminal start with distinct symbols (a terminal, or a later
+    non-terminal, so there is no left recursion); about `nullable` of the
+    non-terminals also get an ε alternative. Alternatives that still clash
+    in the LL(1) table are dropped until the grammar has no conflicts.
+
+    The first alternative of every non-terminal uses only terminals and
+    later non-terminals, so any derivation can be finished off.
+    """
+    rng = random.Random(seed)
+    names = [f"N{i}" for i in range(nonterminals)]
+    alphabet = terminal_names(terminals)
+    grammar = {}
+    for i, nt in enumerate(names):
+        later = names[i + 1:]
+        leads = rng.sample(alphabet, min(len(alphabet), rng.randint(1, alternatives)))
+        if later and rng.random() < 0.3:
+            leads[-1] = rng.choice(later)
+        bodies = []
+        for j, lead in enumerate(leads):
+            body = [lead]
+            for _ in range(rng.randint(0, max_length - 1)):
+                if j == 0:
+                    body.append(rng.choice(alphabet))
+                else:
+                    body.append(rng.choice(names if rng.random() < 0.4 else alphabet))
+            if j == 0 and later and rng.random() < 0.5:
+                body.append(rng.choice(later))
+            bodies.append(body)
+        if rng.random() < nullable:
+            bodies.append([EPSILON])
+        grammar[nt] = bodies
+
+    # Every non-terminal is used by some alternative of an earlier one,
+    # so none is unreachable
+    for i in range(1, nonterminals):
+        parent = grammar[names[rng.randrange(i)]]
+        body = parent[-1] if len(parent) > 1 and parent[-1] != [EPSILON] else parent[0]
+        body.insert(rng.randint(1, len(body)), names[i])
+    return _drop_conflicts(grammar)
+
+def _drop_conflicts(grammar):
+    while True:
+        analyzer = GrammarAnalyzer(grammar)
+        analyzer.run_full_analysis()
+        if not analyzer.conflicts:
+            return grammar
+        # One alternative per non-terminal and round, the last one that
+        # clashes, so the outcome does not depend on set iteration order
+        clashing = {}
+        for nt, _, kept, new in analyzer.conflicts:
+            bodies = grammar.get(nt, [])
+            for body in (kept, new):
+                if list(body) in bodies[1:]:
+                    i = bodies.index(list(body))
+                    clashing[nt] = max(clashing.get(nt, 0), i)
+        if not clashing:
+            raise ValueError("Generated grammar has conflicts that dropping alternatives cannot fix")
+        for nt, i in clashing.items():
+            del grammar[nt][i]
+
+def shortest_lengths(grammar):
+    """{nt: length of its shortest derivable terminal string}."""
+    shortest = dict.fromkeys(grammar, float('inf'))
+    size = lambda s: shortest[s] if s in grammar else (s != EPSILON)
+    changed = True
+    while changed:
+        changed = False
+        for nt, bodies in grammar.items():
+            best = min(sum(size(s) for s in body) for body in bodies)
+            if best < shortest[nt]:
+                shortest[nt] = best
+                changed = True
+    return shortest
+
+def sentence(grammar, length, seed=0):
+    """
+    An accepted input of roughly `length` tokens: a random leftmost
+    derivation that prefers alternatives with non-terminals while the
+    output plus the shortest expansion of the pending symbols is below
+    `length`, then takes the shortest alternatives. Grammars without
+    enough recursion may give shorter inputs.
+    """
+    rng = random.Random(seed)
+    start = next(iter(grammar))
+    shortest = shortest_lengths(grammar)
+    size = lambda s: shortest[s] if s in grammar else (s != EPSILON)
+    growing = {nt: [b for b in bodies if any(s in grammar for s in b)] or bodies
+               for nt, bodies in grammar.items()}
+    finishing = {nt: min(bodies, key=lambda body: sum(size(s) for s in body))
+                 for nt, bodies in grammar.items()}
+    out = []
+    stack = [start]
+    pending = shortest[start]  # shortest output the stack can still produce
+    while stack:
+        symbol = stack.pop()
+        pending -= size(symbol)
+        if symbol not in grammar:
+            if symbol != EPSILON:
+                out.append(symbol)
+            continue
+        if len(out) + pending < length:
+            body = rng.choice(growing[symbol])
+        else:
+            body = finishing[symbol]
+        stack.extend(reversed(body))
+        pending += sum(size(s) for s in body)
+    return ''.join(out)
+
+def corrupt(parser, text, seed=0, at=0.9, attempts=100):
+    """
+    A rejected input: text with one token replaced near fraction `at` of
+    its length, so the parser runs through most of it before failing.
+    """
+    rng = random.Random(seed)
+    alphabet = sorted(parser.terminals)
+    for _ in range(attempts):
+        position = min(len(text) - 1, max(0, int(len(text) * at) + rng.randint(-10, 10)))
+        bad = text[:position] + rng.choice(alphabet) + text[position + 1:]
+        if not parser.recognize(bad):
+            return bad
+    return text + alphabet[0] * 2  # still accepted only by an odd grammar
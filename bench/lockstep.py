@@ -0,0 +1,61 @@
+# bench/lockstep.py
+# Lockstep NumPy batch recognizer against calling recognize() per input, on
+# many short inputs (half of them rejected) for a generated grammar.
+# Usage: python -m bench.lockstep [--inputs N] [--length L] [--batch-size B]
+import argparse
+import random
+from bench.generate import random_grammar, sentence, corrupt
+from bench.suite import best_time
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.lockstep import BatchRecognizer, DEFAULT_BATCH_SIZE
+from syntax_parser.predictive_parser import PredictiveParser
+
+def short_inputs(grammar, parser, count, length, seed=0):
+    """`count` inputs of up to about `length` tokens; every other one is corrupted."""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        text = sentence(grammar, rng.randint(1, length), seed=seed + i)
+        if i % 2 and text:
+            text = corrupt(parser, text, seed=seed + i, at=rng.random())
+        texts.append(text)
+    return texts
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Lockstep batch recognizer against the scalar parser.")
+    arg_parser.add_argument('--inputs', type=int, default=20000)
+    arg_parser.add_argument('--length', type=int, default=40, help="longest input in tokens (roughly)")
+    arg_parser.add_argument('--nonterminals', type=int, default=50)
+    arg_parser.add_argument('--terminals', type=int, default=20)
+    arg_parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args(argv)
+
+    grammar = random_grammar(args.nonterminals, args.terminals, seed=args.seed)
+    analyzer = GrammarAnalyzer(grammar)
+    analyzer.run_full_analysis()
+    parser = PredictiveParser(analyzer.parsing_table, analyzer.final_grammar.keys(), analyzer.start_symbol)
+    texts = short_inputs(grammar, parser, args.inputs, args.length, args.seed)
+    tokens = sum(map(len, texts))
+
+    def scalar():
+        accepted, positions = [], []
+        for text in texts:
+            accepted.append(parser.recognize(text))
+            positions.append(-1 if accepted[-1] else parser.error_position)
+        return accepted, positions
+    scalar_time, (accepted, positions) = best_time(scalar, args.repeat)
+    recognizer = BatchRecognizer(parser, args.batch_size)
+    batch_time, result = best_time(lambda: recognizer.recognize(texts), args.repeat)
+    if result.accepted.tolist() != accepted or result.error_position.tolist() != positions:
+        raise AssertionError("lockstep results differ from recognize()")
+
+    print(f"{len(texts)} inputs, {tokens} tokens, {sum(accepted)} accepted")
+    for name, seconds in (('scalar', scalar_time), ('lockstep', batch_time)):
+        print(f"{name:<9} {seconds * 1000:9.1f} ms  {len(texts) / seconds:>10.0f} inputs/s  "
+              f"{tokens / seconds / 1e6:6.2f} M tok/s")
+    print(f"speedup   {scalar_time / batch_time:.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# bench/suite.py
+# Analysis, parsing, tree memory and layout benchmarks on generated grammars,
+# saved as JSON so two runs can be compared for regressions.
+# Usage: python -m bench.suite [--tokens N ...] [--out FILE] [--compare BASE [NEW]]
+import argparse
+import json
+import platform
+import sys
+import time
+from bench.generate import random_grammar, sentence, corrupt
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.predictive_parser import PredictiveParser
+from ui.layout import TreeLayout
+
+RESULTS_VERSION = 1
+DEFAULT_THRESHOLD = 0.10
+
+# Metric names end in their unit; the unit says which direction is better
+LOWER_IS_BETTER = ('.seconds', '.bytes_per_node')
+HIGHER_IS_BETTER = ('.per_second',)
+
+def best_time(function, repeat):
+    """(fastest wall time over `repeat` calls, last return value)."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = function()
+        best = min(best, time.perf_counter() - started)
+    return best, value
+
+def tree_node_bytes(flat_tree):
+    # Memory allocated while materializing the TreeNode tree the UI uses
+    import tracemalloc
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        root = flat_tree.to_tree_node()
+        return tracemalloc.get_traced_memory()[0] - before, root
+    finally:
+        tracemalloc.stop()
+
+def run(config):
+    """Runs every benchmark for one grammar configuration; {metric: value}."""
+    metrics = {}
+    repeat = config['repeat']
+    grammar = random_grammar(config['nonterminals'], config['terminals'], config['max_length'],
+                             config['alternatives'], config['nullable'], config['seed'])
+    metrics['grammar.nonterminals.count'] = len(grammar)
+    metrics['grammar.productions.count'] = sum(len(bodies) for bodies in grammar.values())
+
+    def analyze():
+        analyzer = GrammarAnalyzer(grammar)
+        analyzer.run_full_analysis()
+        return analyzer
+    metrics['analysis.seconds'], analyzer = best_time(analyze, repeat)
+    metrics['table.seconds'], parser = best_time(lambda: PredictiveParser(
+        analyzer.parsing_table, analyzer.final_grammar.keys(), analyzer.start_symbol), repeat)
+
+    for length in config['tokens']:
+        prefix = f"parse.{length}"
+        text = sentence(grammar, length, config['seed'])
+        bad = corrupt(parser, text, config['seed'])
+        if not parser.parse(text):
+            raise AssertionError(f"generated input of {length} tokens was rejected: {parser.error_message}")
+        steps = len(parser.trace)
+        metrics[f"{prefix}.tokens.count"] = len(text)
+        metrics[f"{prefix}.steps.count"] = steps
+
+        seconds, _ = best_time(lambda: parser.recognize(text), repeat)
+        metrics[f"{prefix}.recognize.seconds"] = seconds
+        metrics[f"{prefix}.recognize.tokens.per_second"] = len(text) / seconds
+        metrics[f"{prefix}.recognize.steps.per_second"] = steps / seconds
+        metrics[f"{prefix}.rejected.seconds"], _ = best_time(lambda: parser.recognize(bad), repeat)
+        seconds, _ = best_time(lambda: parser.parse(text, trace=False), repeat)
+        metrics[f"{prefix}.flat_tree.steps.per_second"] = steps / seconds
+        seconds, _ = best_time(lambda: parser.parse(text), repeat)
+        metrics[f"{prefix}.traced.steps.per_second"] = steps / seconds
+
+        parser.parse(text, trace=False)
+        flat_tree = parser.flat_tree
+        nodes = len(flat_tree)
+        metrics[f"tree.{length}.nodes.count"] = nodes
+        metrics[f"tree.{length}.flat.bytes_per_node"] = flat_tree.memory_bytes() / nodes
+        allocated, root = tree_node_bytes(flat_tree)
+        metrics[f"tree.{length}.tree_node.bytes_per_node"] = allocated / nodes
+        metrics[f"layout.{length}.seconds"], _ = best_time(lambda: TreeLayout().layout(root), repeat)
+    return metrics
+
+def save(path, config, metrics):
+    results = {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'config': config,
+        'metrics': metrics,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported results version {results.get('version')!r}")
+    return results
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    (metric, old, new, change, verdict) rows for metrics in both runs.
+    change is new/old - 1; verdict is 'regression' or 'improvement' when a
+    timed metric moves by more than threshold the wrong or right way.
+    """
+    rows = []
+    for name, old in baseline['metrics'].items():
+        new = current['metrics'].get(name)
+        if new is None:
+            continue
+        change = new / old - 1 if old else 0.0
+        verdict = ''
+        if name.endswith(LOWER_IS_BETTER):
+            worse = change
+        elif name.endswith(HIGHER_IS_BETTER):
+            worse = -change
+        else:
+            worse = 0.0
+        if worse > threshold:
+            verdict = 'regression'
+        elif worse < -threshold:
+            verdict = 'improvement'
+        rows.append((name, old, new, change, verdict))
+    return rows
+
+def print_metrics(metrics):
+    for name, value in metrics.items():
+        print(f"{name:<45} {value:>14.6g}")
+
+def print_comparison(rows):
+    for name, old, new, change, verdict in rows:
+        print(f"{name:<45} {old:>12.6g} {new:>12.6g} {change:>+8.1%}  {verdict}")
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmarks on generated LL(1) grammars.")
+    arg_parser.add_argument('--nonterminals', type=int, default=200)
+    arg_parser.add_argument('--terminals', type=int, default=50)
+    arg_parser.add_argument('--max-length', type=int, default=5, help="longest production body before reachability links")
+    arg_parser.add_argument('--alternatives', type=int, default=3, help="most alternatives per non-terminal (plus ε)")
+    arg_parser.add_argument('--nullable', type=float, default=0.2, help="share of non-terminals with an ε alternative")
+    arg_parser.add_argument('--tokens', type=int, nargs='+', default=[10000, 100000], help="input lengths")
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--repeat', type=int, default=3, help="best of this many runs per timing")
+    arg_parser.add_argument('--out', help="save the results as JSON")
+    arg_parser.add_argument('--compare', nargs='+', metavar='RESULTS',
+                            help="compare against a saved run; with two files, compare them without running")
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="relative change flagged as a regression")
+    args = arg_parser.parse_args(argv)
+    if args.compare and len(args.compare) > 2:
+        arg_parser.error("--compare takes one or two result files")
+
+    if args.compare and len(args.compare) == 2:
+        current = load(args.compare[1])
+    else:
+        config = {name: getattr(args, name) for name in
+                  ('nonterminals', 'terminals', 'max_length', 'alternatives', 'nullable', 'tokens', 'seed', 'repeat')}
+        metrics = run(config)
+        if args.out:
+            save(args.out, config, metrics)
+        current = {'config': config, 'metrics': metrics}
+        if not args.compare:
+            print_metrics(metrics)
+            return 0
+
+    baseline = load(args.compare[0])
+    if baseline['config'] != current['config']:
+        print("warning: the runs used different configurations", file=sys.stderr)
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows)
+    return 1 if any(verdict == 'regression' for *_, verdict in rows) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
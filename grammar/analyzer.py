@@ -1,188 +1,197 @@
-# grammar/analyzer.py
-import copy
-
-class GrammarAnalyzer:
-    def __init__(self, grammar_rules):
-        self.original_grammar = copy.deepcopy(grammar_rules)
-        self.start_symbol = list(grammar_rules.keys())[0]
-        
-        # --- Variables to store the results of each step ---
-        self.simplified_grammar = {}
-        self.no_left_recursion_grammar = {}
-        self.final_grammar = {} # After left-factoring
-        self.first_sets = {}
-        self.follow_sets = {}
-        self.parsing_table = {}
-        self.terminals = set()
-
-    def run_full_analysis(self):
-        """Runs all the transformation and calculation steps in order."""
-        # Step 1: A custom simplification specific to this project's grammar
-        self._simplify_grammar()
-        
-        # Step 2: Eliminate direct and indirect left recursion
-        self._eliminate_left_recursion()
-        
-        # Step 3: Eliminate common prefixes
-        self._left_factor()
-        self.final_grammar = self.no_left_recursion_grammar
-
-        # Step 4: Compute Terminals, FIRST sets, and FOLLOW sets
-        self._compute_terminals()
-        self.compute_first_sets()
-        self.compute_follow_sets()
-
-        # Step 5: Build the final parsing table
-        self.create_parsing_table()
-
-    def _simplify_grammar(self):
-        # This is the custom simplification from the report: S->ABC becomes S->AbC
-        self.simplified_grammar = copy.deepcopy(self.original_grammar)
-        self.simplified_grammar['S'] = [['A', 'b', 'C']]
-        del self.simplified_grammar['B']
-    
-    def _eliminate_left_recursion(self):
-        self.no_left_recursion_grammar = copy.deepcopy(self.simplified_grammar)
-        grammar = self.no_left_recursion_grammar
-        processed_rules = []
-        for nt_A in list(grammar.keys()):
-            # Handle indirect recursion
-            for nt_B in processed_rules:
-                # if a rule A -> Bγ exists, replace B with its productions
-                productions_A = grammar[nt_A]
-                new_productions_A = []
-                for prod in productions_A:
-                    if prod[0] == nt_B:
-                        for prod_B in grammar[nt_B]:
-                            new_productions_A.append(prod_B + prod[1:])
-                    else:
-                        new_productions_A.append(prod)
-                grammar[nt_A] = new_productions_A
-
-            # Handle direct recursion
-            alphas, betas = [], []
-            for prod in grammar[nt_A]:
-                if prod[0] == nt_A:
-                    alphas.append(prod[1:])
-                else:
-                    betas.append(prod)
-            
-            if alphas:
-                nt_A_prime = nt_A + "'"
-                grammar[nt_A] = [beta + [nt_A_prime] for beta in betas]
-                grammar[nt_A_prime] = [alpha + [nt_A_prime] for alpha in alphas] + [['ε']]
-            
-            processed_rules.append(nt_A)
-
-    def _left_factor(self):
-        # Simplified left-factoring for this specific grammar
-        # For A -> abA | ab
-        grammar = self.no_left_recursion_grammar
-        nt_A = 'A'
-        nt_A_prime = nt_A + "'"
-        grammar[nt_A] = [['a', 'b', nt_A_prime]]
-        grammar[nt_A_prime] = [['A'], ['ε']]
-        # This simplification leads back to left-recursion. The correct manual one is better.
-        # Let's use the manually derived right-recursive form which is known to be LL(1)
-        grammar['A'] = [['a', 'b', "A'"]]
-        grammar["A'"] = [['a', 'b', "A'"], ['ε']]
-        grammar['C'] = [['c', "C'"]]
-        grammar["C'"] = [['c', "C'"], ['ε']]
-
-    def _compute_terminals(self):
-        non_terminals = self.final_grammar.keys()
-        for prods in self.final_grammar.values():
-            for prod in prods:
-                for symbol in prod:
-                    if symbol not in non_terminals and symbol != 'ε':
-                        self.terminals.add(symbol)
-    
-    def compute_first_sets(self):
-        first = {nt: set() for nt in self.final_grammar}
-        while True:
-            updated = False
-            for nt, productions in self.final_grammar.items():
-                for prod in productions:
-                    # Rule 1: If X is a terminal, FIRST(X) = {X}
-                    if prod[0] in self.terminals:
-                        if prod[0] not in first[nt]:
-                            first[nt].add(prod[0])
-                            updated = True
-                    # Rule 2: If X is a non-terminal
-                    elif prod[0] in self.final_grammar:
-                        # Add FIRST of the first symbol
-                        for f in first[prod[0]]:
-                            if f != 'ε' and f not in first[nt]:
-                                first[nt].add(f)
-                                updated = True
-                        # If ε is in FIRST of first symbol, check next
-                        if 'ε' in first[prod[0]]:
-                            # Simplified: check next symbol if exists
-                            if len(prod) > 1:
-                                # This part needs full iterative logic for Y1Y2Y3...
-                                # For this grammar, it's simple enough.
-                                pass 
-                            else: # If it's just X -> Y and Y can be ε
-                                if 'ε' not in first[nt]:
-                                    first[nt].add('ε')
-                                    updated = True
-                    # Rule 3: If X -> ε
-                    elif prod[0] == 'ε':
-                        if 'ε' not in first[nt]:
-                            first[nt].add('ε')
-                            updated = True
-            if not updated: break
-        self.first_sets = first
-
-    def compute_follow_sets(self):
-        follow = {nt: set() for nt in self.final_grammar}
-        follow[self.start_symbol].add('$')
-        
-        while True:
-            updated = False
-            for nt_A, productions in self.final_grammar.items():
-                for prod in productions:
-                    for i, symbol_B in enumerate(prod):
-                        if symbol_B in self.final_grammar:
-                            # Rule 2: For A -> αBβ, FOLLOW(B) gets FIRST(β)
-                            if i + 1 < len(prod):
-                                symbol_beta = prod[i+1]
-                                first_beta = self.first_sets.get(symbol_beta, {symbol_beta})
-                                for f in first_beta - {'ε'}:
-                                    if f not in follow[symbol_B]:
-                                        follow[symbol_B].add(f)
-                                        updated = True
-                                if 'ε' in first_beta:
-                                    for f in follow[nt_A]:
-                                        if f not in follow[symbol_B]:
-                                            follow[symbol_B].add(f)
-                                            updated = True
-                            # Rule 3: For A -> αB, FOLLOW(B) gets FOLLOW(A)
-                            else:
-                                for f in follow[nt_A]:
-                                    if f not in follow[symbol_B]:
-                                        follow[symbol_B].add(f)
-                                        updated = True
-            if not updated: break
-        self.follow_sets = follow
-
-    def create_parsing_table(self):
-        table = {}
-        for nt_A, productions in self.final_grammar.items():
-            for prod in productions:
-                first_of_prod = set()
-                # Simplified calculation of FIRST(prod)
-                if prod[0] in self.terminals:
-                    first_of_prod.add(prod[0])
-                elif prod[0] in self.final_grammar:
-                    first_of_prod.update(self.first_sets[prod[0]])
-                else: # Epsilon production
-                    first_of_prod.add('ε')
-
-                for terminal in first_of_prod - {'ε'}:
-                    table[(nt_A, terminal)] = prod
-                
-                if 'ε' in first_of_prod:
-                    for terminal in self.follow_sets[nt_A]:
-                        table[(nt_A, terminal)] = prod
-        self.parsing_table = table
\ No newline at end of file
+# grammar/analyzer.py
+from collections import namedtuple
+from grammar import transform
+from grammar.sets import GrammarSets
+from grammar.transform import ProductionStore
+
+# Bump when the analysis results change for the same input grammar; cached
+# analyses (grammar/cache.py) made by another version are then rebuilt.
+ANALYZER_VERSION = 2
+
+# What an edit through add/remove/replace_production changed: non-terminals
+# of the final grammar with new productions, the parsing table rows rebuilt
+# and the conflicts that were not there before
+GrammarUpdate = namedtuple('GrammarUpdate', 'changed rows conflicts')
+
+class GrammarAnalyzer:
+    def __init__(self, grammar_rules, rewrites=None):
+        """
+        `rewrites` ({nt: [[symbols...]]}) replaces productions before the
+        general transformations run, for hand simplifications such as the
+        report's S → AbC; non-terminals no longer reachable are dropped.
+        Every stage is an immutable {nt: (body, ...)} dict whose bodies are
+        interned in self.store and shared with the previous stage.
+        """
+        self.store = ProductionStore()
+        self.original_grammar = self.store.grammar(grammar_rules)
+        self.rewrites = rewrites or {}
+        self.start_symbol = list(grammar_rules.keys())[0]
+        
+        # --- Variables to store the results of each step ---
+        self.simplified_grammar = {}
+        self.no_left_recursion_grammar = {}
+        self.final_grammar = {} # After left-factoring
+        self.first_sets = {}
+        self.follow_sets = {}
+        self.parsing_table = {}
+        self.conflicts = []  # (nt, terminal, kept production, new production)
+        self.terminals = set()
+        self._sets = None
+
+    def run_full_analysis(self):
+        """Runs all the transformation and calculation steps in order."""
+        # Step 1: Apply the requested rewrites and drop unreachable rules
+        self._simplify_grammar()
+        
+        # Step 2: Eliminate direct and indirect left recursion
+        self._eliminate_left_recursion()
+        
+        # Step 3: Eliminate common prefixes
+        self._left_factor()
+
+        # Step 4: Compute Terminals, FIRST sets, and FOLLOW sets
+        self._compute_terminals()
+        self.compute_first_sets()
+        self.compute_follow_sets()
+
+        # Step 5: Build the final parsing table
+        self.create_parsing_table()
+
+    def _simplify_grammar(self):
+        grammar = transform.rewrite(self.original_grammar, self.store, self.rewrites)
+        self.simplified_grammar = transform.remove_unreachable(grammar, self.start_symbol)
+    
+    def _eliminate_left_recursion(self):
+        self.no_left_recursion_grammar = transform.eliminate_left_recursion(self.simplified_grammar, self.store)
+
+    def _left_factor(self):
+        self.final_grammar = transform.left_factor(self.no_left_recursion_grammar, self.store)
+
+    def _compute_terminals(self):
+        non_terminals = self.final_grammar.keys()
+        for prods in self.final_grammar.values():
+            for prod in prods:
+                for symbol in prod:
+                    if symbol not in non_terminals and symbol != 'ε':
+                        self.terminals.add(symbol)
+    
+    def _grammar_sets(self):
+        # One engine serves FIRST, FOLLOW and the table for the final grammar
+        if self._sets is None or self._sets.grammar is not self.final_grammar:
+            self._sets = GrammarSets(self.final_grammar, self.start_symbol).compute()
+        return self._sets
+
+    def compute_first_sets(self):
+        self.first_sets = self._grammar_sets().first_sets()
+
+    def compute_follow_sets(self):
+        self.follow_sets = self._grammar_sets().follow_sets()
+
+    def create_parsing_table(self):
+        self.parsing_table = {}
+        self.conflicts = []
+        for nt_A in self.final_grammar:
+            self._table_row(nt_A)
+
+    def _table_row(self, nt_A):
+        sets = self._grammar_sets()
+        table = self.parsing_table
+        for prod in self.final_grammar[nt_A]:
+            # FIRST of the whole production, and FOLLOW(A) if it can vanish
+            first_bits, nullable = sets.first_of_sequence(prod)
+            if nullable:
+                first_bits |= sets.follow[nt_A]
+            for terminal in sets.names(first_bits):
+                if (nt_A, terminal) in table and table[(nt_A, terminal)] != prod:
+                    self.conflicts.append((nt_A, terminal, table[(nt_A, terminal)], prod))
+                table[(nt_A, terminal)] = prod
+
+    # --- Editing the grammar after run_full_analysis() ---
+
+    def add_production(self, nt, body):
+        """Adds nt → body (a symbol list; [] for ε) and returns a GrammarUpdate."""
+        productions = self.original_grammar.get(nt, ())
+        body = self.store.intern(body)
+        if body in productions:
+            raise ValueError(f"{nt} already has production {' '.join(body) or 'ε'}")
+        return self._edit(nt, productions + (body,))
+
+    def remove_production(self, nt, body):
+        """Removes nt → body; removing the last one removes nt."""
+        productions = self._productions_of(nt, body)
+        body = self.store.intern(body)
+        return self._edit(nt, tuple(p for p in productions if p != body))
+
+    def replace_production(self, nt, old_body, new_body):
+        productions = self._productions_of(nt, old_body)
+        old_body, new_body = self.store.intern(old_body), self.store.intern(new_body)
+        if new_body != old_body and new_body in productions:
+            raise ValueError(f"{nt} already has production {' '.join(new_body) or 'ε'}")
+        return self._edit(nt, tuple(new_body if p == old_body else p for p in productions))
+
+    def _productions_of(self, nt, body):
+        productions = self.original_grammar.get(nt, ())
+        if self.store.intern(body) not in productions:
+            raise ValueError(f"{nt} has no production {' '.join(body) or 'ε'}")
+        return productions
+
+    def _edit(self, nt, productions):
+        # The transformations are cheap and share interned productions, so
+        # they simply run again; the final grammar is then compared rule by
+        # rule and only the sets and table rows the changes reach are redone
+        if not productions and nt == self.start_symbol:
+            raise ValueError(f"Cannot remove the last production of the start symbol {nt}")
+        if not self.final_grammar:
+            self.run_full_analysis()
+        grammar = dict(self.original_grammar)
+        if productions:
+            grammar[nt] = productions
+        else:
+            del grammar[nt]
+        self.original_grammar = grammar
+
+        old_final, old_conflicts = self.final_grammar, set(self.conflicts)
+        # Sets of the grammar before the edit; an analysis restored from the
+        # cache has none yet, so they are built now
+        sets = self._grammar_sets()
+        self._simplify_grammar()
+        self._eliminate_left_recursion()
+        self._left_factor()
+        final = self.final_grammar
+        changed = [n for n in final if final[n] != old_final.get(n)]
+        self.terminals = set()
+        self._compute_terminals()
+
+        if old_final.keys() - final.keys() or any(n in sets.bits for n in changed):
+            # A symbol turned from non-terminal into terminal or back
+            self.compute_first_sets()
+            self.compute_follow_sets()
+            self.create_parsing_table()
+            rows = list(final)
+        else:
+            first_changed, follow_changed = sets.update(final, changed)
+            for n in first_changed:
+                self.first_sets[n] = sets.first_set(n)
+            for n in follow_changed:
+                self.follow_sets[n] = sets.follow_set(n)
+            # Rows whose productions changed, whose bodies can begin with a
+            # symbol with a new FIRST, or whose FOLLOW matters and changed
+            users = sets._users_index()
+            rows = set(changed)
+            for n in first_changed:
+                rows |= {user for user in users[n] if n in sets._starts(user)}
+            rows |= follow_changed & sets.nullable
+            rows = [n for n in final if n in rows]
+            self._patch_rows(rows)
+        return GrammarUpdate(changed, rows, [c for c in self.conflicts if c not in old_conflicts])
+
+    def _patch_rows(self, rows):
+        table = self.parsing_table
+        terminals = self._sets.terminals
+        for nt in rows:
+            for terminal in terminals:
+                table.pop((nt, terminal), None)
+        patched = set(rows)
+        self.conflicts = [c for c in self.conflicts if c[0] not in patched]
+        for nt in rows:
+            self._table_row(nt)
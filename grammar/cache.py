@@ -0,0 +1,234 @@
+# grammar/cache.py
+# On-disk cache of analyzed grammars: the transformation stages, FIRST and
+# FOLLOW sets, conflicts and the compiled parsing table, so a launch with an
+# unchanged grammar skips GrammarAnalyzer.run_full_analysis entirely.
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from grammar.analyzer import GrammarAnalyzer, ANALYZER_VERSION
+from syntax_parser.compiled_table import CompiledTable, EPSILON
+
+MAGIC = b'LL1C'
+FORMAT_VERSION = 1
+# magic, format version, byte order (0 little / 1 big), 32-byte grammar key
+HEADER = struct.Struct('<4sIB32s')
+STAGES = ('original_grammar', 'simplified_grammar', 'no_left_recursion_grammar', 'final_grammar')
+
+def default_directory():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'll1-compiler')
+
+def grammar_key(grammar_rules, rewrites=None):
+    """Digest of the grammar, the rewrites and the analyzer version."""
+    text = json.dumps([ANALYZER_VERSION, FORMAT_VERSION, grammar_rules, rewrites or {}], ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+class AnalysisCache:
+    def __init__(self, directory=None):
+        """
+        Cached analyses live in `directory` as <key>.ll1 files, one per
+        grammar. The key covers the grammar and ANALYZER_VERSION, so editing
+        either simply misses the cache; unreadable files are ignored.
+        """
+        self.directory = directory or default_directory()
+
+    def path(self, key):
+        return os.path.join(self.directory, key.hex()[:32] + '.ll1')
+
+    def analyze(self, grammar_rules, rewrites=None):
+        """(analyzer, compiled table), from the cache or computed and stored."""
+        key = grammar_key(grammar_rules, rewrites)
+        cached = self.load(key, grammar_rules, rewrites)
+        if cached is not None:
+            return cached
+        analyzer = GrammarAnalyzer(grammar_rules, rewrites)
+        analyzer.run_full_analysis()
+        compiled = CompiledTable(analyzer.parsing_table, analyzer.final_grammar.keys(), analyzer.start_symbol)
+        try:
+            self.save(key, analyzer, compiled)
+        except OSError:
+            pass  # a read-only or full disk only costs the next launch
+        return analyzer, compiled
+
+    def load(self, key, grammar_rules, rewrites=None):
+        try:
+            with open(self.path(key), 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    return _decode(data, key, grammar_rules, rewrites)
+        except (OSError, ValueError, IndexError, KeyError, BufferError, struct.error):
+            return None
+
+    def save(self, key, analyzer, compiled):
+        os.makedirs(self.directory, exist_ok=True)
+        data = _encode(key, analyzer, compiled)
+        import tempfile  # only needed on a miss; keeps startup imports small
+        # Write aside and rename, so readers never see a partial file
+        fd, temp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp, self.path(key))
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+class _Writer:
+    # Sections are int32 arrays prefixed by their length; symbols are
+    # indices into one string table written at the start.
+    def __init__(self):
+        self.strings = {}
+        self.ints = array('i')
+
+    def string(self, s):
+        return -1 if s is None else self.strings.setdefault(s, len(self.strings))
+
+    def section(self, values):
+        values = array('i', values)
+        self.ints.append(len(values))
+        self.ints.extend(values)
+
+    def grammar(self, grammar):
+        flat = [len(grammar)]
+        for nt, productions in grammar.items():
+            flat += (self.string(nt), len(productions))
+            for body in productions:
+                flat.append(len(body))
+                flat.extend(self.string(s) for s in body)
+        self.section(flat)
+
+    def sets(self, sets):
+        flat = [len(sets)]
+        for nt, members in sets.items():
+            flat += (self.string(nt), len(members))
+            flat.extend(self.string(s) for s in sorted(members))
+        self.section(flat)
+
+class _Reader:
+    def __init__(self, view, pos, strings):
+        self.view = view
+        self.pos = pos
+        self.strings = strings
+
+    def section(self):
+        (count,) = struct.unpack_from('=i', self.view, self.pos)
+        start = self.pos + 4
+        self.pos = start + 4 * count
+        values = array('i')
+        values.frombytes(self.view[start:self.pos])
+        return values
+
+    def names(self, ids):
+        strings = self.strings
+        return [None if i == -1 else strings[i] for i in ids]
+
+    def grammar(self, store):
+        flat, strings = self.section(), self.strings
+        grammar, i = {}, 1
+        for _ in range(flat[0]):
+            nt, count = strings[flat[i]], flat[i + 1]
+            i += 2
+            productions = []
+            for _ in range(count):
+                size = flat[i]
+                productions.append(store.intern([strings[s] for s in flat[i + 1:i + 1 + size]]))
+                i += 1 + size
+            grammar[nt] = tuple(productions)
+        return grammar
+
+    def sets(self):
+        flat, strings = self.section(), self.strings
+        sets, i = {}, 1
+        for _ in range(flat[0]):
+            nt, count = strings[flat[i]], flat[i + 1]
+            sets[nt] = {strings[s] for s in flat[i + 2:i + 2 + count]}
+            i += 2 + count
+        return sets
+
+def _encode(key, analyzer, compiled):
+    w = _Writer()
+    for stage in STAGES:
+        w.grammar(getattr(analyzer, stage))
+    w.sets(analyzer.first_sets)
+    w.sets(analyzer.follow_sets)
+    w.section(w.string(t) for t in sorted(analyzer.terminals))
+    conflicts = []
+    for nt, terminal, kept, new in analyzer.conflicts:
+        conflicts += (w.string(nt), w.string(terminal), len(kept), *map(w.string, kept), len(new), *map(w.string, new))
+    w.section(conflicts)
+
+    w.section([compiled.num_terminals, w.string(compiled.start_symbol), w.string(compiled.end_marker)])
+    w.section(w.string(s) for s in compiled.symbols)
+    w.section(compiled.production_lhs)
+    flat = []
+    for body in compiled.productions:
+        flat.append(len(body))
+        flat.extend(body)
+    w.section(flat)
+    w.section(compiled.row_offsets)
+    w.section(compiled.table)
+    # Filled cells as (nt, terminal, production) ids, so loading the dict
+    # form does not scan the whole dense table
+    cells = []
+    for nt, terminal in analyzer.parsing_table:
+        nt_id, terminal_id = compiled.symbol_ids[nt], compiled.symbol_ids[terminal]
+        cells += (nt_id, terminal_id, compiled.lookup(nt_id, terminal_id))
+    w.section(cells)
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, sys.byteorder == 'big', key)
+    strings = json.dumps(list(w.strings), ensure_ascii=False).encode('utf-8')
+    return b''.join((header, struct.pack('=i', len(strings)), strings, w.ints.tobytes()))
+
+def _decode(data, key, grammar_rules, rewrites):
+    magic, version, big_endian, stored_key = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != FORMAT_VERSION or stored_key != key or big_endian != (sys.byteorder == 'big'):
+        return None
+    pos = HEADER.size
+    (size,) = struct.unpack_from('=i', data, pos)
+    strings = json.loads(data[pos + 4:pos + 4 + size].decode('utf-8'))
+    view = memoryview(data)
+    try:
+        r = _Reader(view, pos + 4 + size, strings)
+        analyzer = GrammarAnalyzer(grammar_rules, rewrites)
+        for stage in STAGES:
+            setattr(analyzer, stage, r.grammar(analyzer.store))
+        analyzer.first_sets = r.sets()
+        analyzer.follow_sets = r.sets()
+        analyzer.terminals = set(r.names(r.section()))
+
+        flat, i = r.section(), 0
+        while i < len(flat):
+            nt, terminal = strings[flat[i]], strings[flat[i + 1]]
+            i += 2
+            bodies = []
+            for _ in range(2):
+                bodies.append(analyzer.store.intern(r.names(flat[i + 1:i + 1 + flat[i]])))
+                i += 1 + flat[i]
+            analyzer.conflicts.append((nt, terminal, *bodies))
+
+        num_terminals, start, end = r.section()
+        symbols = r.names(r.section())
+        production_lhs = r.section()
+        flat, productions, i = r.section(), [], 0
+        while i < len(flat):
+            productions.append(tuple(flat[i + 1:i + 1 + flat[i]]))
+            i += 1 + flat[i]
+        row_offsets = r.section()
+        table = r.section()
+        cells = r.section()
+    finally:
+        view.release()
+    compiled = CompiledTable.from_arrays(symbols, num_terminals, strings[start], strings[end],
+                                         row_offsets, table, productions, production_lhs)
+    analyzer.parsing_table = _parsing_table(compiled, analyzer.store, cells)
+    return analyzer, compiled
+
+def _parsing_table(compiled, store, cells):
+    # The {(nt, terminal): production} dict the UI shows, from the filled cells
+    symbols = compiled.symbols
+    bodies = [store.intern([symbols[s] for s in body] or [EPSILON]) for body in compiled.productions]
+    return {(symbols[cells[i]], symbols[cells[i + 1]]): bodies[cells[i + 2]]
+            for i in range(0, len(cells), 3)}
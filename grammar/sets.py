@@ -0,0 +1,352 @@
+# grammar/sets.py
+EPSILON = 'ε'
+
+def strongly_connected(nodes, edges):
+    """
+    Tarjan's algorithm without recursion. Yields components (lists) in an
+    order where every component comes after all components it has edges to.
+    """
+    index, low = {}, {}
+    stack, on_stack = [], set()
+    counter = 0
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(edges[root]))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(edges[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                yield component
+
+def propagate(direct, depends):
+    """
+    Least solution of value[x] = direct[x] | OR(value[y] for y in depends[x]).
+    Members of a cycle share one value, and components are visited after
+    everything they depend on, so each value is computed exactly once.
+    """
+    value = {}
+    for component in strongly_connected(list(direct), depends):
+        members = set(component)
+        bits = 0
+        for x in component:
+            bits |= direct[x]
+            for y in depends[x]:
+                if y not in members:
+                    bits |= value[y]
+        for x in component:
+            value[x] = bits
+    return value
+
+def _closure(seeds, edges):
+    found = set(seeds)
+    work = list(found)
+    while work:
+        for y in edges(work.pop()):
+            if y not in found:
+                found.add(y)
+                work.append(y)
+    return found
+
+class GrammarSets:
+    def __init__(self, grammar, start_symbol, end_marker='$'):
+        """
+        Nullable, FIRST and FOLLOW for any grammar ({nt: [[symbols...]]}).
+
+        Terminal sets are bitsets (Python ints; bit 0 is the end marker).
+        Nullable uses a counting worklist; FIRST and FOLLOW are solved over
+        their dependency graphs one strongly connected component at a time,
+        so every set is computed once, in O(V + E) bitset unions.
+        """
+        self.grammar = grammar
+        self.start_symbol = start_symbol
+        self.end_marker = end_marker
+        self.terminals = [end_marker]
+        self.bits = {end_marker: 1}
+        for productions in grammar.values():
+            for production in productions:
+                for symbol in production:
+                    if symbol not in grammar and symbol != EPSILON and symbol not in self.bits:
+                        self.bits[symbol] = 1 << len(self.terminals)
+                        self.terminals.append(symbol)
+        self.nullable = set()
+        self.first = {nt: 0 for nt in grammar}
+        self.follow = {nt: 0 for nt in grammar}
+        self._users = None
+
+    def compute(self):
+        self._compute_nullable()
+        self._compute_first()
+        self._compute_follow()
+        self._users = None
+        return self
+
+    def _bodies(self, nt):
+        for production in self.grammar[nt]:
+            yield [s for s in production if s != EPSILON]
+
+    def _compute_nullable(self):
+        self.nullable.clear()
+        self._solve_nullable(self.grammar)
+
+    def _solve_nullable(self, region):
+        # Counting algorithm over the non-terminals in region, with the rest
+        # already known: a production becomes nullable once all of its
+        # symbols are; each occurrence is decremented at most once.
+        nullable = self.nullable
+        remaining = []       # per production: symbols not yet known nullable
+        owner = []
+        occurrences = {nt: [] for nt in region}
+        work = []
+        for nt in region:
+            for body in self._bodies(nt):
+                prod = len(remaining)
+                owner.append(nt)
+                if any(s not in region and s not in nullable for s in body):
+                    remaining.append(-1)  # a terminal or non-nullable symbol
+                    continue
+                pending = [s for s in body if s in region]
+                remaining.append(len(pending))
+                for s in pending:
+                    occurrences[s].append(prod)
+                if not pending:
+                    work.append(prod)
+        while work:
+            nt = owner[work.pop()]
+            if nt in nullable:
+                continue
+            nullable.add(nt)
+            for prod in occurrences[nt]:
+                remaining[prod] -= 1
+                if remaining[prod] == 0:
+                    work.append(prod)
+
+    def _compute_first(self):
+        self.first = self._solve_first(self.grammar)
+
+    def _solve_first(self, region):
+        # FIRST(X) = direct terminals ∪ FIRST(Y) for every Y that can start
+        # X; FIRST of symbols outside region is taken as known
+        grammar, bits, nullable, first = self.grammar, self.bits, self.nullable, self.first
+        direct = {}
+        depends = {nt: set() for nt in region}
+        for nt in region:
+            found = 0
+            for body in self._bodies(nt):
+                for s in body:
+                    if s not in grammar:
+                        found |= bits[s]
+                        break
+                    if s in region:
+                        depends[nt].add(s)
+                    else:
+                        found |= first[s]
+                    if s not in nullable:
+                        break
+            direct[nt] = found
+        return propagate(direct, depends)
+
+    def _compute_follow(self):
+        self.follow = self._solve_follow(self.grammar, self.grammar)
+
+    def _solve_follow(self, region, owners):
+        # Direct contributions come from what follows B in each body;
+        # FOLLOW(B) also depends on FOLLOW(A) when B ends A's body (up to ε).
+        # Only B in region are solved, from the bodies of `owners` (every
+        # non-terminal using one of them); other FOLLOW sets are known.
+        grammar, bits, nullable, first, follow = self.grammar, self.bits, self.nullable, self.first, self.follow
+        direct = {nt: 0 for nt in region}
+        if self.start_symbol in direct:
+            direct[self.start_symbol] = bits[self.end_marker]
+        depends = {nt: set() for nt in region}
+        for nt in owners:
+            for body in self._bodies(nt):
+                suffix, suffix_nullable = 0, True
+                for s in reversed(body):
+                    if s in grammar:
+                        if s in direct:
+                            direct[s] |= suffix
+                            if suffix_nullable:
+                                if nt in region:
+                                    depends[s].add(nt)
+                                else:
+                                    direct[s] |= follow[nt]
+                        suffix = suffix | first[s] if s in nullable else first[s]
+                        suffix_nullable = suffix_nullable and s in nullable
+                    else:
+                        suffix, suffix_nullable = bits[s], False
+        return propagate(direct, depends)
+
+    def _users_index(self):
+        # Non-terminal -> the non-terminals whose bodies mention it
+        if self._users is None:
+            self._users = {nt: set() for nt in self.grammar}
+            for nt in self.grammar:
+                for body in self._bodies(nt):
+                    for s in body:
+                        if s in self._users:
+                            self._users[s].add(nt)
+        return self._users
+
+    def _starts(self, nt):
+        # Non-terminals that can start one of nt's bodies
+        found = set()
+        for body in self._bodies(nt):
+            for s in body:
+                if s not in self.grammar:
+                    break
+                found.add(s)
+                if s not in self.nullable:
+                    break
+        return found
+
+    def _ends(self, nt):
+        # Non-terminals that can end one of nt's bodies
+        found = set()
+        for body in self._bodies(nt):
+            for s in reversed(body):
+                if s not in self.grammar:
+                    break
+                found.add(s)
+                if s not in self.nullable:
+                    break
+        return found
+
+    def update(self, grammar, changed):
+        """
+        Brings the sets up to date after the productions of the
+        non-terminals in `changed` were replaced or added in `grammar`.
+        Terminals may be added, but no non-terminal may disappear or turn
+        into a terminal (compute() the sets again for such edits). Returns
+        (non-terminals whose FIRST or nullability changed, those whose
+        FOLLOW changed).
+
+        Only what can depend on the edit is solved again: nullability for
+        the users of changed rules, FIRST for non-terminals that can begin
+        with an affected one, FOLLOW for the symbols around affected ones
+        and whatever ends their bodies.
+        """
+        users = self._users_index()
+        old_bodies = {nt: list(self._bodies(nt)) if nt in self.grammar else [] for nt in changed}
+        self.grammar = grammar
+        for nt in changed:
+            users.setdefault(nt, set())
+            self.first.setdefault(nt, 0)
+            self.follow.setdefault(nt, 0)
+            for body in self._bodies(nt):
+                for s in body:
+                    if s not in grammar and s not in self.bits:
+                        self.bits[s] = 1 << len(self.terminals)
+                        self.terminals.append(s)
+        for nt in changed:
+            old = {s for body in old_bodies[nt] for s in body}
+            new = {s for body in self._bodies(nt) for s in body}
+            for s in old - new:
+                if s in users:
+                    users[s].discard(nt)
+            for s in new:
+                if s in users:
+                    users[s].add(nt)
+
+        # Nullability can only change for changed rules and the rules with
+        # an all non-terminal body mentioning one whose nullability may change
+        def nullable_users(y):
+            return [x for x in users[y]
+                    if any(y in body and all(s in grammar for s in body) for body in self._bodies(x))]
+        region = _closure(changed, nullable_users)
+        was_nullable = region & self.nullable
+        self.nullable -= region
+        self._solve_nullable(region)
+        nullable_changed = was_nullable ^ (region & self.nullable)
+
+        # FIRST: rules whose bodies changed or mention a symbol whose
+        # nullability changed, and everything that can begin with them
+        seeds = set(changed) | nullable_changed
+        for nt in nullable_changed:
+            seeds |= users[nt]
+        region = _closure(seeds, lambda y: [x for x in users[y] if y in self._starts(x)])
+        old_first = {nt: self.first[nt] for nt in region}
+        self.first.update(self._solve_first(region))
+        first_changed = {nt for nt in region if self.first[nt] != old_first[nt]} | nullable_changed
+        first_changed |= {nt for nt in changed if not old_bodies[nt]}
+
+        # FOLLOW: symbols in the old and new bodies of changed rules and in
+        # bodies mentioning a symbol whose FIRST changed, plus what ends them
+        seeds = {s for bodies in old_bodies.values() for body in bodies for s in body if s in grammar}
+        seeds |= {s for nt in changed for body in self._bodies(nt) for s in body if s in grammar}
+        for nt in first_changed:
+            for owner in users[nt]:
+                seeds |= {s for body in self._bodies(owner) for s in body if s in grammar}
+        seeds.add(self.start_symbol)
+        region = _closure(seeds, self._ends)
+        owners = set()
+        for nt in region:
+            owners |= users[nt]
+        old_follow = {nt: self.follow[nt] for nt in region}
+        self.follow.update(self._solve_follow(region, owners))
+        follow_changed = {nt for nt in region if self.follow[nt] != old_follow[nt]}
+        follow_changed |= {nt for nt in changed if not old_bodies[nt]}
+        return first_changed, follow_changed
+
+    def first_of_sequence(self, symbols):
+        """(bitset, nullable) for a symbol sequence, e.g. a production body."""
+        result = 0
+        for s in symbols:
+            if s == EPSILON:
+                continue
+            if s not in self.grammar:
+                return result | self.bits[s], False
+            result |= self.first[s]
+            if s not in self.nullable:
+                return result, False
+        return result, True
+
+    def names(self, bitset):
+        """Terminal names in a bitset."""
+        found = set()
+        while bitset:
+            low = bitset & -bitset
+            found.add(self.terminals[low.bit_length() - 1])
+            bitset ^= low
+        return found
+
+    def first_set(self, nt):
+        """FIRST(nt) as names, with 'ε' if nt is nullable."""
+        return self.names(self.first[nt]) | ({EPSILON} if nt in self.nullable else set())
+
+    def follow_set(self, nt):
+        return self.names(self.follow[nt])
+
+    def first_sets(self):
+        return {nt: self.first_set(nt) for nt in self.first}
+
+    def follow_sets(self):
+        return {nt: self.follow_set(nt) for nt in self.follow}
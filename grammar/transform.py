@@ -0,0 +1,155 @@
+# grammar/transform.py
+# Grammar transformations over immutable grammars: {nt: (body, ...)} where
+# every body is an interned tuple of symbols. Each stage returns a new dict
+# that shares the untouched entries (and all equal bodies) with its input.
+from grammar.sets import strongly_connected
+
+EPSILON = 'ε'
+
+class ProductionStore:
+    def __init__(self):
+        """
+        Interns production bodies, so an equal right-hand side is one tuple
+        object no matter how many stages or non-terminals use it.
+        """
+        self.bodies = {}
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def intern(self, symbols):
+        body = tuple(s for s in symbols if s != EPSILON) or (EPSILON,)
+        return self.bodies.setdefault(body, body)
+
+    def grammar(self, rules):
+        """Immutable, interned copy of a {nt: [[symbols...]]} grammar."""
+        return {nt: tuple(self.intern(p) for p in productions) for nt, productions in rules.items()}
+
+def symbols(body):
+    """A body without its ε marker."""
+    return () if body == (EPSILON,) else body
+
+def fresh_name(base, taken):
+    name = base + "'"
+    while name in taken:
+        name += "'"
+    taken.add(name)
+    return name
+
+def rewrite(grammar, store, rules):
+    """Replaces the productions of the non-terminals in `rules`."""
+    result = dict(grammar)
+    for nt, productions in rules.items():
+        result[nt] = tuple(store.intern(p) for p in productions)
+    return result
+
+def remove_unreachable(grammar, start_symbol):
+    reached = {start_symbol}
+    pending = [start_symbol]
+    while pending:
+        for body in grammar[pending.pop()]:
+            for s in body:
+                if s in grammar and s not in reached:
+                    reached.add(s)
+                    pending.append(s)
+    return {nt: productions for nt, productions in grammar.items() if nt in reached}
+
+def eliminate_left_recursion(grammar, store):
+    """
+    Removes direct and indirect left recursion. Only non-terminals on a
+    cycle of the left-corner graph (A → B... edges) are touched, each cycle
+    with the classic ordered substitution, so the work is proportional to
+    the recursive part of the grammar. Left recursion hidden behind a
+    nullable prefix is not detected.
+    """
+    corners = {nt: {body[0] for body in productions if body[0] in grammar}
+               for nt, productions in grammar.items()}
+    result = dict(grammar)
+    taken = set(grammar)
+    for component in strongly_connected(list(grammar), corners):
+        if len(component) == 1 and component[0] not in corners[component[0]]:
+            continue
+        members = set(component)
+        order = [nt for nt in grammar if nt in members]
+        for i, nt_a in enumerate(order):
+            productions = list(result[nt_a])
+            # Substitute earlier members that start a production of A
+            for nt_b in order[:i]:
+                if not any(body[0] == nt_b for body in productions):
+                    continue
+                expanded = []
+                for body in productions:
+                    if body[0] == nt_b:
+                        expanded.extend(store.intern(symbols(beta) + body[1:]) for beta in result[nt_b])
+                    else:
+                        expanded.append(body)
+                productions = expanded
+
+            # Direct recursion: A → Aα | β becomes A → βA', A' → αA' | ε
+            alphas = [body[1:] for body in productions if body[0] == nt_a and len(body) > 1]
+            betas = [body for body in productions if body[0] != nt_a]
+            if alphas:
+                tail = fresh_name(nt_a, taken)
+                result[nt_a] = tuple(store.intern(symbols(beta) + (tail,)) for beta in betas)
+                result[tail] = tuple(store.intern(alpha + (tail,)) for alpha in alphas) + (store.intern(()),)
+            else:
+                result[nt_a] = tuple(productions)
+    return result
+
+def left_factor(grammar, store):
+    """
+    Factors common prefixes out of each non-terminal's productions with a
+    trie: every branching trie node below the root becomes a new tail
+    non-terminal (A', A'', ...), with ε as its last alternative.
+    """
+    result = dict(grammar)
+    taken = set(grammar)
+    for nt, productions in grammar.items():
+        firsts = [body[0] for body in productions]
+        if len(set(firsts)) == len(firsts):
+            continue  # no two productions share a first symbol
+
+        root = ({}, [False])  # (children by symbol, [ends here])
+        for body in productions:
+            node = root
+            for s in symbols(body):
+                node = node[0].setdefault(s, ({}, [False]))
+            node[1][0] = True
+
+        tails = []
+        pending = [(nt, root)]
+        while pending:
+            name, node = pending.pop()
+            bodies = []
+            for s, child in node[0].items():
+                chain = [s]
+                while len(child[0]) == 1 and not child[1][0]:
+                    (s, child), = child[0].items()
+                    chain.append(s)
+                if child[0]:
+                    tail = fresh_name(nt, taken)
+                    tails.append(tail)
+                    chain.append(tail)
+                    pending.append((tail, child))
+                bodies.append(store.intern(chain))
+            if node[1][0]:
+                bodies.append(store.intern(()))
+            result[name] = tuple(bodies)
+        _inline_unit_tails(result, tails)
+    return result
+
+def _inline_unit_tails(grammar, tails):
+    # A tail like A' → A | ε, where A has a single production, reads better
+    # (and parses in fewer steps) as A' → <that production> | ε. Skipped if
+    # it would make two alternatives start with the same symbol again.
+    for tail in tails:
+        bodies = list(grammar[tail])
+        for i, body in enumerate(bodies):
+            target = body[0]
+            if len(body) != 1 or target == tail or target not in grammar or len(grammar[target]) != 1:
+                continue
+            inlined = grammar[target][0]
+            if any(other[0] == inlined[0] for j, other in enumerate(bodies) if j != i):
+                continue
+            bodies[i] = inlined
+        grammar[tail] = tuple(bodies)
@@ -1,35 +1,238 @@
 # main.py
-import tkinter as tk
-from grammar.analyzer import GrammarAnalyzer
+import time
+STARTED = time.perf_counter()  # before any project import, for --timing
+
+import argparse
+import json
+import sys
+from glob import glob
+from grammar.cache import AnalysisCache
 from syntax_parser.predictive_parser import PredictiveParser
-from ui.app import ParserApp
 
-def main():
+# Define the original grammar from the project requirements
+SAMPLE_GRAMMAR = {
+    'S': [['A', 'B', 'C']],
+    'A': [['a', 'b', 'A'], ['a', 'b']],
+    'B': [['b'], ['B', 'C']],
+    'C': [['c'], ['c', 'C']]
+}
+# The report's simplification S → ABC into S → AbC keeps the grammar LL(1)
+SAMPLE_REWRITES = {'S': [['A', 'b', 'C']]}
+# Lexer rules for the grammar's terminals, tried in order; None skips the match
+SAMPLE_LEXER_RULES = [
+    ('a', r'a'),
+    ('b', r'b'),
+    ('c', r'c'),
+    (None, r'\s+'),
+]
+
+def load_grammar_file(path):
     """
-    Main function to orchestrate the parser generation and UI launch.
+    Reads a JSON grammar file: {"grammar": {nt: [[symbols...]]},
+    "rewrites": {...}, "lexer": [[terminal or null, regex], ...]}, where
+    only "grammar" is required. A bare {nt: [[symbols...]]} object works too.
     """
-    # Define the original grammar from the project requirements
-    original_grammar = {
-        'S': [['A', 'B', 'C']],
-        'A': [['a', 'b', 'A'], ['a', 'b']],
-        'B': [['b'], ['B', 'C']],
-        'C': [['c'], ['c', 'C']]
-    }
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if 'grammar' not in data:
+        data = {'grammar': data}
+    lexer_rules = [tuple(rule) for rule in data.get('lexer') or []] or None
+    return data['grammar'], data.get('rewrites'), lexer_rules
 
-    # 1. Analyze the grammar to produce the parsing table and transformation steps
-    analyzer = GrammarAnalyzer(original_grammar)
+def build_parser(grammar, rewrites, lexer_rules, use_cache=True):
+    """(analyzer, parser); the analysis comes from the on-disk cache when possible."""
+    if use_cache:
+        analyzer, compiled = AnalysisCache().analyze(grammar, rewrites)
+        parser = PredictiveParser.from_compiled(compiled, lexer_rules=lexer_rules, follow_sets=analyzer.follow_sets)
+        return analyzer, parser
+    from grammar.analyzer import GrammarAnalyzer
+    analyzer = GrammarAnalyzer(grammar, rewrites)
     analyzer.run_full_analysis()
-
-    # 2. Initialize the parser with the generated table
     parser = PredictiveParser(
         parsing_table=analyzer.parsing_table,
         non_terminals=analyzer.final_grammar.keys(),
-        start_symbol=analyzer.start_symbol
+        start_symbol=analyzer.start_symbol,
+        lexer_rules=lexer_rules,
+        follow_sets=analyzer.follow_sets
     )
+    return analyzer, parser
 
-    # 3. Launch the UI, passing both the parser and the analyzer for display
+def run_gui(analyzer, parser, tree_path=None):
+    # Tk and the UI modules are only loaded here, so the CLI never pays for them
+    from ui.app import ParserApp
     app = ParserApp(parser, analyzer)
+    if tree_path:
+        app.open_tree(tree_path)
     app.mainloop()
 
+def _failing(error):
+    # Stands in for an input that cannot be read, so the error is reported in order
+    def parse(parser):
+        raise error
+    return parse
+
+def _read(name):
+    if name == '-':
+        return sys.stdin.read()
+    with open(name, encoding='utf-8') as f:
+        return f.read()
+
+def iter_inputs(args):
+    """Yields (name, line number or None, parse function) for every input."""
+    if args.all_errors:
+        check = lambda parser, text: parser.parse_recovering(text, max_errors=args.max_errors)
+    else:
+        check = lambda parser, text: parser.recognize(text)
+    for text in args.string:
+        yield '<string>', None, lambda parser, text=text: check(parser, text)
+    for pattern in args.inputs:
+        if pattern == '-':
+            names = ['-']
+        elif any(c in pattern for c in '*?['):
+            names = sorted(glob(pattern, recursive=True))
+            if not names:
+                yield pattern, None, _failing(FileNotFoundError("no files match"))
+        else:
+            names = [pattern]
+        for name in names:
+            label = '<stdin>' if name == '-' else name
+            if args.lines:
+                try:
+                    f = sys.stdin if name == '-' else open(name, encoding='utf-8')
+                except OSError as e:
+                    yield label, None, _failing(e)
+                    continue
+                try:
+                    for number, line in enumerate(f, 1):
+                        yield label, number, lambda parser, line=line.rstrip('\r\n'): check(parser, line)
+                except UnicodeDecodeError as e:
+                    yield label, None, _failing(e)
+                finally:
+                    if f is not sys.stdin:
+                        f.close()
+            elif args.all_errors or args.metrics:
+                # Recovery and metrics need the whole text; plain checks stream below
+                yield label, None, lambda parser, name=name: check(parser, _read(name))
+            elif name == '-':
+                yield label, None, lambda parser: parser.parse_stream(sys.stdin)
+            else:
+                yield label, None, lambda parser, name=name: parser.parse_file(name)
+
+def report(args, name, line, parser, accepted):
+    where = name if line is None else f"{name}:{line}"
+    if args.json:
+        record = {'input': name, 'accepted': accepted}
+        if line is not None:
+            record['line'] = line
+        if not accepted:
+            record['error_position'] = parser.error_position
+            record['error'] = parser.error_message
+            if args.all_errors:
+                record['errors'] = [{'position': e.position, 'message': e.message} for e in parser.errors]
+        print(json.dumps(record, ensure_ascii=False))
+    elif accepted:
+        print(f"{where}: accepted")
+    elif args.all_errors:
+        print(f"{where}: rejected with {len(parser.errors)} errors")
+        for error in parser.errors:
+            print(f"  {error.message}")
+    else:
+        print(f"{where}: rejected: {parser.error_message}")
+
+def run_cli(args, analyzer, parser):
+    """Parses every input; the exit status is 0 if all were accepted, 1 if not, 2 on I/O errors."""
+    status = 0
+    parse_time = 0.0
+    count = 0
+    for name, line, parse in iter_inputs(args):
+        started = time.perf_counter()
+        try:
+            accepted = parse(parser)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"{name}: error: {e}", file=sys.stderr)
+            status = 2
+            continue
+        parse_time += time.perf_counter() - started
+        count += 1
+        report(args, name, line, parser, accepted)
+        if not accepted and status == 0:
+            status = 1
+    sys.stdout.flush()
+    if args.metrics:
+        try:
+            parser.metrics.write(args.metrics)
+        except OSError as e:
+            print(f"{args.metrics}: error: {e}", file=sys.stderr)
+            status = 2
+    if args.timing:
+        print(f"timing: parsed {count} inputs in {parse_time * 1000:.1f} ms", file=sys.stderr)
+    return status
+
+def main(argv=None):
+    """
+    Main function to orchestrate the parser generation and UI launch.
+    With inputs (files, globs, '-' for stdin or --string) it parses them
+    headless and prints one result per input; otherwise it opens the GUI.
+    """
+    arg_parser = argparse.ArgumentParser(description="LL(1) parser generator and analyzer.")
+    arg_parser.add_argument('inputs', nargs='*', help="files or glob patterns to parse, '-' for stdin")
+    arg_parser.add_argument('-g', '--grammar', help="JSON grammar file (default: the sample grammar)")
+    arg_parser.add_argument('-s', '--string', action='append', default=[], help="parse this string (repeatable)")
+    arg_parser.add_argument('--lines', action='store_true', help="parse every input line separately")
+    arg_parser.add_argument('--all-errors', action='store_true', help="recover from syntax errors and report all of them")
+    arg_parser.add_argument('--max-errors', type=int, default=100, help="stop after this many errors (with --all-errors)")
+    arg_parser.add_argument('--json', action='store_true', help="print results as JSON lines")
+    arg_parser.add_argument('--gui', action='store_true', help="open the GUI even when inputs are given")
+    arg_parser.add_argument('--open-tree', metavar='PATH', help="open the GUI showing a saved parse tree (.ll1t or .jsonl)")
+    arg_parser.add_argument('--generate', metavar='PATH', help="write a standalone direct-coded parser module and exit")
+    arg_parser.add_argument('--table-stats', action='store_true', help="print the parsing table's memory, dict vs dense vs packed, and exit")
+    arg_parser.add_argument('--packed-table', action='store_true', help="parse on the packed table, dropping the dense one")
+    arg_parser.add_argument('--no-cache', action='store_true', help="always analyze the grammar from scratch")
+    arg_parser.add_argument('--metrics', metavar='PATH', help="write production, table cell, stack depth and phase time metrics as JSON")
+    arg_parser.add_argument('--timing', action='store_true', help="report startup and parse times on stderr")
+    args = arg_parser.parse_args(argv)
+
+    if args.grammar:
+        try:
+            grammar, rewrites, lexer_rules = load_grammar_file(args.grammar)
+        except (OSError, ValueError) as e:
+            arg_parser.error(f"cannot load grammar {args.grammar}: {e}")
+    else:
+        grammar, rewrites, lexer_rules = SAMPLE_GRAMMAR, SAMPLE_REWRITES, SAMPLE_LEXER_RULES
+
+    # 1. Analyze the grammar to produce the parsing table and transformation steps
+    imported = time.perf_counter()
+    analyzer, parser = build_parser(grammar, rewrites, lexer_rules, use_cache=not args.no_cache)
+    ready = time.perf_counter()
+    if args.timing:
+        print(f"timing: imports {(imported - STARTED) * 1000:.1f} ms, "
+              f"analysis {(ready - imported) * 1000:.1f} ms, "
+              f"startup {(ready - STARTED) * 1000:.1f} ms", file=sys.stderr)
+    if analyzer.conflicts:
+        print(f"warning: grammar is not LL(1), {len(analyzer.conflicts)} table conflicts", file=sys.stderr)
+
+    if args.generate:
+        from syntax_parser.codegen import write_module
+        write_module(args.generate, parser.compiled)
+        return 0
+
+    if args.packed_table:
+        parser.compiled.pack()
+
+    if args.table_stats:
+        from syntax_parser.packed_table import PackedTable, memory_report
+        packed = parser.compiled.packed or PackedTable.from_parsing_table(analyzer.parsing_table, parser.compiled)
+        for name, value in memory_report(packed, analyzer.parsing_table).items():
+            print(f"{name}: {value}")
+        return 0
+
+    # 2. Parse headless, or launch the UI with both the parser and the analyzer
+    if (args.inputs or args.string) and not (args.gui or args.open_tree):
+        if args.metrics:
+            parser.enable_metrics()
+        return run_cli(args, analyzer, parser)
+    run_gui(analyzer, parser, args.open_tree)
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# service/client.py
+# Client for the parse service, and a command line that registers a grammar
+# file and parses inputs through a running server.
+# Usage: python -m service.client (--socket PATH | --port N) [-g grammar.json] [-s TEXT ...] [FILE ...]
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from service.protocol import MAX_FRAME, ServiceError, FrameError, encode_frame, read_frame
+
+class ParseClient:
+    def __init__(self, reader, writer, max_frame=MAX_FRAME):
+        """
+        One connection to a ParseServer; open it with ParseClient.unix() or
+        ParseClient.tcp(). Calls may overlap: each request gets its own id
+        and a background task hands every response to its caller. Failed
+        requests raise ServiceError with the server's error code.
+        """
+        self.reader = reader
+        self.writer = writer
+        self.max_frame = max_frame
+        self.ids = itertools.count(1)
+        self.waiting = {}  # request id -> future of its response
+        self.receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def unix(cls, path):
+        reader, writer = await asyncio.open_unix_connection(path, limit=MAX_FRAME)
+        return cls(reader, writer)
+
+    @classmethod
+    async def tcp(cls, host='127.0.0.1', port=0):
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_FRAME)
+        return cls(reader, writer)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self.receiver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _receive(self):
+        error = ConnectionError("Connection closed by the server")
+        try:
+            while True:
+                response = await read_frame(self.reader, self.max_frame)
+                if response is None:
+                    break
+                future = self.waiting.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+                elif response.get('id') is None and not response.get('ok', True):
+                    # An error about the stream itself; the server hangs up next
+                    error = ServiceError(response.get('code'), response.get('error'))
+        except (FrameError, ConnectionError) as e:
+            error = e
+        for future in self.waiting.values():
+            if not future.done():
+                future.set_exception(error)
+        self.waiting.clear()
+
+    async def request(self, op, **fields):
+        """Sends one request and returns its response fields."""
+        if self.receiver.done():
+            raise ConnectionError("Connection is closed")
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(encode_frame({'id': request_id, 'op': op, **fields}))
+        await self.writer.drain()
+        response = await future
+        if not response.get('ok'):
+            raise ServiceError(response.get('code'), response.get('error'))
+        return response
+
+    async def register(self, name, grammar):
+        """Registers a grammar (JSON grammar file format) under name; returns its key."""
+        return (await self.request('register', name=name, grammar=grammar))['key']
+
+    async def parse(self, grammar, text, tree=False, timeout=None):
+        """
+        Parses text with a registered grammar name or an inline grammar:
+        {"accepted", "error_position", "error"} plus "tree", the preorder
+        (value, is_terminal, child_count) records, when tree is set.
+        """
+        fields = {'grammar': grammar, 'input': text, 'tree': tree}
+        if timeout is not None:
+            fields['timeout'] = timeout
+        return await self.request('parse', **fields)
+
+    async def stats(self):
+        return await self.request('stats')
+
+    async def ping(self):
+        await self.request('ping')
+
+async def run(args):
+    if args.socket:
+        client = await ParseClient.unix(args.socket)
+    else:
+        client = await ParseClient.tcp(args.host, args.port)
+    status = 0
+    async with client:
+        if args.grammar:
+            with open(args.grammar, encoding='utf-8') as f:
+                await client.register(args.name, json.load(f))
+        if args.stats:
+            print(json.dumps(await client.stats()))
+            return 0
+        inputs = [('<string>', text) for text in args.string]
+        for path in args.inputs:
+            with open(path, encoding='utf-8') as f:
+                inputs.append((path, f.read()))
+        # Sent all at once; the server parses them concurrently
+        results = await asyncio.gather(*(client.parse(args.name, text, args.tree, args.timeout)
+                                         for _, text in inputs), return_exceptions=True)
+        for (name, _), result in zip(inputs, results):
+            if isinstance(result, ServiceError):
+                print(f"{name}: error: {result}", file=sys.stderr)
+                status = 2
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            record = {'input': name, 'accepted': result['accepted']}
+            if not result['accepted']:
+                record['error_position'] = result['error_position']
+                record['error'] = result['error']
+            if args.tree:
+                record['tree'] = result.get('tree')
+            print(json.dumps(record, ensure_ascii=False))
+            if not result['accepted'] and status == 0:
+                status = 1
+    return status
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Parse inputs through a running parse service.")
+    where = arg_parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--socket', metavar='PATH', help="server's Unix socket")
+    where.add_argument('--port', type=int, help="server's TCP port")
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('inputs', nargs='*', help="files to parse")
+    arg_parser.add_argument('-s', '--string', action='append', default=[], help="parse this string (repeatable)")
+    arg_parser.add_argument('-g', '--grammar', help="JSON grammar file to register under --name first")
+    arg_parser.add_argument('--name', default='default', help="registered grammar to parse with")
+    arg_parser.add_argument('--tree', action='store_true', help="include the parse trees")
+    arg_parser.add_argument('--timeout', type=float, help="per-request timeout in seconds")
+    arg_parser.add_argument('--stats', action='store_true', help="print the server's counters and exit")
+    args = arg_parser.parse_args(argv)
+    try:
+        return asyncio.run(run(args))
+    except (OSError, ServiceError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# service/protocol.py
+# Wire format of the parse service: every message is a JSON object sent as
+# one frame, a 4-byte big-endian length followed by that many UTF-8 bytes.
+# Requests carry an "id" and an "op"; the response echoes the id, so a
+# client can pipeline requests on one connection and match the answers.
+import asyncio
+import json
+import struct
+
+LENGTH = struct.Struct('>I')
+MAX_FRAME = 16 * 1024 * 1024
+
+# Error codes of {"ok": false, "code": ..., "error": ...} responses
+BAD_REQUEST = 'bad_request'
+UNKNOWN_GRAMMAR = 'unknown_grammar'
+TIMEOUT = 'timeout'
+INTERNAL = 'internal'
+
+class FrameError(Exception):
+    """A frame that is cut short, too large or not a JSON object."""
+
+class ServiceError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+def encode_frame(message):
+    body = json.dumps(message, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return LENGTH.pack(len(body)) + body
+
+async def read_frame(reader, max_size=MAX_FRAME):
+    """The next message from reader, or None at a clean end of stream."""
+    try:
+        header = await reader.readexactly(LENGTH.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise FrameError("Connection closed inside a frame header") from None
+    size, = LENGTH.unpack(header)
+    if size > max_size:
+        raise FrameError(f"Frame of {size} bytes exceeds the {max_size} byte limit")
+    try:
+        body = await reader.readexactly(size)
+    except asyncio.IncompleteReadError:
+        raise FrameError("Connection closed inside a frame") from None
+    try:
+        message = json.loads(body)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise FrameError(f"Frame is not valid JSON: {e}") from None
+    if not isinstance(message, dict):
+        raise FrameError("Frame is not a JSON object")
+    return message
+
+def error_response(request_id, code, message):
+    return {'id': request_id, 'ok': False, 'code': code, 'error': message}
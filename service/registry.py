@@ -0,0 +1,133 @@
+# service/registry.py
+# Grammars the parse service knows: specs registered under a name, and an
+# LRU of analyzed grammars (compiled table plus idle parsers) keyed by spec.
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict, namedtuple
+from grammar.analyzer import GrammarAnalyzer
+from grammar.cache import AnalysisCache
+from service.protocol import ServiceError, BAD_REQUEST, UNKNOWN_GRAMMAR
+from syntax_parser.compiled_table import CompiledTable
+from syntax_parser.predictive_parser import PredictiveParser
+
+GrammarSpec = namedtuple('GrammarSpec', 'key grammar rewrites lexer_rules')
+
+# idle holds parsers not in use: a PredictiveParser keeps per-parse state,
+# so each executor thread takes its own and puts it back when done
+CompiledGrammar = namedtuple('CompiledGrammar', 'spec compiled follow_sets conflicts idle')
+
+def grammar_spec(data):
+    """
+    Checks a grammar as sent by a client, in the JSON grammar file format
+    ({"grammar": ..., "rewrites": ..., "lexer": ...} or a bare grammar),
+    and returns its GrammarSpec.
+    """
+    if not isinstance(data, dict):
+        raise ServiceError(BAD_REQUEST, "Grammar must be a JSON object")
+    if 'grammar' not in data:
+        data = {'grammar': data}
+    grammar, rewrites = data['grammar'], data.get('rewrites') or None
+    for rules in (grammar, rewrites or {}):
+        if not isinstance(rules, dict) or not all(
+                isinstance(nt, str) and isinstance(bodies, list) and all(
+                    isinstance(body, list) and body and all(isinstance(s, str) for s in body)
+                    for body in bodies)
+                for nt, bodies in rules.items()):
+            raise ServiceError(BAD_REQUEST, "Grammar rules must map non-terminals to lists of symbol lists")
+    if not grammar:
+        raise ServiceError(BAD_REQUEST, "Grammar has no rules")
+    lexer = data.get('lexer') or []
+    if not isinstance(lexer, list) or not all(
+            isinstance(rule, list) and len(rule) == 2 and isinstance(rule[1], str)
+            and (rule[0] is None or isinstance(rule[0], str)) for rule in lexer):
+        raise ServiceError(BAD_REQUEST, "Lexer rules must be [terminal or null, regex] pairs")
+    lexer_rules = [tuple(rule) for rule in lexer] or None
+    text = json.dumps([grammar, rewrites, lexer], ensure_ascii=False, sort_keys=True)
+    return GrammarSpec(hashlib.sha256(text.encode('utf-8')).hexdigest()[:32], grammar, rewrites, lexer_rules)
+
+def analyze(spec, cache=None):
+    """Analyzes spec into a CompiledGrammar; CPU-bound, run in an executor."""
+    if cache is not None:
+        analyzer, compiled = cache.analyze(spec.grammar, spec.rewrites)
+    else:
+        analyzer = GrammarAnalyzer(spec.grammar, spec.rewrites)
+        analyzer.run_full_analysis()
+        compiled = CompiledTable(analyzer.parsing_table, analyzer.final_grammar.keys(), analyzer.start_symbol)
+    try:
+        parser = PredictiveParser.from_compiled(compiled, spec.lexer_rules, analyzer.follow_sets)
+    except (ValueError, TypeError) as e:  # re.error is a ValueError
+        raise ServiceError(BAD_REQUEST, f"Bad lexer rules: {e}") from None
+    return CompiledGrammar(spec, compiled, analyzer.follow_sets, len(analyzer.conflicts), [parser])
+
+def checkout(entry):
+    """An idle parser of entry, or a new one; hand it back with checkin()."""
+    try:
+        return entry.idle.pop()
+    except IndexError:
+        return PredictiveParser.from_compiled(entry.compiled, entry.spec.lexer_rules, entry.follow_sets)
+
+def checkin(entry, parser):
+    entry.idle.append(parser)
+
+class GrammarRegistry:
+    def __init__(self, capacity=32, cache=True, cache_directory=None):
+        """
+        Keeps at most `capacity` analyzed grammars, evicting the least
+        recently used. Names map to specs, not to analyses, so a named
+        grammar whose analysis was evicted is analyzed again on next use
+        (from the on-disk AnalysisCache unless cache is False).
+        """
+        self.capacity = capacity
+        self.cache = AnalysisCache(cache_directory) if cache else None
+        self.names = {}
+        self.entries = OrderedDict()  # spec key -> CompiledGrammar, oldest first
+        self.loading = {}             # spec key -> future of an analysis in progress
+        self.hits = self.misses = self.evictions = 0
+
+    def resolve(self, grammar):
+        """The GrammarSpec for a request's "grammar": a registered name or an inline grammar."""
+        if isinstance(grammar, str):
+            try:
+                return self.names[grammar]
+            except KeyError:
+                raise ServiceError(UNKNOWN_GRAMMAR, f"No grammar registered as {grammar!r}") from None
+        return grammar_spec(grammar)
+
+    def register(self, name, spec):
+        self.names[name] = spec
+
+    async def get(self, spec, executor):
+        """The CompiledGrammar for spec; concurrent misses share one analysis."""
+        entry = self.entries.get(spec.key)
+        if entry is not None:
+            self.entries.move_to_end(spec.key)
+            self.hits += 1
+            return entry
+        future = self.loading.get(spec.key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.get_running_loop().run_in_executor(executor, analyze, spec, self.cache)
+            self.loading[spec.key] = future
+            future.add_done_callback(lambda f: self._loaded(spec.key, f))
+        # A caller that times out must not cancel the analysis other callers wait on
+        return await asyncio.shield(future)
+
+    def _loaded(self, key, future):
+        del self.loading[key]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.entries[key] = future.result()
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            'names': len(self.names),
+            'entries': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
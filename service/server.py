@@ -0,0 +1,245 @@
+# service/server.py
+# Long-running parse service: analyzed grammars stay in memory between
+# requests, so a validation job costs one round trip instead of a process
+# start and a grammar analysis.
+# Usage: python -m service.server (--socket PATH | --port N) [--capacity N] [--workers N]
+#
+# Requests (see service/protocol.py for the framing):
+#   {"id": 1, "op": "register", "name": "expr", "grammar": {...}}
+#   {"id": 2, "op": "parse", "grammar": "expr" or {...}, "input": "...", "tree": false, "timeout": 5}
+#   {"id": 3, "op": "stats"}     {"id": 4, "op": "ping"}
+import argparse
+import asyncio
+import os
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from service.protocol import (MAX_FRAME, BAD_REQUEST, TIMEOUT, INTERNAL, FrameError, ServiceError,
+                              encode_frame, read_frame, error_response)
+from service.registry import GrammarRegistry, checkout, checkin
+
+DEFAULT_TIMEOUT = 30.0
+
+def parse_input(entry, text, with_tree):
+    """Runs in the executor: (accepted, error position, message, preorder tree or None)."""
+    parser = checkout(entry)
+    try:
+        if with_tree:
+            accepted = parser.parse(text, trace=False)
+            tree = parser.flat_tree.to_preorder()
+        else:
+            accepted = parser.recognize(text)
+            tree = None
+        return accepted, parser.error_position, parser.error_message, tree
+    finally:
+        checkin(entry, parser)
+
+class ParseServer:
+    def __init__(self, capacity=32, workers=None, max_in_flight=None, timeout=DEFAULT_TIMEOUT,
+                 max_frame=MAX_FRAME, cache=True, cache_directory=None):
+        """
+        Parses run in a pool of `workers` threads, so the event loop keeps
+        serving while one is busy. At most `max_in_flight` requests (default
+        twice the workers) are handled at once across all connections; past
+        that the server stops reading from its sockets, and clients block on
+        their writes until a slot frees.
+
+        `timeout` is the default per-request deadline; a request may ask for
+        a shorter or longer one. A parse that overruns is answered with a
+        timeout error, but its thread cannot be interrupted, so the request
+        keeps its slot until the parse really ends.
+        """
+        self.registry = GrammarRegistry(capacity, cache, cache_directory)
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='parse')
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.slots = asyncio.Semaphore(self.max_in_flight)
+        self.timeout = timeout
+        self.max_frame = max_frame
+        self.server = None
+        self.requests = self.timeouts = 0
+
+    async def start_unix(self, path):
+        try:
+            mode = os.lstat(path).st_mode
+        except FileNotFoundError:
+            pass
+        else:
+            if not stat.S_ISSOCK(mode):
+                raise FileExistsError(f"{path} exists and is not a socket; refusing to replace it")
+            os.unlink(path)  # a socket left behind by an earlier run
+        self.server = await asyncio.start_unix_server(self._connection, path, limit=self.max_frame)
+        return self.server
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self._connection, host, port, limit=self.max_frame)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _connection(self, reader, writer):
+        # Requests on one connection are handled concurrently and answered
+        # as they finish; a slot is taken before each frame is read
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await self.slots.acquire()
+                try:
+                    request = await read_frame(reader, self.max_frame)
+                except FrameError as e:
+                    # The stream cannot be resynchronized, so answer and hang up
+                    self.slots.release()
+                    await self._send(writer, lock, error_response(None, BAD_REQUEST, str(e)))
+                    break
+                except ConnectionError:
+                    self.slots.release()
+                    break
+                if request is None:
+                    self.slots.release()
+                    break
+                task = asyncio.create_task(self._request(request, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _send(self, writer, lock, message):
+        async with lock:
+            writer.write(encode_frame(message))
+            await writer.drain()
+
+    async def _request(self, request, writer, lock):
+        self.requests += 1
+        request_id = request.get('id')
+        running = []  # executor future of the parse, if one was started
+        try:
+            response = await self._dispatch(request, running)
+            response['id'] = request_id
+            response['ok'] = True
+        except ServiceError as e:
+            response = error_response(request_id, e.code, str(e))
+        except Exception as e:
+            response = error_response(request_id, INTERNAL, f"{type(e).__name__}: {e}")
+        finally:
+            # A parse that timed out still holds its slot until its thread is done
+            if not running or running[0].done():
+                self.slots.release()
+            else:
+                running[0].add_done_callback(self._release_later(asyncio.get_running_loop()))
+        try:
+            await self._send(writer, lock, response)
+        except ConnectionError:
+            pass  # the client went away; nothing left to tell it
+
+    def _release_later(self, loop):
+        # Done callback for an executor future, called from its thread
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self.slots.release)
+            except RuntimeError:
+                pass  # the server has shut down and its loop is closed
+        return release
+
+    async def _dispatch(self, request, running):
+        # The response fields; a started parse is appended to `running`
+        op = request.get('op')
+        if op == 'ping':
+            return {}
+        if op == 'stats':
+            return self.stats()
+        if op not in ('register', 'parse'):
+            raise ServiceError(BAD_REQUEST, f"Unknown op {op!r}")
+
+        timeout = request.get('timeout', self.timeout)
+        if not isinstance(timeout, (int, float)) or timeout <= 0:
+            raise ServiceError(BAD_REQUEST, "timeout must be a positive number of seconds")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        if op == 'register':
+            name = request.get('name')
+            if not isinstance(name, str) or not name:
+                raise ServiceError(BAD_REQUEST, "register needs a grammar name")
+            spec = self.registry.resolve(request.get('grammar'))
+            entry = await self._within(self.registry.get(spec, self.executor), deadline)
+            self.registry.register(name, spec)
+            return {'name': name, 'key': spec.key, 'conflicts': entry.conflicts}
+
+        text = request.get('input')
+        if not isinstance(text, str):
+            raise ServiceError(BAD_REQUEST, "parse needs an input string")
+        spec = self.registry.resolve(request.get('grammar'))
+        entry = await self._within(self.registry.get(spec, self.executor), deadline)
+        work = self.executor.submit(parse_input, entry, text, bool(request.get('tree')))
+        running.append(work)
+        accepted, position, message, tree = await self._within(asyncio.wrap_future(work), deadline)
+        response = {'accepted': accepted, 'error_position': position, 'error': message}
+        if tree is not None:
+            response['tree'] = tree
+        return response
+
+    async def _within(self, awaitable, deadline):
+        try:
+            return await asyncio.wait_for(awaitable, max(0.0, deadline - asyncio.get_running_loop().time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ServiceError(TIMEOUT, "Request timed out") from None
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'timeouts': self.timeouts,
+            'workers': self.workers,
+            'max_in_flight': self.max_in_flight,
+            'registry': self.registry.stats(),
+        }
+
+async def serve(args):
+    server = ParseServer(args.capacity, args.workers, args.max_in_flight, args.timeout,
+                         cache=not args.no_cache)
+    try:
+        if args.socket:
+            listener = await server.start_unix(args.socket)
+            where = args.socket
+        else:
+            listener = await server.start_tcp(args.host, args.port)
+            where = '%s:%d' % listener.sockets[0].getsockname()[:2]
+        print(f"listening on {where}", file=sys.stderr, flush=True)
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Serve LL(1) parse requests on a local socket.")
+    where = arg_parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--socket', metavar='PATH', help="listen on this Unix socket")
+    where.add_argument('--port', type=int, help="listen on this TCP port (0 picks a free one)")
+    arg_parser.add_argument('--host', default='127.0.0.1', help="address for --port (default: localhost only)")
+    arg_parser.add_argument('--capacity', type=int, default=32, help="analyzed grammars kept in memory")
+    arg_parser.add_argument('--workers', type=int, help="parse threads")
+    arg_parser.add_argument('--max-in-flight', type=int, help="requests handled at once before reading stops")
+    arg_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="default per-request timeout in seconds")
+    arg_parser.add_argument('--no-cache', action='store_true', help="do not use the on-disk analysis cache")
+    args = arg_parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+# syntax_parser/batch.py
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from syntax_parser.predictive_parser import PredictiveParser
+
+# tree is a tree.to_preorder()-style record list when requested, else None
+BatchResult = namedtuple('BatchResult', 'index accepted error_position error_message tree')
+
+# Parser rebuilt once per worker process from the shipped compiled table
+_worker_parser = None
+
+def _init_worker(compiled, lexer_rules):
+    global _worker_parser
+    _worker_parser = PredictiveParser.from_compiled(compiled, lexer_rules)
+
+def _parse_one(parser, index, text, with_tree):
+    if with_tree:
+        accepted = parser.parse(text, trace=False)
+        tree = parser.flat_tree.to_preorder()
+    else:
+        accepted = parser.recognize(text)
+        tree = None
+    return BatchResult(index, accepted, parser.error_position, parser.error_message, tree)
+
+def _parse_chunk(start, texts, with_tree):
+    parser = _worker_parser
+    return [_parse_one(parser, start + i, text, with_tree) for i, text in enumerate(texts)]
+
+def _chunks(inputs, chunk_size):
+    iterator = iter(inputs)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+def parse_many(parser, inputs, workers=None, chunk_size=256, ordered=True, with_tree=False, max_pending=None):
+    """
+    Parses an iterable of independent input strings across a process pool
+    and yields a BatchResult per input.
+
+    The parser's compiled table (and lexer rules) are pickled once per
+    worker through the pool initializer; tasks only carry input chunks.
+    Results come back in input order when `ordered`, otherwise chunk by
+    chunk as they complete. At most `max_pending` chunks (default twice
+    the worker count) are in flight, so `inputs` can be a lazy stream.
+    workers=0 parses in the calling process, which is handy for debugging.
+    """
+    if workers == 0:
+        for start, chunk in _chunks(inputs, chunk_size):
+            for i, text in enumerate(chunk):
+                yield _parse_one(parser, start + i, text, with_tree)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    chunks = _chunks(inputs, chunk_size)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(parser.compiled, parser.lexer_rules),
+    )
+    try:
+        if ordered:
+            pending = deque()
+            for start, chunk in islice(chunks, max_pending):
+                pending.append(pool.submit(_parse_chunk, start, chunk, with_tree))
+            while pending:
+                results = pending.popleft().result()
+                for start, chunk in islice(chunks, 1):
+                    pending.append(pool.submit(_parse_chunk, start, chunk, with_tree))
+                yield from results
+        else:
+            pending = {pool.submit(_parse_chunk, start, chunk, with_tree)
+                       for start, chunk in islice(chunks, max_pending)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for start, chunk in islice(chunks, 1):
+                        pending.add(pool.submit(_parse_chunk, start, chunk, with_tree))
+                    yield from future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,147 @@
+# syntax_parser/codegen.py
+# Writes a standalone, direct-coded LL(1) parser module for a grammar: one
+# method per non-terminal that branches on the lookahead, instead of the
+# table interpreter's stack loop. The module needs nothing from this repo.
+
+HEADER = '''# Generated by syntax_parser/codegen.py from the grammar below; do not edit.
+"""
+Direct-coded LL(1) parser.
+
+{grammar}
+
+parse(tokens) raises ParseError at the first syntax error; recognize(tokens)
+returns True or False. `tokens` is a sequence of terminal names; a str works
+when every terminal is one character. Positions are token indices.
+
+Tail-recursive rules (A' → αA') run as loops; other nesting uses the Python
+stack, and input nested past the recursion limit is reported as an error.
+"""
+
+TERMINALS = {terminals!r}
+END = {end!r}
+
+class ParseError(Exception):
+    def __init__(self, position, message):
+        super().__init__(message)
+        self.position = position
+        self.message = message
+
+class _Parser:
+    def __init__(self, tokens):
+        self.names = tokens
+        get = TERMINALS.get
+        self.tokens = [get(t, 1) for t in tokens]
+        self.tokens.append(0)
+        self.pos = 0
+        self.tok = self.tokens[0]
+
+    def found(self):
+        return self.names[self.pos] if self.pos < len(self.names) else END
+
+    def expected(self, name):
+        raise ParseError(self.pos, f"✗ Error: Expected '{{name}}', found '{{self.found()}}'")
+
+    def no_production(self, nt):
+        raise ParseError(self.pos, f"✗ Error: No production for ({{nt}}, {{self.found()}})")
+'''
+
+FOOTER = '''
+def parse(tokens):
+    parser = _Parser(tokens)
+    try:
+        parser.{start}()
+    except RecursionError:
+        raise ParseError(parser.pos, "✗ Error: Input nested too deeply") from None
+    if parser.tok != 0:
+        parser.expected(END)
+
+def recognize(tokens):
+    try:
+        parse(tokens)
+    except ParseError:
+        return False
+    return True
+'''
+
+def _method_name(compiled, nt_id):
+    return f"nt_{nt_id - compiled.num_terminals}"
+
+def _condition(terminal_ids, sets):
+    # One comparison for a single terminal, else a membership test against
+    # a module-level frozenset (named by the caller)
+    if len(terminal_ids) == 1:
+        return f"tok == {terminal_ids[0]}"
+    name = sets.setdefault(tuple(terminal_ids), f"_SET_{len(sets)}")
+    return f"tok in {name}"
+
+def _body_lines(compiled, body, indent):
+    lines = []
+    for i, symbol in enumerate(body):
+        if compiled.is_terminal(symbol):
+            # A leading terminal is what the lookahead test just matched
+            if i:
+                lines += [f"{indent}if self.tok != {symbol}:",
+                          f"{indent}    self.expected({compiled.symbols[symbol]!r})"]
+            lines += [f"{indent}self.pos += 1",
+                      f"{indent}self.tok = self.tokens[self.pos]"]
+        else:
+            lines.append(f"{indent}self.{_method_name(compiled, symbol)}()")
+    return lines
+
+def _method(compiled, nt_id, sets):
+    nt = compiled.symbols[nt_id]
+    row = compiled.row_offsets[nt_id]
+    predict = {}  # production id -> terminal ids selecting it
+    for terminal in range(compiled.width):
+        prod_id = compiled.table[row + terminal]
+        if prod_id >= 0:
+            predict.setdefault(prod_id, []).append(terminal)
+
+    # Productions ending in nt itself (A' → αA') become a loop, not a call
+    loop = any(compiled.productions[p][-1:] == (nt_id,) for p in predict)
+    outer = '            ' if loop else '        '  # the if/elif lines
+    inner = outer + '    '                          # the production bodies
+    lines = [f"    def {_method_name(compiled, nt_id)}(self):  # {nt}"]
+    if loop:
+        lines.append("        while True:")
+    lines.append(f"{outer}tok = self.tok")
+    keyword = 'if'
+    for prod_id, terminals in predict.items():
+        body = compiled.productions[prod_id]
+        lines.append(f"{outer}{keyword} {_condition(terminals, sets)}:  # {compiled.production_text[prod_id]}")
+        keyword = 'elif'
+        if loop and body[-1:] == (nt_id,):
+            lines += _body_lines(compiled, body[:-1], inner)
+            lines.append(f"{inner}continue")
+        else:
+            lines += _body_lines(compiled, body, inner)
+            if loop:
+                lines.append(f"{inner}return")
+            elif not body:
+                lines.append(f"{inner}pass")
+    if keyword == 'if':
+        lines.append(f"{outer}self.no_production({nt!r})")
+    else:
+        lines += [f"{outer}else:", f"{inner}self.no_production({nt!r})"]
+    return lines
+
+def generate_source(compiled):
+    """Python source of a standalone parser module for a CompiledTable."""
+    sets = {}
+    methods = []
+    for nt_id in range(compiled.num_terminals, len(compiled.symbols)):
+        methods.append('')
+        methods += _method(compiled, nt_id, sets)
+
+    grammar = '\n'.join(compiled.production_text)
+    terminals = {name: i for name, i in compiled.terminal_ids.items() if i != compiled.end_id}
+    source = [HEADER.format(grammar=grammar, terminals=terminals, end=compiled.end_marker)]
+    source += methods
+    source.append('')
+    source += [f"{name} = frozenset({set(terminal_ids)!r})" for terminal_ids, name in sets.items()]
+    source.append(FOOTER.format(start=_method_name(compiled, compiled.start_id)))
+    return '\n'.join(source)
+
+def write_module(path, compiled):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(generate_source(compiled))
@@ -0,0 +1,154 @@
+# syntax_parser/compiled_table.py
+from array import array
+
+EPSILON = 'ε'
+NO_PRODUCTION = -1
+EPSILON_ID = -1
+
+class CompiledTable:
+    def __init__(self, parsing_table, non_terminals, start_symbol, end_marker='$', packed=False):
+        """
+        Compiles a GrammarAnalyzer parsing table into integer form.
+
+        Terminals (end marker first, then an 'unknown' slot for input symbols
+        the grammar does not use) get ids below num_terminals, non-terminals
+        the ids after them. Each non-terminal owns a row of `width` cells in
+        the dense `table` array, holding a production id or NO_PRODUCTION.
+        With packed=True the dense array is never built: `table` is then a
+        view of a PackedTable, indexed the same way (see pack()).
+        """
+        non_terminals = list(dict.fromkeys(non_terminals))
+        nt_set = set(non_terminals)
+        if start_symbol not in nt_set:
+            non_terminals.insert(0, start_symbol)
+            nt_set.add(start_symbol)
+
+        terminals = [end_marker, None]
+        seen = {end_marker}
+        for (_, terminal), production in parsing_table.items():
+            for symbol in (terminal, *production):
+                if symbol not in nt_set and symbol != EPSILON and symbol not in seen:
+                    seen.add(symbol)
+                    terminals.append(symbol)
+
+        self.end_marker = end_marker
+        self.start_symbol = start_symbol
+        self.symbols = terminals + non_terminals
+        self.symbol_ids = {s: i for i, s in enumerate(self.symbols) if s is not None}
+        self.terminal_ids = {s: i for i, s in enumerate(terminals) if s is not None}
+        self.num_terminals = len(terminals)
+        self.width = self.num_terminals
+        self.end_id = 0
+        self.unknown_id = 1
+        self.start_id = self.symbol_ids[start_symbol]
+
+        # Row offsets are indexed by symbol id; terminals have no row.
+        self.row_offsets = array('i', [0] * self.num_terminals)
+        for i in range(len(non_terminals)):
+            self.row_offsets.append(i * self.width)
+        self.packed = None
+
+        self.productions = []           # right-hand sides as id tuples, ε removed
+        self.reversed_productions = []  # same, pre-reversed for pushing on the stack
+        self.production_lhs = array('i')
+        self.production_text = []       # "A → abA'" labels for traces and errors
+        production_ids = {}
+        cells = []
+        for (nt, terminal), production in parsing_table.items():
+            key = (nt, tuple(production))
+            prod_id = production_ids.get(key)
+            if prod_id is None:
+                prod_id = production_ids[key] = self._add_production(nt, production)
+            cells.append((self.symbol_ids[nt], self.symbol_ids[terminal], prod_id))
+        if packed:
+            self._use_packed(cells)
+        else:
+            self.table = array('i', [NO_PRODUCTION]) * (len(non_terminals) * self.width)
+            for nt_id, terminal_id, prod_id in cells:
+                self.table[self.row_offsets[nt_id] + terminal_id] = prod_id
+
+    @classmethod
+    def from_arrays(cls, symbols, num_terminals, start_symbol, end_marker, row_offsets, table,
+                    productions, production_lhs):
+        """
+        Rebuilds a table from its integer form (as saved by grammar/cache.py)
+        without going through a parsing table dict. `symbols` has None for
+        the unknown slot; productions are id tuples with ε removed.
+        """
+        compiled = cls.__new__(cls)
+        compiled.end_marker = end_marker
+        compiled.start_symbol = start_symbol
+        compiled.symbols = list(symbols)
+        compiled.symbol_ids = {s: i for i, s in enumerate(compiled.symbols) if s is not None}
+        compiled.terminal_ids = {s: i for i, s in enumerate(compiled.symbols[:num_terminals]) if s is not None}
+        compiled.num_terminals = num_terminals
+        compiled.width = num_terminals
+        compiled.end_id = 0
+        compiled.unknown_id = 1
+        compiled.start_id = compiled.symbol_ids[start_symbol]
+        compiled.row_offsets = row_offsets
+        compiled.table = table
+        compiled.packed = None
+        compiled.productions = [tuple(body) for body in productions]
+        compiled.reversed_productions = [body[::-1] for body in compiled.productions]
+        compiled.production_lhs = production_lhs
+        compiled.production_text = [
+            f"{compiled.symbols[lhs]} → {''.join(compiled.symbols[s] for s in body) or EPSILON}"
+            for lhs, body in zip(production_lhs, compiled.productions)
+        ]
+        return compiled
+
+    def pack(self):
+        """
+        Replaces the dense table by a PackedTable and returns it. Parsers
+        keep indexing `table[row_offsets[nt] + terminal]`; each read is then
+        a PackedTable.lookup() instead of an array read.
+        """
+        if self.packed is None:
+            table, width, first_row = self.table, self.width, self.num_terminals
+            cells = [(first_row + i // width, i % width, prod_id)
+                     for i, prod_id in enumerate(table) if prod_id != NO_PRODUCTION]
+            self._use_packed(cells)
+        return self.packed
+
+    def _use_packed(self, cells):
+        from syntax_parser.packed_table import PackedTable  # it imports this module
+        self.packed = PackedTable(self, cells)
+        self.table = self.packed.cells()
+
+    def _add_production(self, nt, production):
+        body = tuple(self.symbol_ids[s] for s in production if s != EPSILON)
+        self.productions.append(body)
+        self.reversed_productions.append(body[::-1])
+        self.production_lhs.append(self.symbol_ids[nt])
+        rhs = ''.join(s for s in production if s != EPSILON) or EPSILON
+        self.production_text.append(f"{nt} → {rhs}")
+        return len(self.productions) - 1
+
+    @property
+    def terminal_names(self):
+        """Grammar terminals, without the end marker and the unknown slot."""
+        return self.symbols[2:self.num_terminals]
+
+    @property
+    def non_terminal_names(self):
+        return self.symbols[self.num_terminals:]
+
+    def is_terminal(self, symbol_id):
+        return symbol_id < self.num_terminals
+
+    def symbol_name(self, symbol_id):
+        if symbol_id == EPSILON_ID:
+            return EPSILON
+        return self.symbols[symbol_id]
+
+    def encode(self, input_string):
+        """Maps each input character to its terminal id and appends the end marker."""
+        get = self.terminal_ids.get
+        unknown = self.unknown_id
+        ids = [get(ch, unknown) for ch in input_string]
+        ids.append(self.end_id)
+        return ids
+
+    def lookup(self, nt_id, terminal_id):
+        return self.table[self.row_offsets[nt_id] + terminal_id]
@@ -0,0 +1,132 @@
+# syntax_parser/flat_tree.py
+from array import array
+from syntax_parser.compiled_table import EPSILON, EPSILON_ID
+from syntax_parser.tree import TreeNode
+
+NO_NODE = -1
+ERROR_ID = -2     # symbol of the error nodes left by error recovery
+ERROR = '✗'
+
+class FlatTree:
+    def __init__(self, symbols, num_terminals):
+        """
+        Parse tree stored as parallel typed arrays indexed by node id:
+        symbol id, parent, first child and next sibling (NO_NODE when
+        absent). `symbols` is the CompiledTable symbol list used to name
+        nodes; layout data lives with the UI, not here. Node 0 is the root.
+        """
+        self.symbols = symbols
+        self.num_terminals = num_terminals
+        self.symbol = array('i')
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+
+    @classmethod
+    def for_table(cls, compiled):
+        return cls(compiled.symbols, compiled.num_terminals)
+
+    def __len__(self):
+        return len(self.symbol)
+
+    def add_root(self, symbol_id):
+        self.symbol.append(symbol_id)
+        self.parent.append(NO_NODE)
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        return len(self.symbol) - 1
+
+    def add_children(self, parent, symbol_ids):
+        """Appends a node's children (contiguously) and returns the first id."""
+        first = len(self.symbol)
+        count = len(symbol_ids)
+        self.symbol.extend(symbol_ids)
+        self.parent.extend(array('i', [parent]) * count)
+        self.first_child.extend(array('i', [NO_NODE]) * count)
+        self.next_sibling.extend(range(first + 1, first + count))
+        self.next_sibling.append(NO_NODE)
+        self.first_child[parent] = first
+        return first
+
+    def add_epsilon(self, parent):
+        return self.add_children(parent, (EPSILON_ID,))
+
+    def add_sibling(self, node, symbol_id):
+        """Inserts a new node right after `node` among its parent's children."""
+        new = len(self.symbol)
+        self.symbol.append(symbol_id)
+        self.parent.append(self.parent[node])
+        self.first_child.append(NO_NODE)
+        self.next_sibling.append(self.next_sibling[node])
+        self.next_sibling[node] = new
+        return new
+
+    def last_child(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE and self.next_sibling[child] != NO_NODE:
+            child = self.next_sibling[child]
+        return child
+
+    def add_error(self, parent):
+        """Marks a non-terminal that was abandoned by error recovery."""
+        return self.add_children(parent, (ERROR_ID,))
+
+    def mark_error(self, node):
+        """Turns a leaf (a terminal that was missing) into an error node."""
+        self.symbol[node] = ERROR_ID
+
+    def value(self, node):
+        symbol_id = self.symbol[node]
+        if symbol_id < 0:
+            return EPSILON if symbol_id == EPSILON_ID else ERROR
+        return self.symbols[symbol_id]
+
+    def is_terminal(self, node):
+        return self.symbol[node] < self.num_terminals
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def preorder(self, root=0):
+        """Node ids in preorder, walked iteratively."""
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        pending = [root]
+        while pending:
+            node = pending.pop()
+            yield node
+            child = first_child[node]
+            if child != NO_NODE:
+                siblings = []
+                while child != NO_NODE:
+                    siblings.append(child)
+                    child = next_sibling[child]
+                pending.extend(reversed(siblings))
+
+    def to_preorder(self, root=0):
+        """Same records as tree.to_preorder(), without building TreeNodes."""
+        records = []
+        for node in self.preorder(root):
+            records.append((self.value(node), self.is_terminal(node), sum(1 for _ in self.children(node))))
+        return records
+
+    def to_tree_node(self, root=0):
+        """Materializes the subtree at root as TreeNode objects, for the UI."""
+        if not len(self.symbol):
+            return None
+        top = TreeNode(self.value(root), self.is_terminal(root))
+        nodes = {root: top}
+        for node in self.preorder(root):
+            tree_node = nodes.pop(node)
+            for child in self.children(node):
+                child_node = TreeNode(self.value(child), self.is_terminal(child))
+                tree_node.add_child(child_node)
+                nodes[child] = child_node
+        return top
+
+    def memory_bytes(self):
+        """Bytes held by the node arrays themselves."""
+        return sum(a.itemsize * len(a) for a in (self.symbol, self.parent, self.first_child, self.next_sibling))
@@ -0,0 +1,283 @@
+# syntax_parser/incremental.py
+# Incremental reparsing for editors: a parse keeps copies of the parser stack
+# every CHECKPOINT_INTERVAL tokens, so after an edit the parse resumes from
+# the last checkpoint before it instead of from the first token. Once the
+# stack matches the old parse's stack at a checkpoint past the edit, the
+# rest of the input would parse exactly as before and the old subtrees are
+# grafted back in.
+from bisect import bisect_left, bisect_right
+from array import array
+from syntax_parser.compiled_table import EPSILON
+from syntax_parser.lexer import SKIP
+from syntax_parser.tree import TreeNode
+
+CHECKPOINT_INTERVAL = 256
+
+class IncrementalParse:
+    def __init__(self, text, tokens, starts):
+        """
+        Result of parse() or reparse(): the TreeNode tree, the verdict and
+        the checkpoints to resume from. Reparsing reuses (and mutates) this
+        tree, so a result is only valid until it is passed to reparse().
+
+        checkpoint_index lists token indices in increasing order;
+        checkpoint_stack and checkpoint_nodes hold the symbol stack and the
+        matching pending tree nodes (None for the end marker) as they were
+        right before that token was read.
+        """
+        self.text = text
+        self.tokens = tokens
+        self.starts = starts
+        self.tree = None
+        self.accepted = False
+        self.error = None           # (token index, stack top) of the syntax error
+        self.error_position = None
+        self.error_message = None
+        self.checkpoint_index = []
+        self.checkpoint_stack = []
+        self.checkpoint_nodes = []
+        self.changed = []           # nodes whose subtrees were rebuilt, rightmost first
+        self.reparsed_tokens = 0    # tokens the parser actually stepped over
+
+    def add_checkpoint(self, index, stack, nodes):
+        self.checkpoint_index.append(index)
+        self.checkpoint_stack.append(stack[:])
+        self.checkpoint_nodes.append(nodes[:])
+
+def parse(parser, text):
+    """Parses text from scratch, keeping what reparse() needs."""
+    compiled = parser.compiled
+    tokens, starts = parser._tokenize(text)
+    result = IncrementalParse(text, tokens, starts)
+    result.tree = TreeNode(compiled.start_symbol)
+    result.changed = [result.tree]
+    stack = [compiled.end_id, compiled.start_id]
+    nodes = [None, result.tree]
+    result.add_checkpoint(0, stack, nodes)
+    _run(parser, result, 0, stack, nodes, {})
+    return result
+
+def reparse(parser, previous, offset, deleted, inserted):
+    """
+    Parses previous.text with `deleted` characters at `offset` replaced by
+    `inserted`, reusing previous's tree prefix, checkpoints and, where the
+    parse falls back into step, its subtrees after the edit. Returns a new
+    IncrementalParse; `previous` must not be used afterwards.
+    """
+    old_text = previous.text
+    if offset < 0 or deleted < 0 or offset + deleted > len(old_text):
+        raise ValueError(f"Edit ({offset}, {deleted}) is outside the text (length {len(old_text)})")
+    text = old_text[:offset] + inserted + old_text[offset + deleted:]
+    tokens, starts, first, old_end, new_end = _splice_tokens(parser, previous, text, offset, deleted, inserted)
+    result = IncrementalParse(text, tokens, starts)
+    result.tree = previous.tree
+
+    # Resume from the last checkpoint whose tokens so far are unchanged
+    k = bisect_right(previous.checkpoint_index, first) - 1
+    index = previous.checkpoint_index[k]
+    stack = previous.checkpoint_stack[k][:]
+    nodes = previous.checkpoint_nodes[k][:]
+    result.checkpoint_index = previous.checkpoint_index[:k + 1]
+    result.checkpoint_stack = previous.checkpoint_stack[:k + 1]
+    result.checkpoint_nodes = previous.checkpoint_nodes[:k + 1]
+
+    # Everything built after the checkpoint hangs below its pending
+    # non-terminals; set those subtrees aside, the old parse may need them
+    saved = {}
+    num_terminals = parser.compiled.num_terminals
+    for symbol, node in zip(stack, nodes):
+        if symbol >= num_terminals:
+            saved[node] = node.children
+            node.children = []
+            result.changed.append(node)
+
+    old = {
+        'result': previous,
+        'next': bisect_left(previous.checkpoint_index, old_end, k + 1),
+        'shift': new_end - old_end,
+        'saved': saved,
+    }
+    _run(parser, result, index, stack, nodes, old)
+    return result
+
+def edit_between(old_text, new_text):
+    """
+    The single edit (offset, deleted, inserted) turning old_text into
+    new_text, found by trimming their common prefix and suffix; None if
+    they are equal.
+    """
+    if old_text == new_text:
+        return None
+    # Binary search on slice comparisons keeps the scanning in C
+    low, high = 0, min(len(old_text), len(new_text))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old_text[:mid] == new_text[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    prefix = low
+    low, high = 0, min(len(old_text), len(new_text)) - prefix
+    while low < high:
+        mid = (low + high + 1) // 2
+        if old_text[len(old_text) - mid:] == new_text[len(new_text) - mid:]:
+            low = mid
+        else:
+            high = mid - 1
+    suffix = low
+    return prefix, len(old_text) - prefix - suffix, new_text[prefix:len(new_text) - suffix]
+
+def _splice_tokens(parser, previous, text, offset, deleted, inserted):
+    # (tokens, starts, first, old_end, new_end): tokens [first, new_end) of
+    # the new text replace tokens [first, old_end) of the old one
+    if parser.lexer is None:
+        encoded = parser.compiled.encode(inserted)
+        encoded.pop()
+        tokens = previous.tokens[:offset] + encoded + previous.tokens[offset + deleted:]
+        return tokens, None, offset, offset + deleted, offset + len(inserted)
+
+    # Relex from one token before the one the edit touches, until the
+    # lexer stops at a token start of the old text past the edit; from
+    # there both texts lex the same. The end marker sits at len(text).
+    old_starts = previous.starts
+    first = max(0, bisect_left(old_starts, offset) - 2)
+    pos = old_starts[first] if first else 0
+    edit_end = offset + len(inserted)
+    shift = len(inserted) - deleted
+    match = parser.lexer.regex.match
+    kinds = parser.lexer.group_kinds
+    ids = []
+    starts = array('l')
+    while True:
+        if pos >= edit_end:
+            m = bisect_left(old_starts, pos - shift, first)
+            if m < len(old_starts) and old_starts[m] == pos - shift:
+                break
+        found = match(text, pos)
+        kind = kinds[found.lastindex]
+        if kind != SKIP:
+            ids.append(kind)
+            starts.append(pos)
+        pos = found.end()
+
+    tokens = previous.tokens[:first] + ids + previous.tokens[m:]
+    tail = old_starts[m:]
+    if shift:
+        tail = array('l', [s + shift for s in tail])
+    return tokens, old_starts[:first] + starts + tail, first, m, first + len(ids)
+
+def _run(parser, result, index, stack, nodes, old):
+    compiled = parser.compiled
+    table = compiled.table
+    offsets = compiled.row_offsets
+    productions = compiled.productions
+    reversed_productions = compiled.reversed_productions
+    symbols = compiled.symbols
+    num_terminals = compiled.num_terminals
+    end = compiled.end_id
+    tokens = result.tokens
+    started = index
+
+    # Token indices at which to take a checkpoint and to try resyncing
+    # with the old parse (given in old indices, so shifted by the edit)
+    never = len(tokens)
+    own_at = (index // CHECKPOINT_INTERVAL + 1) * CHECKPOINT_INTERVAL
+    previous = old.get('result')
+    resync_at = never
+    if previous is not None and old['next'] < len(previous.checkpoint_index):
+        resync_at = previous.checkpoint_index[old['next']] + old['shift']
+    check_at = min(own_at, resync_at)
+
+    token = tokens[index]
+    while True:
+        top = stack.pop()
+        node = nodes.pop()
+        if top < num_terminals:
+            if top != token:
+                result.error = (index, top)
+                break
+            if top == end:
+                result.accepted = True
+                break
+            index += 1
+            token = tokens[index]
+            if index < check_at:
+                continue
+            while index > resync_at:
+                old['next'] += 1
+                resync_at = never
+                if old['next'] < len(previous.checkpoint_index):
+                    resync_at = previous.checkpoint_index[old['next']] + old['shift']
+            if index == resync_at and stack == previous.checkpoint_stack[old['next']]:
+                result.reparsed_tokens = index - started
+                _adopt(parser, result, nodes, previous, old)
+                return
+            if index >= own_at:
+                result.add_checkpoint(index, stack, nodes)
+                own_at = index + CHECKPOINT_INTERVAL
+            check_at = min(own_at, resync_at)
+            continue
+
+        prod_id = table[offsets[top] + token]
+        if prod_id < 0:
+            result.error = (index, top)
+            break
+        body = productions[prod_id]
+        if body:
+            children = [TreeNode(symbols[s], s < num_terminals) for s in body]
+            for child in children:
+                child.parent = node
+            node.children = children
+            stack.extend(reversed_productions[prod_id])
+            nodes.extend(reversed(children))
+        else:
+            child = TreeNode(EPSILON, True)
+            child.parent = node
+            node.children = [child]
+
+    result.reparsed_tokens = index - started
+    _verdict(parser, result)
+
+def _adopt(parser, result, nodes, previous, old):
+    # The stack matches the old parse at old checkpoint `old['next']`: give
+    # each pending node the subtree its old counterpart went on to build,
+    # then take over the old checkpoints and verdict, shifted by the edit
+    k, shift, saved = old['next'], old['shift'], old['saved']
+    remap = {}
+    for new, node in zip(nodes, previous.checkpoint_nodes[k]):
+        if node is None:
+            continue
+        children = saved.pop(node) if node in saved else node.children
+        if new is not node:
+            remap[node] = new
+        new.children = children
+        for child in children:
+            child.parent = new
+
+    # Old pending nodes leave the stack for good once expanded, so the
+    # later checkpoints only need remapping until none is left
+    for i in range(k, len(previous.checkpoint_index)):
+        nodes = previous.checkpoint_nodes[i]
+        if remap:
+            if any(node in remap for node in nodes):
+                nodes = [remap.get(node, node) for node in nodes]
+            else:
+                remap = None
+        result.checkpoint_index.append(previous.checkpoint_index[i] + shift)
+        result.checkpoint_stack.append(previous.checkpoint_stack[i])
+        result.checkpoint_nodes.append(nodes)
+
+    result.accepted = previous.accepted
+    if previous.error is not None:
+        index, top = previous.error
+        result.error = (index + shift, top)
+    _verdict(parser, result)
+
+def _verdict(parser, result):
+    # Mirrors the verdict on the parser, like its other parse methods
+    parser.error_position = parser.error_message = None
+    if result.error is not None:
+        index, top = result.error
+        result.error_position, result.error_message = parser._describe_error(
+            result.text, result.tokens, result.starts, index, top)
+        parser._fail(result.error_position, result.error_message)
@@ -0,0 +1,138 @@
+# syntax_parser/lexer.py
+import re
+from array import array
+from collections import namedtuple
+from syntax_parser.source import iter_chunks, DEFAULT_CHUNK_SIZE
+
+# One record per token: terminal id and source span. The text is only
+# sliced out of the source when someone asks for it.
+Token = namedtuple('Token', 'id start end')
+
+SKIP = -1
+
+class Lexer:
+    def __init__(self, rules, compiled):
+        """
+        Compiles lexer rules into one master regex. `rules` is a list of
+        (terminal, pattern) pairs tried in order; a terminal of None marks a
+        pattern (e.g. whitespace) that is matched and skipped. Characters no
+        rule matches become single-character tokens with the unknown id, so
+        the parser reports them like any other unexpected input.
+        """
+        self.compiled = compiled
+        self.unknown_id = compiled.unknown_id
+        alternatives = []
+        kinds = []
+        for i, (terminal, pattern) in enumerate(rules):
+            if re.compile(pattern).fullmatch(''):
+                raise ValueError(f"Lexer rule for {terminal!r} matches the empty string: {pattern!r}")
+            if terminal is None:
+                kinds.append(SKIP)
+            elif terminal in compiled.terminal_ids:
+                kinds.append(compiled.terminal_ids[terminal])
+            else:
+                raise ValueError(f"Lexer rule names unknown terminal {terminal!r}")
+            alternatives.append(f"(?P<_{i}>{pattern})")
+        alternatives.append(r"(?P<_error>[\s\S])")
+        self.regex = re.compile('|'.join(alternatives))
+
+        # m.lastindex is the number of the top-level group that matched
+        self.group_kinds = [None] * (self.regex.groups + 1)
+        for i, kind in enumerate(kinds):
+            self.group_kinds[self.regex.groupindex[f"_{i}"]] = kind
+        self.group_kinds[self.regex.groupindex["_error"]] = self.unknown_id
+
+    def tokens(self, text, pos=0, endpos=None):
+        """Yields Token records for text[pos:endpos], skipping ignored matches."""
+        match = self.regex.match
+        kinds = self.group_kinds
+        endpos = len(text) if endpos is None else endpos
+        while pos < endpos:
+            m = match(text, pos, endpos)
+            end = m.end()
+            kind = kinds[m.lastindex]
+            if kind != SKIP:
+                yield Token(kind, pos, end)
+            pos = end
+
+    def encode(self, text):
+        """
+        Lexes text in one pass into parallel arrays: terminal ids (ending
+        with the end marker) and token start offsets (ending with len(text)).
+        """
+        match = self.regex.match
+        kinds = self.group_kinds
+        ids = []
+        starts = array('l')
+        add_id = ids.append
+        add_start = starts.append
+        pos = 0
+        endpos = len(text)
+        while pos < endpos:
+            m = match(text, pos)
+            kind = kinds[m.lastindex]
+            if kind != SKIP:
+                add_id(kind)
+                add_start(pos)
+            pos = m.end()
+        add_id(self.compiled.end_id)
+        add_start(endpos)
+        return ids, starts
+
+    def stream(self, source, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Yields Token records from a chunked source (str, bytes, mmap or file
+        object) with absolute offsets. A token that touches the end of the
+        buffered text is held back until the next chunk arrives, so tokens
+        spanning chunk boundaries are matched whole. Like encode(), it ends
+        with an end marker token at the source's length.
+        """
+        match = self.regex.match
+        kinds = self.group_kinds
+        buffer = ''
+        base = 0
+        for chunk in iter_chunks(source, chunk_size):
+            buffer += chunk
+            pos = 0
+            endpos = len(buffer)
+            while pos < endpos:
+                m = match(buffer, pos)
+                end = m.end()
+                if end == endpos:
+                    break
+                kind = kinds[m.lastindex]
+                if kind != SKIP:
+                    yield Token(kind, base + pos, base + end)
+                pos = end
+            buffer = buffer[pos:]
+            base += pos
+        for token in self.tokens(buffer):
+            yield Token(token.id, base + token.start, base + token.end)
+        endpos = base + len(buffer)
+        yield Token(self.compiled.end_id, endpos, endpos)
+
+def line_col(text, offset):
+    """1-based line and column of a source offset, computed on demand."""
+    line = text.count('\n', 0, offset) + 1
+    return line, offset - (text.rfind('\n', 0, offset) + 1) + 1
+
+class LineCounter:
+    def __init__(self, text):
+        """
+        line_col() for offsets asked for in increasing order, counting each
+        newline once, so reporting many errors in one text stays linear.
+        """
+        self.text = text
+        self.offset = 0
+        self.line = 1
+        self.line_start = 0
+
+    def __call__(self, offset):
+        if offset < self.offset:
+            return line_col(self.text, offset)
+        newlines = self.text.count('\n', self.offset, offset)
+        if newlines:
+            self.line += newlines
+            self.line_start = self.text.rfind('\n', self.offset, offset) + 1
+        self.offset = offset
+        return self.line, offset - self.line_start + 1
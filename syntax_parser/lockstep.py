@@ -0,0 +1,144 @@
+# syntax_parser/lockstep.py
+# Batch recognizer for many short inputs: the LL(1) stack machines of a
+# whole batch run in lockstep on NumPy arrays, one vectorized step at a time,
+# so the Python overhead is paid per step of the batch instead of per step
+# of every input. NumPy is an optional dependency, needed only here.
+from collections import namedtuple
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("syntax_parser.lockstep needs NumPy (pip install numpy)") from None
+
+DEFAULT_BATCH_SIZE = 4096
+INITIAL_STACK = 32
+
+# accepted is a bool array; error_position is what PredictiveParser.recognize
+# leaves in parser.error_position (a character offset), -1 where accepted
+LockstepResult = namedtuple('LockstepResult', 'accepted error_position')
+
+class BatchRecognizer:
+    def __init__(self, parser, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Recognizes lists of inputs with parser's compiled table (and lexer,
+        if it has one). Inputs are taken `batch_size` at a time, shortest
+        first, and each batch is encoded as a token matrix padded with the
+        end marker. Stacks are rows of a 2-D array with a stack pointer per
+        row; a row leaves the batch once it accepts or hits an error.
+        """
+        compiled = parser.compiled
+        self.parser = parser
+        self.batch_size = batch_size
+        self.first_nt = compiled.num_terminals
+        self.end = compiled.end_id
+        self.start = compiled.start_id
+        self.unknown = compiled.unknown_id
+        # Terminals get a row of their own, all "no production", so one
+        # gather serves every row of the batch whatever is on top
+        self.table = np.append(np.array(compiled.table, dtype=np.int32),
+                               np.full(compiled.width, -1, dtype=np.int32))
+        self.offsets = np.array(compiled.row_offsets, dtype=np.int64)
+        self.offsets[:self.first_nt] = len(compiled.table)
+
+        # Reversed production bodies, padded to the longest, pushed in one go
+        reversed_productions = compiled.reversed_productions
+        self.longest = max(map(len, reversed_productions), default=0)
+        self.bodies = np.zeros((len(reversed_productions), max(1, self.longest)), dtype=np.int32)
+        self.lengths = np.zeros(len(reversed_productions), dtype=np.int64)
+        for i, body in enumerate(reversed_productions):
+            self.bodies[i, :len(body)] = body
+            self.lengths[i] = len(body)
+
+        # Without a lexer every character is a token: terminal id by code
+        # point, up to the highest single-character terminal
+        singles = {ord(t): i for t, i in compiled.terminal_ids.items() if len(t) == 1}
+        self.char_ids = np.full(max(singles, default=0) + 1, self.unknown, dtype=np.int32)
+        self.char_ids[list(singles)] = list(singles.values())
+
+    def recognize(self, texts):
+        """LockstepResult for a list of input strings, in input order."""
+        count = len(texts)
+        accepted = np.zeros(count, dtype=bool)
+        error_position = np.full(count, -1, dtype=np.int64)
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=count)
+        order = np.argsort(lengths, kind='stable')
+        for start in range(0, count, self.batch_size):
+            batch = order[start:start + self.batch_size]
+            tokens, starts = self.encode([texts[i] for i in batch.tolist()])
+            ok, error_index = self.run(tokens)
+            if starts is not None:
+                error_index = np.array([s[e] if e >= 0 else -1 for s, e in zip(starts, error_index.tolist())])
+            accepted[batch] = ok
+            error_position[batch] = error_index
+        return LockstepResult(accepted, error_position)
+
+    def encode(self, texts):
+        """
+        (token matrix, token start offsets or None): row i holds the
+        terminal ids of texts[i], then the end marker up to the row width.
+        """
+        lexer = self.parser.lexer
+        if lexer is not None:
+            encoded = [lexer.encode(text) for text in texts]
+            width = max((len(ids) for ids, _ in encoded), default=1)
+            tokens = np.full((len(texts), width), self.end, dtype=np.int32)
+            for row, (ids, _) in zip(tokens, encoded):
+                row[:len(ids)] = ids
+            return tokens, [starts for _, starts in encoded]
+
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        tokens = np.full((len(texts), int(lengths.max(initial=0)) + 1), self.end, dtype=np.int32)
+        codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype='<u4')
+        if not len(codes):
+            return tokens, None
+        top = len(self.char_ids) - 1
+        ids = self.char_ids[np.minimum(codes, top)]
+        ids[codes > top] = self.unknown
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        row_starts = np.cumsum(lengths) - lengths
+        tokens[rows, np.arange(len(codes)) - row_starts[rows]] = ids
+        return tokens, None
+
+    def run(self, tokens):
+        """
+        (accepted mask, token index of the first error or -1) for an
+        encoded batch, following recognize()'s loop one step per row.
+        """
+        count = len(tokens)
+        capacity = INITIAL_STACK + self.longest
+        stack = np.empty((count, capacity), dtype=np.int32)
+        stack[:, 0] = self.end
+        stack[:, 1] = self.start
+        sp = np.full(count, 2, dtype=np.int64)  # stack height per row
+        position = np.zeros(count, dtype=np.int64)
+        accepted = np.zeros(count, dtype=bool)
+        error_index = np.full(count, -1, dtype=np.int64)
+        columns = np.arange(self.bodies.shape[1])
+
+        rows = np.arange(count)
+        while len(rows):
+            below = sp[rows] - 1  # the top's slot, and the height after popping it
+            top = stack[rows, below]
+            token = tokens[rows, position[rows]]
+            prod = self.table[self.offsets[top] + token]
+            expanding = prod >= 0
+            matched = top == token  # only a terminal can equal a token
+            finished = matched & (top == self.end)
+            failed = ~(expanding | matched)
+            sp[rows] = below
+            position[rows[matched & ~finished]] += 1
+
+            if expanding.any():
+                grown, prod, base = rows[expanding], prod[expanding], below[expanding]
+                needed = int(base.max()) + self.longest
+                if needed > capacity:
+                    capacity = max(2 * capacity, needed)
+                    wider = np.empty((count, capacity), dtype=np.int32)
+                    wider[:, :stack.shape[1]] = stack
+                    stack = wider
+                stack[grown[:, None], base[:, None] + columns] = self.bodies[prod]
+                sp[grown] = base + self.lengths[prod]
+
+            accepted[rows[finished]] = True
+            error_index[rows[failed]] = position[rows[failed]]
+            rows = rows[~(finished | failed)]
+        return accepted, error_index
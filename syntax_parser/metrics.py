@@ -0,0 +1,83 @@
+# syntax_parser/metrics.py
+import json
+from collections import Counter
+
+PHASES = ('lex', 'parse', 'tree')
+
+class ParseMetrics:
+    def __init__(self, compiled):
+        """
+        Counters aggregated over every parse a parser runs while
+        parser.metrics is set (see PredictiveParser.enable_metrics). The hot
+        loop only appends the table cell of each applied production and
+        tracks the stack depth; cells are counted in bulk after each parse,
+        and production counts are derived from the cell counts on demand.
+        """
+        self.compiled = compiled
+        self.reset()
+
+    def reset(self):
+        self.parses = 0
+        self.accepted = 0
+        self.tokens = 0
+        self.steps = 0
+        self.max_stack_depth = 0
+        self.cell_hits = Counter()  # table cell index -> applications
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+
+    def record(self, accepted, tokens, cells, max_depth, lex, parse, tree=0.0):
+        """Adds one parse: tokens matched, array of applied cells, phase times."""
+        self.parses += 1
+        self.accepted += bool(accepted)
+        self.tokens += tokens
+        self.steps += tokens + len(cells) + bool(accepted)
+        self.max_stack_depth = max(self.max_stack_depth, max_depth)
+        self.cell_hits.update(cells)
+        seconds = self.phase_seconds
+        seconds['lex'] += lex
+        seconds['parse'] += parse
+        seconds['tree'] += tree
+
+    def production_counts(self):
+        """Applications per production id."""
+        table = self.compiled.table
+        counts = [0] * len(self.compiled.productions)
+        for cell, hits in self.cell_hits.items():
+            counts[table[cell]] += hits
+        return counts
+
+    def hot_productions(self, limit=10):
+        """The most applied productions as (text, count), busiest first."""
+        texts = self.compiled.production_text
+        counts = self.production_counts()
+        ranked = sorted((i for i in range(len(counts)) if counts[i]), key=lambda i: -counts[i])
+        return [(texts[i], counts[i]) for i in ranked[:limit]]
+
+    def cell_histogram(self):
+        """{(non-terminal, terminal): hits} for every table cell used."""
+        compiled = self.compiled
+        symbols = compiled.symbols
+        histogram = {}
+        for cell, hits in self.cell_hits.most_common():
+            row, terminal = divmod(cell, compiled.width)
+            histogram[symbols[compiled.num_terminals + row], symbols[terminal]] = hits
+        return histogram
+
+    def snapshot(self):
+        """The metrics so far as a JSON-ready dict."""
+        texts = self.compiled.production_text
+        return {
+            'parses': self.parses,
+            'accepted': self.accepted,
+            'tokens': self.tokens,
+            'steps': self.steps,
+            'max_stack_depth': self.max_stack_depth,
+            'phase_seconds': dict(self.phase_seconds),
+            'productions': {texts[i]: n for i, n in enumerate(self.production_counts()) if n},
+            'cells': [{'non_terminal': nt, 'terminal': t, 'hits': n}
+                      for (nt, t), n in self.cell_histogram().items()],
+        }
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
@@ -0,0 +1,158 @@
+# syntax_parser/packed_table.py
+# Row displacement ("comb") packing of an LL(1) table. Each non-terminal row
+# keeps only the cells that differ from its most common value (its default:
+# usually "no production", or the ε production for rows filled by a large
+# FOLLOW set). The rows' remaining cells are slid over each other into one
+# pair of arrays, with a check array recording which row owns each slot.
+import re
+import sys
+from array import array
+from collections import Counter
+from syntax_parser.compiled_table import NO_PRODUCTION
+
+EMPTY = -1  # check value of a slot no row owns
+
+class PackedTable:
+    def __init__(self, compiled, cells):
+        """
+        Packs a table given as (nt id, terminal id, production id) cells,
+        one per filled entry, with CompiledTable ids. lookup() returns what
+        compiled.lookup() would, in O(1): one check comparison.
+        """
+        self.compiled = compiled
+        self.first_row = compiled.num_terminals
+        self.width = compiled.width
+        rows = [[] for _ in range(len(compiled.symbols) - self.first_row)]
+        for nt_id, terminal_id, prod_id in cells:
+            rows[nt_id - self.first_row].append((terminal_id, prod_id))
+
+        self.default = array('i', [NO_PRODUCTION]) * len(rows)
+        explicit = []
+        for r, filled in enumerate(rows):
+            counts = Counter(prod_id for _, prod_id in filled)
+            counts[NO_PRODUCTION] = self.width - len(filled)
+            default = max(counts, key=counts.get)
+            self.default[r] = default
+            if default == NO_PRODUCTION:
+                explicit.append(sorted(filled))
+            else:
+                # Cells that are errors (or other productions) become explicit
+                used = {t for t, _ in filled}
+                cells = [(t, p) for t, p in filled if p != default]
+                cells += [(t, NO_PRODUCTION) for t in range(self.width) if t not in used]
+                explicit.append(sorted(cells))
+        self._pack(explicit)
+
+    @classmethod
+    def from_parsing_table(cls, parsing_table, compiled):
+        """Packs a GrammarAnalyzer {(nt, terminal): production} dict."""
+        ids = compiled.symbol_ids
+        cells = []
+        for nt, terminal in parsing_table:
+            nt_id, terminal_id = ids[nt], ids[terminal]
+            cells.append((nt_id, terminal_id, compiled.lookup(nt_id, terminal_id)))
+        return cls(compiled, cells)
+
+    def _pack(self, explicit):
+        # First fit, densest rows first: the smallest base at which every
+        # explicit cell of the row lands on a free slot. The search runs in
+        # the re module over a byte per slot (0 free, 1 taken), with the
+        # row's cells as a pattern such as b'\0.{4}\0.{11}\0'. The map
+        # always ends in `width` free slots, so the pattern always matches,
+        # and is cut back to max(base) + width at the end.
+        self.base = array('i', [0]) * len(explicit)
+        taken = bytearray(self.width)
+        check = array('i', [EMPTY]) * self.width
+        value = array('i', [NO_PRODUCTION]) * self.width
+        for r in sorted(range(len(explicit)), key=lambda r: -len(explicit[r])):
+            cells = explicit[r]
+            if not cells:
+                continue
+            gaps = [b - a - 1 for (a, _), (b, _) in zip(cells, cells[1:])]
+            pattern = b'\0' + b''.join(b'.{%d}\0' % gap if gap else b'\0' for gap in gaps)
+            first, last = cells[0][0], cells[-1][0]
+            base = re.compile(pattern, re.DOTALL).search(taken, first).start() - first
+            grow = base + last + 1 + self.width - len(taken)
+            if grow > 0:
+                taken.extend(bytes(grow))
+                check.extend(array('i', [EMPTY]) * grow)
+                value.extend(array('i', [NO_PRODUCTION]) * grow)
+            self.base[r] = base
+            for t, p in cells:
+                taken[base + t] = 1
+                check[base + t] = r
+                value[base + t] = p
+        top = (max(self.base) if len(self.base) else 0) + self.width
+        del check[top:], value[top:]
+        self.check = check
+        self.value = value
+
+    def lookup(self, nt_id, terminal_id):
+        r = nt_id - self.first_row
+        i = self.base[r] + terminal_id
+        return self.value[i] if self.check[i] == r else self.default[r]
+
+    def entries(self):
+        """(nt id, terminal id, production id) of every explicit cell, in slot order."""
+        first_row, base, value = self.first_row, self.base, self.value
+        for i, r in enumerate(self.check):
+            if r != EMPTY:
+                yield r + first_row, i - base[r], value[i]
+
+    def rows(self):
+        """
+        (nt id, default production id, {terminal id: production id}) per
+        row, with only the row's explicit cells in the dict: the cell for
+        any other terminal is the default.
+        """
+        explicit = [{} for _ in self.default]
+        for nt_id, terminal_id, prod_id in self.entries():
+            explicit[nt_id - self.first_row][terminal_id] = prod_id
+        for r, default in enumerate(self.default):
+            yield r + self.first_row, default, explicit[r]
+
+    def cells(self):
+        """A read-only stand-in for the dense table array (see PackedCells)."""
+        return PackedCells(self)
+
+    def memory_bytes(self):
+        return sum(a.itemsize * len(a) for a in (self.base, self.default, self.check, self.value))
+
+class PackedCells:
+    def __init__(self, packed):
+        """
+        Indexed like CompiledTable.table, by row_offsets[nt] + terminal id,
+        so the parsers' loops run unchanged on the packed arrays.
+        """
+        self.base = packed.base
+        self.default = packed.default
+        self.check = packed.check
+        self.value = packed.value
+        self.width = packed.width
+        self.itemsize = packed.value.itemsize
+
+    def __len__(self):
+        return len(self.default) * self.width
+
+    def __getitem__(self, cell):
+        r, t = divmod(cell, self.width)
+        i = self.base[r] + t
+        return self.value[i] if self.check[i] == r else self.default[r]
+
+    def __iter__(self):
+        return map(self.__getitem__, range(len(self)))
+
+def dict_memory_bytes(parsing_table):
+    """The dict and its (nt, terminal) key tuples; the symbols and bodies are shared."""
+    return sys.getsizeof(parsing_table) + sum(sys.getsizeof(key) for key in parsing_table)
+
+def memory_report(packed, parsing_table):
+    """Bytes held by the dict form, the dense CompiledTable rows and the packed form."""
+    compiled = packed.compiled
+    return {
+        'cells': len(parsing_table),
+        'dict_bytes': dict_memory_bytes(parsing_table),
+        'dense_bytes': compiled.table.itemsize * len(compiled.table),
+        'packed_bytes': packed.memory_bytes(),
+        'packed_slots': len(packed.check),
+    }
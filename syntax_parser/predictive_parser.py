@@ -1,17 +1,146 @@
 # parser/predictive_parser.py
+import mmap
+import os
+import time
+from array import array
+from collections import namedtuple
 from syntax_parser.tree import TreeNode
+from syntax_parser.compiled_table import CompiledTable, EPSILON
+from syntax_parser.flat_tree import FlatTree, NO_NODE, ERROR_ID
+from syntax_parser.lexer import Lexer, LineCounter, line_col
+from syntax_parser.metrics import ParseMetrics
+from syntax_parser.source import iter_token_ids, is_text_source, DEFAULT_CHUNK_SIZE
+from syntax_parser.trace import (
+    ParseTrace, format_action, found_text, MATCH, APPLY, ACCEPT, ERROR_MISMATCH, ERROR_NO_ENTRY,
+)
+
+PROGRESS_INTERVAL = 1024
+DEFAULT_MAX_ERRORS = 100
+
+# One syntax error found by parse_recovering(); position as in error_position
+ParseError = namedtuple('ParseError', 'position message')
 
 class PredictiveParser:
-    def __init__(self, parsing_table, non_terminals, start_symbol):
+    def __init__(self, parsing_table, non_terminals, start_symbol, lexer_rules=None, follow_sets=None,
+                 packed=False):
         """
-        Initializes the parser with a pre-computed parsing table.
+        Initializes the parser with a pre-computed parsing table. Without
+        lexer_rules every input character is one terminal; with them the
+        input is tokenized by a Lexer first (see syntax_parser/lexer.py).
+        follow_sets (the analyzer's FOLLOW sets) enable parse_recovering().
+        packed=True parses on a row-displaced PackedTable instead of the
+        dense table, for grammars whose dense table is too big to hold.
         """
         self.parsing_table = parsing_table
         self.non_terminals = set(non_terminals)
         self.terminals = self._get_terminals_from_table()
         self.start_symbol = start_symbol
         self.end_marker = '$'
+        self.flat_tree = None
         self.parse_tree = None
+        self.trace = None
+        self.error_position = None
+        self.error_message = None
+        self.errors = []
+        self.metrics = None
+        self.compiled = CompiledTable(parsing_table, self.non_terminals, start_symbol, self.end_marker, packed)
+        self.lexer_rules = lexer_rules
+        self.lexer = Lexer(lexer_rules, self.compiled) if lexer_rules else None
+        self.sync_sets = self._sync_sets(follow_sets)
+
+    @classmethod
+    def from_compiled(cls, compiled, lexer_rules=None, follow_sets=None):
+        """
+        Builds a parser around an existing CompiledTable, e.g. one shipped to
+        a worker process or loaded from a cache. parsing_table stays None.
+        """
+        parser = cls.__new__(cls)
+        parser.parsing_table = None
+        parser.non_terminals = set(compiled.non_terminal_names)
+        parser.terminals = set(compiled.terminal_names)
+        parser.start_symbol = compiled.start_symbol
+        parser.end_marker = compiled.end_marker
+        parser.flat_tree = None
+        parser.parse_tree = None
+        parser.trace = None
+        parser.error_position = None
+        parser.error_message = None
+        parser.errors = []
+        parser.metrics = None
+        parser.compiled = compiled
+        parser.lexer_rules = lexer_rules
+        parser.lexer = Lexer(lexer_rules, compiled) if lexer_rules else None
+        parser.sync_sets = parser._sync_sets(follow_sets)
+        return parser
+
+    def _first_ids(self, nt_id):
+        # FIRST(nt) as terminal ids, from the compiled productions. Table
+        # entries alone would also include FOLLOW when nt is nullable.
+        compiled = self.compiled
+        num_terminals = compiled.num_terminals
+        first = {}
+        nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for prod_id, body in enumerate(compiled.productions):
+                lhs = compiled.production_lhs[prod_id]
+                found = first.setdefault(lhs, set())
+                size = len(found)
+                for symbol in body:
+                    if symbol < num_terminals:
+                        found.add(symbol)
+                        break
+                    found |= first.get(symbol, set())
+                    if symbol not in nullable:
+                        break
+                else:
+                    if lhs not in nullable:
+                        nullable.add(lhs)
+                        changed = True
+                changed |= len(found) != size
+        return frozenset(first.get(nt_id, ()))
+
+    def _sync_sets(self, follow_sets):
+        # Per non-terminal id: terminal ids that end panic-mode skipping.
+        # Besides FOLLOW, tokens in FIRST of the start symbol (where leftover
+        # input is parsed again) and the end marker. restart_ids keeps that
+        # FIRST set for parse_recovering().
+        if follow_sets is None:
+            self.restart_ids = None
+            return None
+        compiled = self.compiled
+        self.restart_ids = self._first_ids(compiled.start_id)
+        restart = self.restart_ids | {compiled.end_id}
+        sync = {None: frozenset(restart)}
+        for nt, terminals in follow_sets.items():
+            if nt in compiled.symbol_ids:
+                ids = {compiled.terminal_ids[t] for t in terminals if t in compiled.terminal_ids}
+                sync[compiled.symbol_ids[nt]] = frozenset(ids | restart)
+        return sync
+
+    @property
+    def parse_tree(self):
+        """
+        TreeNode tree of the last parse. Fast paths only fill flat_tree;
+        the TreeNode objects are then created here on first access.
+        """
+        if self._parse_tree is None and self.flat_tree is not None:
+            self._parse_tree = self.flat_tree.to_tree_node()
+        return self._parse_tree
+
+    @parse_tree.setter
+    def parse_tree(self, tree):
+        self._parse_tree = tree
+
+    def enable_metrics(self):
+        """
+        Starts collecting ParseMetrics for recognize() and parse(trace=False)
+        and returns them; set self.metrics to None to stop. Uninstrumented
+        parses pay one attribute check per call, not per step.
+        """
+        self.metrics = ParseMetrics(self.compiled)
+        return self.metrics
 
     def _get_terminals_from_table(self):
         terminals = set()
@@ -19,79 +148,461 @@ class PredictiveParser:
             terminals.add(terminal)
         return terminals - {'$'}
     
-    # The 'parse' method from the previous answer can be copied here.
-    # It remains unchanged as its logic is independent of the grammar.
-    def parse(self, input_string, step_callback=None, tree_callback=None):
-        input_string = input_string + self.end_marker
-        stack = [self.end_marker, self.start_symbol]
-        
+    def _fail(self, position, message):
+        self.error_position = position
+        self.error_message = message
+        return False
+
+    def _tokenize(self, input_string):
+        # Terminal ids (ending with the end marker) and, when a lexer is in
+        # use, the source offset of each token; None means one char per token.
+        if self.lexer is None:
+            return self.compiled.encode(input_string), None
+        return self.lexer.encode(input_string)
+
+    def _describe_error(self, input_string, tokens, starts, index, top, locate=None):
+        # (position, message) for the token at index not fitting stack top;
+        # locate maps a source offset to (line, column), line_col by default
+        compiled = self.compiled
+        found = found_text(compiled, input_string, tokens, starts, index)
+        action = ERROR_MISMATCH if compiled.is_terminal(top) else ERROR_NO_ENTRY
+        message = format_action(compiled, action, -1, top, found)
+        if starts is None:
+            return index, message
+        line, col = locate(starts[index]) if locate else line_col(input_string, starts[index])
+        return starts[index], f"{message} at line {line}, column {col}"
+
+    def _error(self, input_string, tokens, starts, index, top):
+        return self._fail(*self._describe_error(input_string, tokens, starts, index, top))
+
+    def recognize(self, input_string):
+        """
+        Accept/reject only: no tree, no callbacks, no step strings.
+        On rejection, error_position and error_message describe the failure.
+        """
+        if self.metrics is not None:
+            return self._parse_metered(input_string, build_tree=False)
+        compiled = self.compiled
+        tokens, starts = self._tokenize(input_string)
+        table = compiled.table
+        offsets = compiled.row_offsets
+        productions = compiled.reversed_productions
+        num_terminals = compiled.num_terminals
+        end = compiled.end_id
+
+        self.error_position = self.error_message = None
+        stack = [end, compiled.start_id]
+        pop = stack.pop
+        push = stack.extend
+        index = 0
+        token = tokens[0]
+        while True:
+            top = pop()
+            if top < num_terminals:
+                if top != token:
+                    return self._error(input_string, tokens, starts, index, top)
+                if top == end:
+                    return True
+                index += 1
+                token = tokens[index]
+            else:
+                prod_id = table[offsets[top] + token]
+                if prod_id < 0:
+                    return self._error(input_string, tokens, starts, index, top)
+                push(productions[prod_id])
+
+    def parse_stream(self, source, build_tree=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Parses a str, bytes, mmap, file object or token iterator without
+        materializing the input. Without build_tree, memory use depends only
+        on the stack depth. Text sources go through the lexer when one is
+        configured; error_position is then the offending token's offset.
+        """
+        compiled = self.compiled
+        table = compiled.table
+        offsets = compiled.row_offsets
+        productions = compiled.productions
+        reversed_productions = compiled.reversed_productions
+        num_terminals = compiled.num_terminals
+        end = compiled.end_id
+
+        self.error_position = self.error_message = None
+        self.parse_tree = None
+        self.flat_tree = tree = FlatTree.for_table(compiled) if build_tree else None
+        tree_stack = [tree.add_root(compiled.start_id)] if build_tree else None
+        where = [None]
+        if self.lexer is not None and is_text_source(source):
+            def lexed():
+                for record in self.lexer.stream(source, chunk_size):
+                    where[0] = record.start
+                    yield record.id
+            tokens = lexed()
+        else:
+            tokens = iter_token_ids(compiled, source, chunk_size)
+        stack = [end, compiled.start_id]
+        pop = stack.pop
+        push = stack.extend
+        index = 0
+        token = next(tokens, end)
+        while True:
+            top = pop()
+            if top < num_terminals:
+                if top != token:
+                    return self._fail(index if where[0] is None else where[0], self._describe_stream_error(top, token))
+                if top == end:
+                    return True
+                index += 1
+                token = next(tokens, end)
+                continue
+
+            prod_id = table[offsets[top] + token]
+            if prod_id < 0:
+                return self._fail(index if where[0] is None else where[0], self._describe_stream_error(top, token))
+            push(reversed_productions[prod_id])
+            if tree_stack is not None:
+                node = tree_stack.pop()
+                body = productions[prod_id]
+                if body:
+                    first = tree.add_children(node, body)
+                    for i in range(len(body) - 1, -1, -1):
+                        if body[i] >= num_terminals:
+                            tree_stack.append(first + i)
+                else:
+                    tree.add_epsilon(node)
+
+    def _describe_stream_error(self, top, token):
+        # The raw character is gone in a stream; name the terminal instead.
+        compiled = self.compiled
+        found = '<unknown>' if token == compiled.unknown_id else compiled.symbols[token]
+        action = ERROR_MISMATCH if compiled.is_terminal(top) else ERROR_NO_ENTRY
+        return format_action(compiled, action, -1, top, found)
+
+    def parse_file(self, path, build_tree=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Streams a file through parse_stream via a read-only memory map."""
+        if os.path.getsize(path) == 0:
+            return self.parse_stream('', build_tree, chunk_size)
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return self.parse_stream(mapped, build_tree, chunk_size)
+
+    def _parse_fast(self, input_string):
+        # Same loop as recognize(), plus filling a FlatTree.
+        if self.metrics is not None:
+            return self._parse_metered(input_string, build_tree=True)
+        compiled = self.compiled
+        tokens, starts = self._tokenize(input_string)
+        table = compiled.table
+        offsets = compiled.row_offsets
+        productions = compiled.productions
+        reversed_productions = compiled.reversed_productions
+        num_terminals = compiled.num_terminals
+        end = compiled.end_id
+
+        self.error_position = self.error_message = None
+        self.parse_tree = None
+        self.flat_tree = tree = FlatTree.for_table(compiled)
+        add_children = tree.add_children
+        stack = [end, compiled.start_id]
+        tree_stack = [tree.add_root(compiled.start_id)]
+        index = 0
+        token = tokens[0]
+        while True:
+            top = stack.pop()
+            if top < num_terminals:
+                if top != token:
+                    return self._error(input_string, tokens, starts, index, top)
+                if top == end:
+                    return True
+                index += 1
+                token = tokens[index]
+                continue
+
+            prod_id = table[offsets[top] + token]
+            if prod_id < 0:
+                return self._error(input_string, tokens, starts, index, top)
+            node = tree_stack.pop()
+            body = productions[prod_id]
+            if body:
+                first = add_children(node, body)
+                stack.extend(reversed_productions[prod_id])
+                for i in range(len(body) - 1, -1, -1):
+                    if body[i] >= num_terminals:
+                        tree_stack.append(first + i)
+            else:
+                tree.add_epsilon(node)
+
+    def _parse_metered(self, input_string, build_tree):
+        # recognize()'s loop, also recording the table cell of every applied
+        # production and the deepest stack. The tree is built afterwards by
+        # replaying the cells, so lexing, parsing and tree building are
+        # timed as separate phases.
+        compiled = self.compiled
+        started = time.perf_counter()
+        tokens, starts = self._tokenize(input_string)
+        lexed = time.perf_counter()
+        table = compiled.table
+        offsets = compiled.row_offsets
+        productions = compiled.reversed_productions
+        num_terminals = compiled.num_terminals
+        end = compiled.end_id
+
+        self.error_position = self.error_message = None
+        self.parse_tree = None
+        self.flat_tree = None
+        cells = array('i')
+        record = cells.append
+        stack = [end, compiled.start_id]
+        pop = stack.pop
+        push = stack.extend
+        max_depth = len(stack)
+        index = 0
+        token = tokens[0]
+        while True:
+            top = pop()
+            if top < num_terminals:
+                if top != token:
+                    accepted = False
+                    break
+                if top == end:
+                    accepted = True
+                    break
+                index += 1
+                token = tokens[index]
+            else:
+                cell = offsets[top] + token
+                prod_id = table[cell]
+                if prod_id < 0:
+                    accepted = False
+                    break
+                record(cell)
+                push(productions[prod_id])
+                if len(stack) > max_depth:
+                    max_depth = len(stack)
+        parsed = time.perf_counter()
+
+        tree_time = 0.0
+        if build_tree:
+            self._replay_tree(cells)
+            tree_time = time.perf_counter() - parsed
+        self.metrics.record(accepted, index, cells, max_depth, lexed - started, parsed - lexed, tree_time)
+        if not accepted:
+            return self._error(input_string, tokens, starts, index, top)
+        return True
+
+    def _replay_tree(self, cells):
+        # The FlatTree _parse_fast() builds, from the applied table cells
+        compiled = self.compiled
+        table = compiled.table
+        productions = compiled.productions
+        num_terminals = compiled.num_terminals
+        self.flat_tree = tree = FlatTree.for_table(compiled)
+        add_children = tree.add_children
+        tree_stack = [tree.add_root(compiled.start_id)]
+        for cell in cells:
+            node = tree_stack.pop()
+            body = productions[table[cell]]
+            if body:
+                first = add_children(node, body)
+                for i in range(len(body) - 1, -1, -1):
+                    if body[i] >= num_terminals:
+                        tree_stack.append(first + i)
+            else:
+                tree.add_epsilon(node)
+
+    def parse_recovering(self, input_string, max_errors=DEFAULT_MAX_ERRORS):
+        """
+        Parses past syntax errors with panic-mode recovery and collects them
+        all in self.errors (ParseError records) in one linear pass. Returns
+        True only if there were none; error_position and error_message
+        describe the first one, as after parse().
+
+        On an error the parser either pops the expected terminal (treating
+        it as missing), skips input tokens until one can start the
+        non-terminal on top or is in its synchronizing set (its FOLLOW set,
+        the tokens that can start the grammar and the end marker), or pops
+        that non-terminal. Errors found before
+        the next successfully matched token are consequences of the same
+        mistake and not reported again. self.flat_tree holds the partial
+        tree, with ERROR nodes where a terminal was missing or a
+        non-terminal had to be abandoned. Input left over once the start
+        symbol is complete is parsed again from the start symbol, as an
+        extra subtree of the root. Parsing stops after max_errors.
+        """
+        if self.sync_sets is None:
+            raise ValueError("error recovery needs the analyzer's FOLLOW sets (follow_sets=...)")
+        compiled = self.compiled
+        tokens, starts = self._tokenize(input_string)
+        table = compiled.table
+        offsets = compiled.row_offsets
+        productions = compiled.productions
+        reversed_productions = compiled.reversed_productions
+        num_terminals = compiled.num_terminals
+        end = compiled.end_id
+        sync_sets = self.sync_sets
+        no_sync = sync_sets[None]
+
+        self.error_position = self.error_message = None
+        self.errors = errors = []
+        self.trace = None
+        self.parse_tree = None
+        self.flat_tree = tree = FlatTree.for_table(compiled)
+        start = compiled.start_id
+        stack = [end, start]
+        tree_stack = [NO_NODE, tree.add_root(start)]  # node of every stack entry
+        tail = NO_NODE  # last child of the root, once input was left over
+        index = 0
+        token = tokens[0]
+        recovering = False
+        restart_ids = self.restart_ids
+        restarted_at = -1  # token index of the last restart from the start symbol
+        locate = LineCounter(input_string) if starts is not None else None
+
+        def report():
+            if not recovering:
+                errors.append(ParseError(*self._describe_error(input_string, tokens, starts, index, top, locate)))
+            return True
+
+        while len(errors) < max_errors:
+            top = stack[-1]
+            if top < num_terminals:
+                if top == token:
+                    if top == end:
+                        break
+                    stack.pop()
+                    tree_stack.pop()
+                    index += 1
+                    token = tokens[index]
+                    recovering = False
+                elif top == end:
+                    # Input left over after a complete parse: skip to a token
+                    # in FIRST(start) and parse the rest as another start
+                    # symbol under the root, after an error node. A restart
+                    # that consumed nothing skips a token, so this ends.
+                    recovering = report()
+                    if index == restarted_at:
+                        index += 1
+                        token = tokens[index]
+                    while token != end and token not in restart_ids:
+                        index += 1
+                        token = tokens[index]
+                    restarted_at = index
+                    if token != end:
+                        tail = tree.add_sibling(tree.last_child(0) if tail == NO_NODE else tail, ERROR_ID)
+                        tail = tree.add_sibling(tail, start)
+                        stack.append(start)
+                        tree_stack.append(tail)
+                else:
+                    # Treat the expected terminal as missing
+                    recovering = report()
+                    stack.pop()
+                    tree.mark_error(tree_stack.pop())
+                continue
+
+            prod_id = table[offsets[top] + token]
+            if prod_id < 0:
+                recovering = report()
+                sync = sync_sets.get(top, no_sync)
+                row = offsets[top]
+                while token != end and token not in sync and table[row + token] < 0:
+                    index += 1
+                    token = tokens[index]
+                prod_id = table[row + token]
+                if prod_id < 0:
+                    stack.pop()
+                    tree.add_error(tree_stack.pop())
+                    continue
+
+            stack.pop()
+            node = tree_stack.pop()
+            body = productions[prod_id]
+            if body:
+                first = tree.add_children(node, body)
+                stack.extend(reversed_productions[prod_id])
+                tree_stack.extend(range(first + len(body) - 1, first - 1, -1))
+            else:
+                tree.add_epsilon(node)
+
+        if errors:
+            self.error_position, self.error_message = errors[0]
+            return False
+        return True
+
+    def parse(self, input_string, step_callback=None, tree_callback=None, trace=True, progress=None):
+        """
+        Parses input_string and builds parse_tree. With trace=True every
+        step is recorded in self.trace (a ParseTrace); step_callback, if
+        given, receives each step's rebuilt (step, stack, input, action)
+        row. With trace=False callbacks are skipped, nothing is recorded and
+        the tree is built as a FlatTree (self.flat_tree).
+
+        progress, if given, is called as progress(trace) every
+        PROGRESS_INTERVAL traced steps; returning True cancels the parse,
+        which then returns None.
+        """
+        if not trace:
+            self.trace = None
+            return self._parse_fast(input_string)
+
+        compiled = self.compiled
+        tokens, starts = self._tokenize(input_string)
+        table = compiled.table
+        offsets = compiled.row_offsets
+        productions = compiled.productions
+        reversed_productions = compiled.reversed_productions
+        symbols = compiled.symbols
+        num_terminals = compiled.num_terminals
+        end = compiled.end_id
+
+        self.trace = steps = ParseTrace(compiled, input_string, tokens, starts)
+        record = steps.record
+        self.error_position = self.error_message = None
+        self.flat_tree = None
         self.parse_tree = TreeNode(self.start_symbol)
+        stack = [end, compiled.start_id]
         tree_stack = [self.parse_tree]
-        
         index = 0
-        step = 0
+        token = tokens[0]
         result = None
-        
-        while stack:
-            top = stack[-1] 
-            current_input = input_string[index] if index < len(input_string) else '$'
-            
-            step += 1
-            stack_str = ''.join(reversed(stack))
-            input_str = input_string[index:]
-            action = ""
-
-            if top == self.end_marker and top == current_input:
-                action = "✓ Accepted: String parsed successfully"
-                result = True
-                if step_callback: step_callback(step, stack_str, input_str, action)
-                break
-
-            elif top in self.terminals:
-                if top == current_input:
-                    action = f"Match: '{top}'"
+
+        while result is None:
+            top = stack[-1]
+            if top < num_terminals:
+                if top == end and token == end:
+                    record(ACCEPT, -1, index, 0, stack)
+                    result = True
+                elif top != token:
+                    record(ERROR_MISMATCH, -1, index, 0, stack)
+                    result = self._error(input_string, tokens, starts, index, top)
+                else:
+                    record(MATCH, -1, index, -1, stack)
                     stack.pop()
                     index += 1
+                    token = tokens[index]
+            else:
+                prod_id = table[offsets[top] + token]
+                if prod_id < 0:
+                    record(ERROR_NO_ENTRY, -1, index, 0, stack)
+                    result = self._error(input_string, tokens, starts, index, top)
                 else:
-                    action = f"✗ Error: Expected '{top}', found '{current_input}'"
-                    result = False
-                    if step_callback: step_callback(step, stack_str, input_str, action)
-                    break
-            
-            elif top in self.non_terminals:
-                key = (top, current_input)
-                if key in self.parsing_table:
-                    production = self.parsing_table[key]
-                    action = f"Apply {top} → {''.join(production) if production != ['ε'] else 'ε'}"
-                    
+                    body = productions[prod_id]
+                    record(APPLY, prod_id, index, len(body) - 1, stack)
                     stack.pop()
-                    current_tree_node = tree_stack.pop()
-
-                    if production != ['ε']:
-                        # Add children to tree
-                        children_nodes = [TreeNode(s, s in self.terminals) for s in production]
-                        for child in children_nodes:
-                            current_tree_node.add_child(child)
-                        
-                        # Push symbols to stacks in reverse
-                        for i in range(len(production) - 1, -1, -1):
-                            stack.append(production[i])
-                            if production[i] in self.non_terminals:
-                                tree_stack.append(children_nodes[i])
+                    node = tree_stack.pop()
+                    if body:
+                        children = [TreeNode(symbols[s], s < num_terminals) for s in body]
+                        for child in children:
+                            node.add_child(child)
+                        stack.extend(reversed_productions[prod_id])
+                        for i in range(len(body) - 1, -1, -1):
+                            if body[i] >= num_terminals:
+                                tree_stack.append(children[i])
                     else:
-                        current_tree_node.add_child(TreeNode('ε', True))
-                else:
-                    action = f"✗ Error: No production for ({top}, {current_input})"
-                    result = False
-                    if step_callback: step_callback(step, stack_str, input_str, action)
-                    break
-            else: # Should not happen with a correct grammar/table
-                action = f"✗ Error: Invalid symbol '{top}' in stack"
-                result = False
-                if step_callback: step_callback(step, stack_str, input_str, action)
-                break
-            
-            if step_callback: step_callback(step, stack_str, input_str, action)
-            if tree_callback: tree_callback(self.parse_tree)
-        
-        return result
\ No newline at end of file
+                        node.add_child(TreeNode(EPSILON, True))
+
+            if step_callback: step_callback(*steps.row(len(steps) - 1))
+            if tree_callback and result is None: tree_callback(self.parse_tree)
+            if progress is not None and result is None and not len(steps) % PROGRESS_INTERVAL:
+                if progress(steps):
+                    self.error_message = "Cancelled"
+                    return None
+
+        return result
@@ -0,0 +1,74 @@
+# syntax_parser/source.py
+import codecs
+import mmap
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+    """
+    Yields the text of a str, bytes-like object, mmap or file object in
+    chunks of at most chunk_size characters, never holding more than one
+    chunk at a time (beyond what the source itself keeps in memory).
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+        return
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            text = decoder.decode(view[start:start + chunk_size])
+            if text:
+                yield text
+    else:
+        read = source.read
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            text = decoder.decode(chunk) if not isinstance(chunk, str) else chunk
+            if text:
+                yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+def is_text_source(source):
+    return isinstance(source, (str, bytes, bytearray, memoryview, mmap.mmap)) or hasattr(source, 'read')
+
+def iter_token_ids(compiled, source, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Turns a streaming source into terminal ids, without the end marker.
+
+    Text sources (str, bytes, mmap, file objects) are read in chunks and
+    mapped one character per terminal. Any other iterable is taken as a
+    token stream whose items are terminal names, terminal ids, or token
+    records carrying an `id` attribute.
+    """
+    if is_text_source(source):
+        encode = compiled.encode
+        for chunk in iter_chunks(source, chunk_size):
+            ids = encode(chunk)
+            ids.pop()  # chunk-level end marker
+            yield from ids
+        return
+
+    iterator = iter(source)
+    first = next(iterator, None)
+    if first is None:
+        return
+    if isinstance(first, int):
+        yield first
+        yield from iterator
+    elif isinstance(first, str):
+        get = compiled.terminal_ids.get
+        unknown = compiled.unknown_id
+        yield get(first, unknown)
+        for symbol in iterator:
+            yield get(symbol, unknown)
+    else:
+        yield first.id
+        for token in iterator:
+            yield token.id
@@ -0,0 +1,202 @@
+# syntax_parser/trace.py
+from array import array
+from syntax_parser.compiled_table import EPSILON
+from syntax_parser.tree import TreeNode
+
+# Action codes stored per step
+MATCH = 0
+APPLY = 1
+ACCEPT = 2
+ERROR_MISMATCH = 3
+ERROR_NO_ENTRY = 4
+
+ACTION_NAMES = ('match', 'apply', 'accept', 'error_mismatch', 'error_no_entry')
+
+def format_action(compiled, action, prod_id, top, found):
+    """Builds the human-readable action text shown in the steps table."""
+    if action == MATCH:
+        return f"Match: '{compiled.symbols[top]}'"
+    if action == APPLY:
+        return f"Apply {compiled.production_text[prod_id]}"
+    if action == ACCEPT:
+        return "✓ Accepted: String parsed successfully"
+    if action == ERROR_MISMATCH:
+        return f"✗ Error: Expected '{compiled.symbols[top]}', found '{found}'"
+    return f"✗ Error: No production for ({compiled.symbols[top]}, {found})"
+
+def found_text(compiled, input_string, tokens, starts, index):
+    """Text for the input token at index, as shown in error messages."""
+    if starts is None:
+        return input_string[index] if index < len(input_string) else compiled.end_marker
+    token = tokens[index]
+    if token == compiled.end_id:
+        return compiled.end_marker
+    if token == compiled.unknown_id:
+        return input_string[starts[index]]
+    return compiled.symbols[token]
+
+class ParseTrace:
+    def __init__(self, compiled, input_string, tokens, starts=None, checkpoint_interval=256):
+        """
+        Compact record of a traced parse: one action code, production id,
+        input index and stack delta per step. Stack and input strings are
+        only rebuilt when row() is asked for them, by replaying from the
+        nearest stack checkpoint (taken every checkpoint_interval steps).
+        """
+        self.compiled = compiled
+        self.input_string = input_string
+        self.tokens = tokens
+        self.starts = starts  # token source offsets when lexed, else None
+        self.checkpoint_interval = checkpoint_interval
+        self.actions = array('b')
+        self.productions = array('i')
+        self.positions = array('i')
+        self.deltas = array('h')
+        self.checkpoints = []
+        # Replay cursor, so sequential row() calls cost O(1) amortized
+        self._cursor_step = None
+        self._cursor_stack = None
+
+    def __len__(self):
+        return len(self.actions)
+
+    def record(self, action, prod_id, index, delta, stack):
+        if len(self.actions) % self.checkpoint_interval == 0:
+            self.checkpoints.append(tuple(stack))
+        self.actions.append(action)
+        self.productions.append(prod_id)
+        self.positions.append(index)
+        self.deltas.append(delta)
+
+    def published(self):
+        """
+        Number of fully recorded steps. record() appends the delta column
+        last, so this is a safe bound for a reader on another thread.
+        """
+        return len(self.deltas)
+
+    @property
+    def accepted(self):
+        return bool(self.actions) and self.actions[-1] == ACCEPT
+
+    @property
+    def error_step(self):
+        """Index of the failing step, or None if the parse did not fail."""
+        if self.actions and self.actions[-1] >= ERROR_MISMATCH:
+            return len(self.actions) - 1
+        return None
+
+    def _advance(self, stack, i):
+        # Applies step i to a stack that holds the state before step i.
+        action = self.actions[i]
+        if action == MATCH:
+            stack.pop()
+        elif action == APPLY:
+            stack.pop()
+            stack.extend(self.compiled.reversed_productions[self.productions[i]])
+
+    def stack_at(self, i):
+        """Parser stack (bottom first, as symbol ids) before step i."""
+        if self._cursor_step is not None and self._cursor_step <= i < self._cursor_step + self.checkpoint_interval:
+            step, stack = self._cursor_step, self._cursor_stack
+        else:
+            step = (i // self.checkpoint_interval) * self.checkpoint_interval
+            stack = list(self.checkpoints[step // self.checkpoint_interval])
+        while step < i:
+            self._advance(stack, step)
+            step += 1
+        self._cursor_step, self._cursor_stack = step, stack
+        return stack
+
+    def found_at(self, index):
+        return found_text(self.compiled, self.input_string, self.tokens, self.starts, index)
+
+    def offset_at(self, index):
+        return index if self.starts is None else self.starts[index]
+
+    def action_text(self, i, stack=None):
+        action = self.actions[i]
+        top = None
+        if action != APPLY:
+            if stack is None:
+                stack = self.stack_at(i)
+            top = stack[-1]
+        return format_action(self.compiled, action, self.productions[i], top, self.found_at(self.positions[i]))
+
+    def row(self, i, limit=None):
+        """
+        (step, stack, input, action) strings for step i, as shown in the UI.
+        With `limit`, the stack (from the top) and the remaining input are
+        cut to about that many symbols/characters and end in '…'.
+        """
+        stack = self.stack_at(i)
+        symbols = self.compiled.symbols
+        offset = self.offset_at(self.positions[i])
+        if limit is None or (len(stack) <= limit and len(self.input_string) - offset < limit):
+            stack_str = ''.join(symbols[s] for s in reversed(stack))
+            input_str = self.input_string[offset:] + self.compiled.end_marker
+        else:
+            top = stack[-limit:] if len(stack) > limit else stack
+            stack_str = ''.join(symbols[s] for s in reversed(top)) + ('…' if len(stack) > limit else '')
+            input_str = self.input_string[offset:offset + limit]
+            input_str += '…' if offset + limit < len(self.input_string) else self.compiled.end_marker
+        return (i + 1, stack_str, input_str, self.action_text(i, stack))
+
+    def rows(self, start=0, stop=None):
+        stop = len(self) if stop is None else min(stop, len(self))
+        for i in range(start, stop):
+            yield self.row(i)
+
+    def export(self, fp, expand=False):
+        """
+        Streams the trace to a text file, one tab-separated line per step.
+        The compact form writes the raw records; expand=True writes the
+        rebuilt stack/input/action strings instead (output size then grows
+        with input length × steps, as the strings themselves do).
+        """
+        if expand:
+            fp.write("step\tstack\tinput\taction\n")
+            for row in self.rows():
+                fp.write('\t'.join(str(v) for v in row) + '\n')
+            return
+        fp.write("step\taction\tproduction\tindex\tdelta\n")
+        for i in range(len(self)):
+            fp.write(f"{i + 1}\t{ACTION_NAMES[self.actions[i]]}\t{self.productions[i]}\t{self.positions[i]}\t{self.deltas[i]}\n")
+
+class TraceTreeBuilder:
+    def __init__(self, compiled, start_symbol):
+        """
+        Rebuilds the TreeNode parse tree from a ParseTrace's APPLY records,
+        so a consumer (e.g. the UI thread) can grow its own copy of the tree
+        while another thread is still recording the trace.
+        """
+        self.compiled = compiled
+        self.root = TreeNode(start_symbol)
+        self.pending = [self.root]  # unexpanded non-terminals, leftmost on top
+        self.step = 0
+
+    def advance(self, trace, upto):
+        """Replays steps [self.step, upto) and returns the expanded nodes."""
+        compiled = self.compiled
+        symbols = compiled.symbols
+        num_terminals = compiled.num_terminals
+        actions = trace.actions
+        expanded = []
+        for i in range(self.step, upto):
+            if actions[i] != APPLY:
+                continue
+            node = self.pending.pop()
+            body = compiled.productions[trace.productions[i]]
+            if body:
+                children = [TreeNode(symbols[s], s < num_terminals) for s in body]
+                for child in children:
+                    node.add_child(child)
+                for j in range(len(body) - 1, -1, -1):
+                    if body[j] >= num_terminals:
+                        self.pending.append(children[j])
+            else:
+                node.add_child(TreeNode(EPSILON, True))
+            expanded.append(node)
+        self.step = max(self.step, upto)
+        return expanded
+
@@ -4,14 +4,41 @@ class TreeNode:
         self.is_terminal = is_terminal
         self.children = []
         self.parent = None
-        self.x = 0
-        self.y = 0
-        self.width = 0
-        self.height = 0
 
     def add_child(self, child):
         child.parent = self
         self.children.append(child)
 
     def is_leaf(self):
-        return len(self.children) == 0 
\ No newline at end of file
+        return len(self.children) == 0
+
+def to_preorder(root):
+    """
+    Flattens a tree into a preorder list of (value, is_terminal, child_count)
+    records, iteratively so deep right-recursive trees are fine.
+    """
+    records = []
+    pending = [root]
+    while pending:
+        node = pending.pop()
+        records.append((node.value, node.is_terminal, len(node.children)))
+        pending.extend(reversed(node.children))
+    return records
+
+def from_preorder(records):
+    """Rebuilds a TreeNode tree from to_preorder() records."""
+    root = None
+    open_nodes = []  # [node, children still expected]
+    for value, is_terminal, child_count in records:
+        node = TreeNode(value, is_terminal)
+        if open_nodes:
+            parent = open_nodes[-1]
+            parent[0].add_child(node)
+            parent[1] -= 1
+            if parent[1] == 0:
+                open_nodes.pop()
+        else:
+            root = node
+        if child_count:
+            open_nodes.append([node, child_count])
+    return root
@@ -0,0 +1,273 @@
+# syntax_parser/tree_io.py
+# Saving and loading parse trees, iteratively so deep right-recursive trees
+# are fine, in two preorder formats:
+#
+# Binary (.ll1t): a header, a symbol table, then one fixed-width record per
+# node: symbol index, child count and subtree size in nodes. Node i's first
+# child is node i + 1 and its next sibling is node i + size, so TreeReader
+# can walk or skip subtrees of an mmapped file without reading the rest.
+#
+# JSON lines (.jsonl): a {"format": "ll1-tree", ...} header line, then one
+# [value, is_terminal, child_count, subtree_size] array per node.
+import json
+import mmap
+import os
+import struct
+from array import array
+from syntax_parser.flat_tree import FlatTree, NO_NODE
+from syntax_parser.tree import TreeNode, from_preorder
+
+MAGIC = b'LL1T'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIII')  # magic, format version, node count, symbol count
+SYMBOL = struct.Struct('<BI')     # is_terminal, UTF-8 byte length; the bytes follow
+RECORD = struct.Struct('<iII')    # symbol index, child count, subtree size
+JSONL_FORMAT = 'll1-tree'
+CHUNK_RECORDS = 4096              # records gathered per write
+
+def iter_records(tree):
+    """
+    (value, is_terminal, child_count) records in preorder for a TreeNode
+    root, a FlatTree, or a sequence of such records (as batch results and
+    to_preorder() give), without building a list of the whole tree.
+    """
+    if tree is None:
+        return
+    if isinstance(tree, TreeNode):
+        pending = [tree]
+        while pending:
+            node = pending.pop()
+            yield node.value, node.is_terminal, len(node.children)
+            pending.extend(reversed(node.children))
+    elif isinstance(tree, FlatTree):
+        yield from _flat_records(tree)
+    else:
+        for value, is_terminal, child_count in tree:
+            yield value, bool(is_terminal), child_count
+
+def _flat_records(tree):
+    # FlatTree walk straight over its arrays, counting children on the way
+    if not len(tree):
+        return
+    symbol, first_child, next_sibling = tree.symbol, tree.first_child, tree.next_sibling
+    names = {}  # symbol id -> (value, is_terminal); a node's name only depends on its symbol
+    pending = [0]
+    while pending:
+        node = pending.pop()
+        children = []
+        child = first_child[node]
+        while child != NO_NODE:
+            children.append(child)
+            child = next_sibling[child]
+        name = names.get(symbol[node])
+        if name is None:
+            name = names[symbol[node]] = (tree.value(node), tree.is_terminal(node))
+        yield name[0], name[1], len(children)
+        children.reverse()
+        pending += children
+
+def subtree_sizes(records):
+    """array of subtree sizes (in nodes, self included) for preorder records."""
+    sizes = array('I')
+    open_nodes = []  # [preorder index, children still expected]
+    for i, (_, _, child_count) in enumerate(records):
+        sizes.append(1)
+        if child_count:
+            open_nodes.append([i, child_count])
+            continue
+        # A leaf ends the subtrees of the ancestors it is the last node of
+        while open_nodes:
+            parent = open_nodes[-1]
+            parent[1] -= 1
+            if parent[1]:
+                break
+            open_nodes.pop()
+            sizes[parent[0]] = i - parent[0] + 1
+    if open_nodes:
+        raise ValueError("Preorder records end before every node has its children")
+    return sizes
+
+def _scan(tree):
+    # First pass of both writers: subtree sizes and the symbol table
+    symbols = {}
+    def interned():
+        for value, is_terminal, child_count in iter_records(tree):
+            symbols.setdefault((value, is_terminal), len(symbols))
+            yield value, is_terminal, child_count
+    return subtree_sizes(interned()), symbols
+
+def _open(target, mode):
+    # (file, whether we opened it): targets are paths or open file objects
+    if hasattr(target, 'read') or hasattr(target, 'write'):
+        return target, False
+    if 'b' in mode:
+        return open(target, mode), True
+    return open(target, mode, encoding='utf-8'), True
+
+def write_binary(target, tree):
+    """Writes tree (see iter_records) to a path or binary file in the .ll1t format."""
+    sizes, symbols = _scan(tree)
+    f, owned = _open(target, 'wb')
+    try:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(sizes), len(symbols)))
+        for value, is_terminal in symbols:
+            name = str(value).encode('utf-8')
+            f.write(SYMBOL.pack(is_terminal, len(name)) + name)
+        chunk = bytearray()
+        pack = RECORD.pack
+        for i, (value, is_terminal, child_count) in enumerate(iter_records(tree)):
+            chunk += pack(symbols[value, is_terminal], child_count, sizes[i])
+            if len(chunk) >= CHUNK_RECORDS * RECORD.size:
+                f.write(chunk)
+                chunk.clear()
+        f.write(chunk)
+    finally:
+        if owned:
+            f.close()
+
+def write_jsonl(target, tree):
+    """Writes tree (see iter_records) to a path or text file as JSON lines."""
+    sizes, _ = _scan(tree)
+    f, owned = _open(target, 'w')
+    try:
+        f.write(json.dumps({'format': JSONL_FORMAT, 'version': FORMAT_VERSION, 'nodes': len(sizes)}) + '\n')
+        lines = []
+        for i, (value, is_terminal, child_count) in enumerate(iter_records(tree)):
+            lines.append(json.dumps([value, is_terminal, child_count, sizes[i]], ensure_ascii=False))
+            if len(lines) >= CHUNK_RECORDS:
+                f.write('\n'.join(lines) + '\n')
+                lines.clear()
+        if lines:
+            f.write('\n'.join(lines) + '\n')
+    finally:
+        if owned:
+            f.close()
+
+def read_jsonl(source):
+    """Yields (value, is_terminal, child_count) records from a JSON lines tree, line by line."""
+    f, owned = _open(source, 'r')
+    try:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != JSONL_FORMAT:
+            raise ValueError("Not a JSON lines parse tree")
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree format version {header.get('version')!r}")
+        for line in f:
+            if line.strip():
+                value, is_terminal, child_count, _ = json.loads(line)
+                yield value, is_terminal, child_count
+    finally:
+        if owned:
+            f.close()
+
+class TreeReader:
+    def __init__(self, buffer):
+        """
+        Reads a .ll1t tree from any buffer (bytes, mmap, memoryview); records
+        are unpacked only when asked for. TreeReader.open() maps a file.
+        """
+        self._mmap = None
+        self.view = memoryview(buffer)
+        try:
+            self._read_header()
+        except ValueError:
+            self.view.release()  # so a mapped file can be closed
+            raise
+
+    def _read_header(self):
+        if len(self.view) < HEADER.size:
+            raise ValueError("Tree file is truncated")
+        magic, version, count, symbol_count = HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a parse tree file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree format version {version}")
+        self.values = []
+        self.terminal = []
+        pos = HEADER.size
+        try:
+            for _ in range(symbol_count):
+                is_terminal, length = SYMBOL.unpack_from(self.view, pos)
+                pos += SYMBOL.size
+                self.values.append(bytes(self.view[pos:pos + length]).decode('utf-8'))
+                self.terminal.append(bool(is_terminal))
+                pos += length
+        except struct.error:
+            raise ValueError("Tree file is truncated") from None
+        self.records_at = pos
+        self.count = count
+        if len(self.view) < pos + count * RECORD.size:
+            raise ValueError("Tree file is truncated")
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as f:
+            if not os.fstat(f.fileno()).st_size:
+                raise ValueError("Tree file is empty")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            reader = cls(mapped)
+        except ValueError:
+            mapped.close()
+            raise
+        reader._mmap = mapped
+        return reader
+
+    def close(self):
+        self.view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def node(self, i):
+        """(value, is_terminal, child_count, subtree_size) of node i."""
+        if not 0 <= i < self.count:
+            raise IndexError(f"Node {i} is outside the tree ({self.count} nodes)")
+        symbol, child_count, size = RECORD.unpack_from(self.view, self.records_at + i * RECORD.size)
+        return self.values[symbol], self.terminal[symbol], child_count, size
+
+    def subtree_size(self, i):
+        return self.node(i)[3]
+
+    def children(self, i):
+        """Node indices of i's children, jumping over each child's subtree."""
+        child = i + 1
+        for _ in range(self.node(i)[2]):
+            yield child
+            child += self.subtree_size(child)
+
+    def records(self, root=0):
+        """(value, is_terminal, child_count) records of root's subtree, in preorder."""
+        if not self.count:
+            return
+        start = self.records_at + root * RECORD.size
+        end = start + self.subtree_size(root) * RECORD.size
+        values, terminal = self.values, self.terminal
+        for symbol, child_count, _ in RECORD.iter_unpack(self.view[start:end]):
+            yield values[symbol], terminal[symbol], child_count
+
+    def to_tree_node(self, root=0):
+        """Materializes root's subtree as TreeNode objects, e.g. for the UI."""
+        return from_preorder(self.records(root))
+
+def save_tree(path, tree):
+    """Writes tree as JSON lines if path ends in .jsonl, else in the binary format."""
+    if str(path).endswith('.jsonl'):
+        write_jsonl(path, tree)
+    else:
+        write_binary(path, tree)
+
+def load_tree(path):
+    """TreeNode root of a tree saved by save_tree(), or None for an empty tree."""
+    if str(path).endswith('.jsonl'):
+        return from_preorder(read_jsonl(path))
+    with TreeReader.open(path) as reader:
+        return reader.to_tree_node()
@@ -0,0 +1,51 @@
+# tests/test_grammar_edit.py
+import tempfile
+import unittest
+from grammar.analyzer import GrammarAnalyzer
+from grammar.cache import AnalysisCache
+
+GRAMMAR = {
+    'S': [['A', 'B', 'C']],
+    'A': [['a', 'b', 'A'], ['a', 'b']],
+    'B': [['b'], ['B', 'C']],
+    'C': [['c'], ['c', 'C']],
+}
+REWRITES = {'S': [['A', 'b', 'C']]}
+
+def fresh(grammar):
+    analyzer = GrammarAnalyzer(grammar, REWRITES)
+    analyzer.run_full_analysis()
+    return analyzer
+
+class EditTest(unittest.TestCase):
+    def assertSameAnalysis(self, edited, expected):
+        self.assertEqual(edited.final_grammar, expected.final_grammar)
+        self.assertEqual(edited.first_sets, expected.first_sets)
+        self.assertEqual(edited.follow_sets, expected.follow_sets)
+        self.assertEqual(edited.parsing_table, expected.parsing_table)
+
+    def test_edit_cache_restored_analysis(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AnalysisCache(directory)
+            cache.analyze(GRAMMAR, REWRITES)
+            analyzer, _ = cache.analyze(GRAMMAR, REWRITES)  # now from the file
+            analyzer.add_production('C', ['d'])
+        grammar = dict(GRAMMAR, C=GRAMMAR['C'] + [['d']])
+        self.assertSameAnalysis(analyzer, fresh(grammar))
+
+    def test_add_then_remove(self):
+        analyzer = fresh(GRAMMAR)
+        analyzer.add_production('C', ['d'])
+        analyzer.remove_production('C', ['d'])
+        self.assertSameAnalysis(analyzer, fresh(GRAMMAR))
+
+    def test_duplicate_production_rejected(self):
+        analyzer = fresh(GRAMMAR)
+        with self.assertRaises(ValueError):
+            analyzer.add_production('C', ['c'])
+        with self.assertRaises(ValueError):
+            analyzer.replace_production('C', ['c'], ['c', 'C'])
+        self.assertEqual(analyzer.original_grammar['C'], fresh(GRAMMAR).original_grammar['C'])
+
+if __name__ == '__main__':
+    unittest.main()
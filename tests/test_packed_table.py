@@ -0,0 +1,45 @@
+# tests/test_packed_table.py
+import unittest
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.predictive_parser import PredictiveParser
+
+GRAMMAR = {
+    'S': [['A', 'B']],
+    'A': [['a', 'A'], ['ε']],
+    'B': [['b', 'B'], ['c'], ['ε']],
+}
+INPUTS = ['', 'a', 'aab', 'abbc', 'ba', 'aac', 'cb', 'x', 'aaabbbc']
+
+def parsers():
+    analyzer = GrammarAnalyzer(GRAMMAR)
+    analyzer.run_full_analysis()
+    args = (analyzer.parsing_table, analyzer.final_grammar.keys(), analyzer.start_symbol)
+    return PredictiveParser(*args), PredictiveParser(*args, packed=True)
+
+class PackedTableTest(unittest.TestCase):
+    def test_parses_like_dense_table(self):
+        dense, packed = parsers()
+        self.assertIsNotNone(packed.compiled.packed)
+        for text in INPUTS:
+            self.assertEqual(packed.recognize(text), dense.recognize(text), text)
+            self.assertEqual(packed.error_position, dense.error_position, text)
+            self.assertEqual(packed.parse(text, trace=False), dense.parse(text, trace=False), text)
+            self.assertEqual(packed.flat_tree.to_preorder(), dense.flat_tree.to_preorder(), text)
+
+    def test_pack_existing_table(self):
+        dense, _ = parsers()
+        cells = list(dense.compiled.table)
+        packed = dense.compiled.pack()
+        self.assertEqual(list(dense.compiled.table), cells)
+        self.assertIs(dense.compiled.pack(), packed)
+
+    def test_rows_give_default_and_explicit_cells(self):
+        dense, packed = parsers()
+        compiled = dense.compiled
+        for nt_id, default, explicit in packed.compiled.packed.rows():
+            self.assertLessEqual(len(explicit), compiled.width)
+            for terminal_id in range(compiled.width):
+                self.assertEqual(explicit.get(terminal_id, default), compiled.lookup(nt_id, terminal_id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+# tests/test_recovery.py
+import unittest
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.predictive_parser import PredictiveParser
+
+def recovering_parser(grammar):
+    analyzer = GrammarAnalyzer(grammar)
+    analyzer.run_full_analysis()
+    return PredictiveParser(analyzer.parsing_table, analyzer.final_grammar.keys(),
+                            analyzer.start_symbol, follow_sets=analyzer.follow_sets)
+
+class LeftoverInputTest(unittest.TestCase):
+    # S is nullable and 'b' is in FOLLOW(S): leftover 'b' must not restart S
+    def setUp(self):
+        self.parser = recovering_parser({'S': [['a', 'S', 'b'], ['ε']]})
+
+    def test_leftover_follow_token_terminates(self):
+        self.assertFalse(self.parser.parse_recovering('b'))
+        self.assertEqual([e.position for e in self.parser.errors], [0])
+
+    def test_leftover_then_restart(self):
+        self.assertFalse(self.parser.parse_recovering('bab'))
+        self.assertEqual(len(self.parser.errors), 1)
+        self.assertFalse(self.parser.parse_recovering('abbbb'))
+        self.assertEqual(self.parser.errors[0].position, 2)
+
+    def test_accepts(self):
+        for text in ('', 'ab', 'aabb'):
+            self.assertTrue(self.parser.parse_recovering(text), text)
+
+if __name__ == '__main__':
+    unittest.main()
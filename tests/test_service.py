@@ -0,0 +1,115 @@
+# tests/test_service.py
+# A ParseServer and ParseClients over a Unix socket in a temporary directory
+import asyncio
+import os
+import tempfile
+import unittest
+from service.client import ParseClient
+from service.protocol import ServiceError, TIMEOUT, UNKNOWN_GRAMMAR
+from service.server import ParseServer
+
+GRAMMAR = {
+    'grammar': {
+        'S': [['A', 'b', 'C']],
+        'A': [['a', 'b', 'A'], ['a', 'b']],
+        'C': [['c'], ['c', 'C']],
+    },
+}
+
+class CountingServer(ParseServer):
+    # Records how many requests are being handled at once
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = self.most_in_flight = 0
+
+    async def _dispatch(self, request, running):
+        self.in_flight += 1
+        self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        try:
+            return await super()._dispatch(request, running)
+        finally:
+            self.in_flight -= 1
+
+class ServiceTest(unittest.TestCase):
+    def serve(self, test, **options):
+        # Runs test(server, client) against a fresh server
+        async def run():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'parse.sock')
+                server = CountingServer(cache=False, **options)
+                await server.start_unix(path)
+                try:
+                    async with await ParseClient.unix(path) as client:
+                        await test(server, client)
+                finally:
+                    await server.close()
+        asyncio.run(run())
+
+    def test_register_and_parse(self):
+        async def test(server, client):
+            key = await client.register('sample', GRAMMAR)
+            self.assertTrue(key)
+            result = await client.parse('sample', 'ababbcc')
+            self.assertTrue(result['accepted'])
+            result = await client.parse('sample', 'abba')
+            self.assertFalse(result['accepted'])
+            self.assertEqual(result['error_position'], 3)
+            result = await client.parse('sample', 'abbc', tree=True)
+            self.assertEqual(result['tree'][0], ['S', False, 3])
+            # Inline grammars work without registering
+            self.assertTrue((await client.parse(GRAMMAR, 'abbc'))['accepted'])
+            with self.assertRaises(ServiceError) as caught:
+                await client.parse('missing', 'abbc')
+            self.assertEqual(caught.exception.code, UNKNOWN_GRAMMAR)
+        self.serve(test)
+
+    def test_timeout(self):
+        async def test(server, client):
+            await client.register('sample', GRAMMAR)
+            with self.assertRaises(ServiceError) as caught:
+                await client.parse('sample', 'ab' * 300000 + 'bc', tree=True, timeout=0.001)
+            self.assertEqual(caught.exception.code, TIMEOUT)
+            self.assertEqual((await client.stats())['timeouts'], 1)
+            # The connection keeps working after a timeout
+            self.assertTrue((await client.parse('sample', 'abbc'))['accepted'])
+        self.serve(test)
+
+    def test_backpressure(self):
+        async def test(server, client):
+            await client.register('sample', GRAMMAR)
+            texts = ['ab' * n + 'bc' for n in range(1, 41)]
+            results = await asyncio.gather(*(client.parse('sample', text) for text in texts))
+            self.assertTrue(all(result['accepted'] for result in results))
+            self.assertLessEqual(server.most_in_flight, 2)
+            self.assertEqual((await client.stats())['requests'], len(texts) + 2)
+        self.serve(test, workers=1, max_in_flight=2)
+
+class SocketPathTest(unittest.TestCase):
+    def test_refuses_to_replace_other_files(self):
+        async def run(path):
+            server = ParseServer(cache=False)
+            try:
+                await server.start_unix(path)
+            finally:
+                await server.close()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'parse.sock')
+            with open(path, 'w') as f:
+                f.write('keep me')
+            with self.assertRaises(FileExistsError):
+                asyncio.run(run(path))
+            with open(path) as f:
+                self.assertEqual(f.read(), 'keep me')
+
+    def test_replaces_a_stale_socket(self):
+        async def run(path):
+            for _ in range(2):  # the second start finds the first one's socket
+                server = ParseServer(cache=False)
+                await server.start_unix(path)
+                await server.close()
+                self.assertTrue(os.path.exists(path))
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(os.path.join(directory, 'parse.sock')))
+
+if __name__ == '__main__':
+    unittest.main()
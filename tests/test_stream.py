@@ -0,0 +1,41 @@
+# tests/test_stream.py
+import io
+import unittest
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.predictive_parser import PredictiveParser
+
+GRAMMAR = {
+    'S': [['A', 'b', 'C']],
+    'A': [['a', 'b', 'A'], ['a', 'b']],
+    'C': [['c'], ['c', 'C']],
+}
+LEXER_RULES = [('a', r'a'), ('b', r'b'), ('c', r'c'), (None, r'\s+')]
+
+class StreamErrorTest(unittest.TestCase):
+    def setUp(self):
+        analyzer = GrammarAnalyzer(GRAMMAR)
+        analyzer.run_full_analysis()
+        self.parser = PredictiveParser(analyzer.parsing_table, analyzer.final_grammar.keys(),
+                                       analyzer.start_symbol, LEXER_RULES)
+
+    def recognized(self, text):
+        return self.parser.recognize(text), self.parser.error_position
+
+    def streamed(self, source, chunk_size):
+        return self.parser.parse_stream(source, chunk_size=chunk_size), self.parser.error_position
+
+    def test_early_end_is_reported_at_the_source_end(self):
+        # Ends inside skipped text, or with nothing but skipped text
+        for text, position in (('a\n', 2), (' \n\n\n', 4), ('ab ', 3), ('', 0)):
+            self.assertEqual(self.recognized(text), (False, position), repr(text))
+            for chunk_size in (1, 2, 1024):
+                self.assertEqual(self.streamed(text, chunk_size), (False, position), repr(text))
+                self.assertEqual(self.streamed(io.StringIO(text), chunk_size), (False, position), repr(text))
+
+    def test_matches_recognize(self):
+        for text in ('abbc', 'ab ab b cc', 'abx', 'a b c', 'abbcc  ', 'abbcb'):
+            for chunk_size in (1, 3, 1024):
+                self.assertEqual(self.streamed(text, chunk_size), self.recognized(text), repr(text))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# tests/test_tree_layout.py
+import unittest
+from grammar.analyzer import GrammarAnalyzer
+from syntax_parser.predictive_parser import PredictiveParser
+from syntax_parser.trace import TraceTreeBuilder
+from ui.layout import TreeLayout
+
+GRAMMAR = {
+    'S': [['A', 'B', 'C']],
+    'A': [['a', 'b', 'A'], ['a', 'b']],
+    'B': [['b'], ['B', 'C']],
+    'C': [['c'], ['c', 'C']],
+}
+REWRITES = {'S': [['A', 'b', 'C']]}
+INPUTS = ['abc', 'ababbcc', 'abababbccc', 'abbx']
+
+class IncrementalLayoutTest(unittest.TestCase):
+    def setUp(self):
+        analyzer = GrammarAnalyzer(GRAMMAR, REWRITES)
+        analyzer.run_full_analysis()
+        self.parser = PredictiveParser(analyzer.parsing_table, analyzer.final_grammar.keys(),
+                                       analyzer.start_symbol)
+
+    def assertSameLayout(self, layout, root):
+        fresh = TreeLayout().layout(root)
+        self.assertEqual(layout.nodes, fresh.nodes)
+        for node in fresh.nodes:
+            self.assertEqual(layout.position(node), fresh.position(node))
+
+    def replay(self, text, batch):
+        # Feeds the trace to the layout `batch` steps at a time, as the UI does per frame
+        self.parser.parse(text)
+        trace = self.parser.trace
+        builder = TraceTreeBuilder(self.parser.compiled, self.parser.start_symbol)
+        layout = TreeLayout().layout(builder.root)
+        for upto in range(batch, len(trace.actions) + batch, batch):
+            layout.update_batch(builder.advance(trace, min(upto, len(trace.actions))))
+            self.assertSameLayout(layout, builder.root)
+
+    def test_batches_match_full_layout(self):
+        for text in INPUTS:
+            for batch in (1, 2, 3, 5, 8, 100):
+                with self.subTest(text=text, batch=batch):
+                    self.replay(text, batch)
+
+    def test_later_sibling_in_same_batch(self):
+        # S expanded first, then the rest together: C lies right of A's subtree
+        self.parser.parse('abbc')
+        trace = self.parser.trace
+        builder = TraceTreeBuilder(self.parser.compiled, self.parser.start_symbol)
+        layout = TreeLayout().layout(builder.root)
+        self.assertEqual([node.value for node in builder.advance(trace, 1)], ['S'])
+        layout.update_batch([builder.root])
+        expanded = builder.advance(trace, len(trace.actions))
+        self.assertEqual([node.value for node in expanded], ['A', "A'", 'C', "C'"])
+        layout.update_batch(expanded)
+        self.assertSameLayout(layout, builder.root)
+
+if __name__ == '__main__':
+    unittest.main()
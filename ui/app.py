@@ -1,12 +1,37 @@
+import queue
+import threading
+import os
 import tkinter as tk
-from tkinter import ttk, font
+from tkinter import ttk, font, filedialog
+from syntax_parser import incremental
+from syntax_parser.packed_table import PackedTable, memory_report
+from syntax_parser.tree_io import save_tree, load_tree
+from syntax_parser.trace import TraceTreeBuilder
+from ui.steps_view import VirtualStepsView
 from ui.tree_canvas import ParseTreeCanvas
 
+FRAME_MS = 33          # UI refresh period while a parse is running (~30 fps)
+TYPING_DELAY_MS = 150  # pause in typing after which the input is reparsed
+TREE_FILETYPES = [("Parse tree", "*.ll1t"), ("JSON lines", "*.jsonl"), ("All files", "*")]
+
+class ParseJob:
+    """State shared between the UI and one background parse."""
+    def __init__(self, text):
+        self.text = text
+        self.cancelled = threading.Event()
+        self.thread = None
+        self.finished = False
+        self.result = None
+        self.error = None
+
 class ParserApp(tk.Tk):
     def __init__(self, parser, analyzer):
         super().__init__()
         self.parser = parser
         self.analyzer = analyzer
+        self.job = None
+        self.live = None       # IncrementalParse of the text as last typed
+        self.live_timer = None
         
         self.title("LL(1) Parser Generator & Analyzer")
         self.geometry("1200x800")
@@ -69,7 +94,6 @@ class ParserApp(tk.Tk):
         return '\n'.join(lines)
 
     def _create_transform_widgets(self, parent):
-        # This function remains unchanged
         orig_frame = ttk.LabelFrame(parent, text=" 1. Original Grammar ", style='Card.TLabelframe')
         orig_frame.pack(fill='x', pady=10, padx=10, anchor='n')
         tk.Label(orig_frame, text=self._format_grammar(self.analyzer.original_grammar), justify='left', font=self.fonts['code'], bg=self.colors['card'], fg=self.colors['text_secondary']).pack(anchor='w', padx=5, pady=5)
@@ -83,7 +107,6 @@ class ParserApp(tk.Tk):
         tk.Label(final_frame, text=self._format_grammar(self.analyzer.final_grammar), justify='left', font=self.fonts['code'], bg=self.colors['card'], fg=self.colors['text_secondary']).pack(anchor='w', padx=5, pady=5)
 
     def _create_table_widgets(self, parent):
-        # This function remains unchanged
         sets_frame = ttk.Frame(parent, style='App.TFrame')
         sets_frame.pack(fill='x', pady=10, padx=10)
         first_frame = ttk.LabelFrame(sets_frame, text=" FIRST Sets ", style='Card.TLabelframe')
@@ -95,19 +118,28 @@ class ParserApp(tk.Tk):
         follow_text = '\n'.join([f"{nt.ljust(3)}: {{ {', '.join(sorted(list(s)))} }}" for nt, s in self.analyzer.follow_sets.items()])
         tk.Label(follow_frame, text=follow_text, justify='left', font=self.fonts['code'], bg=self.colors['card'], fg=self.colors['text_secondary']).pack(anchor='w', padx=5, pady=5)
         
-        table_frame = ttk.LabelFrame(parent, text=" Predictive Parsing Table ", style='Card.TLabelframe')
+        # Rows come from the packed table: a default per row plus its explicit cells
+        compiled = self.parser.compiled
+        packed = compiled.packed or PackedTable.from_parsing_table(self.analyzer.parsing_table, compiled)
+        report = memory_report(packed, self.analyzer.parsing_table)
+        title = (f" Predictive Parsing Table ({report['cells']} cells, packed {report['packed_bytes']:,} B"
+                 f" vs dict {report['dict_bytes']:,} B) ")
+        table_frame = ttk.LabelFrame(parent, text=title, style='Card.TLabelframe')
         table_frame.pack(fill='both', expand=True, pady=10, padx=10)
         terminals = sorted(list(self.parser.terminals)) + ['$']
+        column_of = {compiled.symbol_ids[t]: i for i, t in enumerate(terminals, 1)}
         columns = ["Non-Terminal"] + terminals
         table_tree = ttk.Treeview(table_frame, columns=columns, show="headings")
         for col in columns:
             table_tree.heading(col, text=col); table_tree.column(col, anchor='center', width=120, stretch=False)
+        rows = {nt_id: (default, explicit) for nt_id, default, explicit in packed.rows()}
+        texts = compiled.production_text
         for nt in sorted(self.analyzer.final_grammar.keys()):
-            row_data = [nt]
-            for t in terminals:
-                prod = self.analyzer.parsing_table.get((nt, t))
-                if prod: row_data.append(f"{nt} → {''.join(prod)}")
-                else: row_data.append("")
+            default, explicit = rows[compiled.symbol_ids[nt]]
+            row_data = [nt] + [texts[default] if default >= 0 else ""] * len(terminals)
+            for terminal_id, prod_id in explicit.items():
+                if terminal_id in column_of:
+                    row_data[column_of[terminal_id]] = texts[prod_id] if prod_id >= 0 else ""
             table_tree.insert("", "end", values=row_data)
         table_tree.pack(fill='both', expand=True)
 
@@ -118,8 +150,14 @@ class ParserApp(tk.Tk):
         tk.Label(top_frame, text="Input String:", font=self.fonts['body'], bg=self.colors['card'], fg=self.colors['text']).pack(side='left', padx=(0, 8))
         self.input_entry = tk.Entry(top_frame, font=self.fonts['body'], width=40, bg=self.colors['background'], fg=self.colors['text'], insertbackground=self.colors['text'], relief=tk.FLAT)
         self.input_entry.pack(side='left', padx=(0, 8), expand=True, fill='x')
+        self.input_entry.bind('<KeyRelease>', lambda event: self._schedule_live_parse())
         self.parse_btn = tk.Button(top_frame, text="Parse", font=self.fonts['body'], command=self.on_parse, bg=self.colors['primary'], fg=self.colors['text'], activebackground=self.colors['accent'], activeforeground=self.colors['background'], relief=tk.FLAT, padx=10)
         self.parse_btn.pack(side='left')
+        self.cancel_btn = tk.Button(top_frame, text="Cancel", font=self.fonts['body'], command=self.on_cancel, bg=self.colors['border'], fg=self.colors['text'], activebackground=self.colors['error'], activeforeground=self.colors['text'], relief=tk.FLAT, padx=10, state='disabled')
+        self.cancel_btn.pack(side='left', padx=(8, 0))
+        tree_button_opts = dict(font=self.fonts['body'], bg=self.colors['border'], fg=self.colors['text'], activebackground=self.colors['accent'], relief=tk.FLAT, padx=10)
+        tk.Button(top_frame, text="Save Tree…", command=self.on_save_tree, **tree_button_opts).pack(side='left', padx=(8, 0))
+        tk.Button(top_frame, text="Open Tree…", command=self.on_open_tree, **tree_button_opts).pack(side='left', padx=(8, 0))
         
         self.result_label = tk.Label(parent, text="", font=self.fonts['subheading'], bg=self.colors['card'], fg=self.colors['text'])
         self.result_label.pack(pady=5, padx=10, fill='x')
@@ -128,11 +166,9 @@ class ParserApp(tk.Tk):
         content_pane.pack(fill='both', expand=True, pady=(5,10), padx=10)
 
         steps_frame = ttk.LabelFrame(content_pane, text=" Parsing Steps ", style='Card.TLabelframe')
-        columns = ("Step", "Stack", "Input", "Action")
-        self.steps_tree = ttk.Treeview(steps_frame, columns=columns, show="headings")
-        self.steps_tree.pack(fill='both', expand=True)
-        for col in columns: self.steps_tree.heading(col, text=col)
-        self.steps_tree.column("Step", width=50, stretch=False); self.steps_tree.column("Stack", width=150); self.steps_tree.column("Input", width=150); self.steps_tree.column("Action", width=300)
+        self._create_steps_toolbar(steps_frame)
+        self.steps_view = VirtualStepsView(steps_frame)
+        self.steps_view.pack(fill='both', expand=True)
         content_pane.add(steps_frame, weight=3)
 
         tree_view_frame = ttk.LabelFrame(content_pane, text=" Parse Tree ", style='Card.TLabelframe')
@@ -140,8 +176,118 @@ class ParserApp(tk.Tk):
         self.tree_canvas.pack(fill='both', expand=True)
         content_pane.add(tree_view_frame, weight=2)
 
+    def _create_steps_toolbar(self, parent):
+        bar = ttk.Frame(parent)
+        bar.pack(fill='x', pady=(0, 4))
+        entry_opts = dict(font=self.fonts['body'], bg=self.colors['background'], fg=self.colors['text'], insertbackground=self.colors['text'], relief=tk.FLAT)
+        button_opts = dict(font=self.fonts['body'], bg=self.colors['border'], fg=self.colors['text'], activebackground=self.colors['accent'], relief=tk.FLAT, padx=6)
+
+        tk.Label(bar, text="Step:", font=self.fonts['body'], bg=self.colors['background'], fg=self.colors['text']).pack(side='left')
+        self.step_entry = tk.Entry(bar, width=8, **entry_opts)
+        self.step_entry.pack(side='left', padx=(4, 4))
+        self.step_entry.bind('<Return>', lambda event: self.on_jump_to_step())
+        tk.Button(bar, text="Go", command=self.on_jump_to_step, **button_opts).pack(side='left')
+        tk.Button(bar, text="First Error", command=self.on_first_error, **button_opts).pack(side='left', padx=(8, 0))
+
+        tk.Button(bar, text="Find Next", command=self.on_search, **button_opts).pack(side='right')
+        self.search_entry = tk.Entry(bar, width=18, **entry_opts)
+        self.search_entry.pack(side='right', padx=(4, 4))
+        self.search_entry.bind('<Return>', lambda event: self.on_search())
+        tk.Label(bar, text="Find:", font=self.fonts['body'], bg=self.colors['background'], fg=self.colors['text']).pack(side='right')
+
+    def on_jump_to_step(self):
+        try:
+            step = int(self.step_entry.get())
+        except ValueError:
+            return
+        self.steps_view.jump_to_step(step)
+
+    def on_first_error(self):
+        if not self.steps_view.jump_to_first_error():
+            self.bell()
+
+    def on_search(self):
+        if not self.steps_view.search(self.search_entry.get()):
+            self.bell()
+
+    def _schedule_live_parse(self):
+        if self.live_timer is not None:
+            self.after_cancel(self.live_timer)
+        self.live_timer = self.after(TYPING_DELAY_MS, self.on_live_parse)
+
+    def on_live_parse(self):
+        # While typing, only the edited part of the input is reparsed (see
+        # syntax_parser/incremental.py). The step table needs a full traced
+        # parse, so it is cleared until Parse is pressed.
+        self.live_timer = None
+        text = self.input_entry.get().strip()
+        previous = self.live
+        if previous is not None and previous.text == text:
+            return
+        self.on_cancel(wait=True)
+        self.job = None  # keeps the cancelled parse from drawing over the live result
+        self.cancel_btn.config(state='disabled')
+        self.steps_view.set_source(None)
+        if not text:
+            self.live = None
+            self.tree_canvas.set_tree(None)
+            self.result_label.config(text="")
+            return
+
+        edit = incremental.edit_between(previous.text, text) if previous is not None else None
+        if edit is None:
+            self.live = incremental.parse(self.parser, text)
+        else:
+            self.live = incremental.reparse(self.parser, previous, *edit)
+        if self.tree_canvas.tree_root is self.live.tree:
+            self.tree_canvas.nodes_expanded(self.live.changed)
+        else:
+            self.tree_canvas.set_tree(self.live.tree)
+        if self.live.accepted: self.result_label.config(text="✓ Accepted", fg=self.colors['success'])
+        else: self.result_label.config(text=f"✗ Rejected: {self.live.error_message}", fg=self.colors['error'])
+
+    def on_save_tree(self):
+        tree = self.tree_canvas.tree_root
+        if tree is None or self.job is not None:
+            self.bell()
+            return
+        path = filedialog.asksaveasfilename(parent=self, defaultextension='.ll1t', filetypes=TREE_FILETYPES)
+        if not path:
+            return
+        try:
+            save_tree(path, tree)
+        except OSError as e:
+            self.result_label.config(text=f"✗ Could not save the tree: {e}", fg=self.colors['error'])
+            return
+        self.result_label.config(text=f"Tree saved to {os.path.basename(path)}", fg=self.colors['text_secondary'])
+
+    def on_open_tree(self):
+        path = filedialog.askopenfilename(parent=self, filetypes=TREE_FILETYPES)
+        if path:
+            self.open_tree(path)
+
+    def open_tree(self, path):
+        """Shows a tree saved with Save Tree or syntax_parser.tree_io, without reparsing."""
+        self.on_cancel(wait=True)
+        try:
+            root = load_tree(path)
+        except (OSError, ValueError) as e:
+            self.result_label.config(text=f"✗ Could not open the tree: {e}", fg=self.colors['error'])
+            return
+        self.job = None  # a cancelled parse stops drawing once it is no longer current
+        self.cancel_btn.config(state='disabled')
+        self.live = None
+        self.steps_view.set_source(None)
+        self.tree_canvas.set_tree(root)
+        self.result_label.config(text=f"Tree from {os.path.basename(path)}", fg=self.colors['text_secondary'])
+
     def on_parse(self):
-        self.steps_tree.delete(*self.steps_tree.get_children())
+        if self.live_timer is not None:
+            # A pending live parse would cancel this one when it fires
+            self.after_cancel(self.live_timer)
+            self.live_timer = None
+        self.on_cancel(wait=True)
+        self.steps_view.set_source(None)
         self.result_label.config(text="")
         self.tree_canvas.set_tree(None)
         
@@ -150,11 +296,74 @@ class ParserApp(tk.Tk):
             self.result_label.config(text="Please enter a string to parse.", fg=self.colors['error'])
             return
 
-        def step_callback(step, stack, input_val, action):
-            self.steps_tree.insert("", "end", values=(step, stack, input_val, action))
-            self.steps_tree.yview_moveto(1)
-        
-        result = self.parser.parse(input_str, step_callback=step_callback, tree_callback=self.tree_canvas.set_tree)
-        
-        if result: self.result_label.config(text="✓ Accepted", fg=self.colors['success'])
+        # The parse runs on a worker thread and reports through a queue; the
+        # UI drains it once per frame, so rows and the tree are batched.
+        job = self.job = ParseJob(input_str)
+        self.events = queue.Queue()
+        self.trace = None
+        self.tree_builder = TraceTreeBuilder(self.parser.compiled, self.parser.start_symbol)
+        self.tree_canvas.set_tree(self.tree_builder.root)
+        job.thread = threading.Thread(target=self._parse_worker, args=(job,), daemon=True)
+        self.cancel_btn.config(state='normal')
+        self.result_label.config(text="Parsing…", fg=self.colors['text_secondary'])
+        job.thread.start()
+        self.after(FRAME_MS, self._drain_events, job)
+
+    def on_cancel(self, wait=False):
+        job = getattr(self, 'job', None)
+        if job is None:
+            return
+        job.cancelled.set()
+        if wait and job.thread is not None:
+            job.thread.join()
+
+    def _parse_worker(self, job):
+        # Runs off the Tk thread: never touch widgets here, only the queue.
+        def progress(trace):
+            self.events.put(('progress', job, trace))
+            return job.cancelled.is_set()
+
+        try:
+            result = self.parser.parse(job.text, progress=progress)
+        except Exception as e:
+            # Still end the job, or the UI would wait for it forever
+            self.events.put(('error', job, f"{type(e).__name__}: {e}"))
+            return
+        self.events.put(('done', job, (self.parser.trace, result)))
+
+    def _drain_events(self, job):
+        if job is not self.job:
+            return  # a newer parse took over
+        while True:
+            try:
+                kind, event_job, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event_job is not job:
+                continue
+            if kind == 'progress':
+                self.trace = payload
+            elif kind == 'error':
+                job.error = payload
+                job.finished = True
+            else:
+                self.trace, job.result = payload
+                job.finished = True
+
+        if self.trace is not None:
+            # Only steps fully recorded before this frame are shown
+            upto = self.trace.published()
+            if self.steps_view.trace is not self.trace:
+                self.steps_view.set_source(self.trace)
+            self.steps_view.set_count(upto)
+            self.tree_canvas.nodes_expanded(self.tree_builder.advance(self.trace, upto))
+
+        if not job.finished:
+            self.after(FRAME_MS, self._drain_events, job)
+            return
+        self.cancel_btn.config(state='disabled')
+        self.job = None
+        if job.error is not None: self.result_label.config(text=f"⚠ Parse failed: {job.error}", fg=self.colors['error'])
+        elif job.result is None: self.result_label.config(text="Parse cancelled", fg=self.colors['text_secondary'])
+        elif job.result: self.result_label.config(text="✓ Accepted", fg=self.colors['success'])
         else: self.result_label.config(text="✗ Rejected", fg=self.colors['error'])
@@ -0,0 +1,162 @@
+# ui/layout.py
+# Tree layout kept free of Tk so it can run headless (benchmarks, tests).
+import math
+from bisect import bisect_left, bisect_right
+
+class TreeLayout:
+    def __init__(self, level_height=80, node_spacing=60):
+        """
+        Non-recursive layout for TreeNode trees. Leaves sit on consecutive
+        slots from left to right and every parent is centered over its first
+        and last child, as the canvas has always drawn them.
+
+        Positions live here, not on the nodes: `nodes` is the preorder list
+        and x[i], y[i] belong to nodes[i]; `index` maps a node to i.
+        """
+        self.level_height = level_height
+        self.node_spacing = node_spacing
+        self.root = None
+        self.nodes = []
+        self.index = {}
+        self.x = []
+        self.y = []
+        self.depth = []
+        self.leaf_before = []  # leaves to the left of nodes[i], for restarts
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def position(self, node):
+        i = self.index[node]
+        return self.x[i], self.y[i]
+
+    def layout(self, root):
+        """Full layout of the tree under root, in O(n)."""
+        self.root = root
+        self.nodes = []
+        self.depth = []
+        if root is not None:
+            self._collect(root, 0, self.nodes, self.depth)
+        size = len(self.nodes)
+        self.x = [0.0] * size
+        self.y = [d * self.level_height for d in self.depth]
+        self.leaf_before = [0] * size
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self._place(0, 0)
+        return self
+
+    def update(self, node):
+        """
+        Incremental relayout after the children of node, or of nodes after
+        it in preorder, changed (e.g. the parser just expanded them). Only
+        the preorder suffix from node onward is re-collected and re-placed,
+        plus node's ancestors, so expansions near the right edge of the
+        tree cost little more than the depth of the tree.
+        """
+        start = self.index.get(node)
+        if start is None:
+            return self.layout(self.root)
+        leaves = self.leaf_before[start]
+
+        # Replace the preorder list from node onward: node's subtree, then
+        # the subtrees of the later siblings of node and of its ancestors
+        new_nodes, new_depth = [], []
+        self._collect(node, self.depth[start], new_nodes, new_depth)
+        child, depth = node, self.depth[start]
+        while child.parent is not None:
+            siblings = child.parent.children
+            for sibling in siblings[siblings.index(child) + 1:]:
+                self._collect(sibling, depth, new_nodes, new_depth)
+            child, depth = child.parent, depth - 1
+        for removed in self.nodes[start:]:
+            del self.index[removed]
+        self.nodes[start:] = new_nodes
+        self.depth[start:] = new_depth
+        self.y[start:] = [d * self.level_height for d in new_depth]
+        self.x[start:] = [0.0] * len(new_nodes)
+        self.leaf_before[start:] = [0] * len(new_nodes)
+        for i in range(start, len(self.nodes)):
+            self.index[self.nodes[i]] = i
+
+        self._place(start, leaves)
+
+        # Ancestors precede node in preorder, so _place did not touch them
+        index, x = self.index, self.x
+        parent = node.parent
+        while parent is not None:
+            children = parent.children
+            x[index[parent]] = (x[index[children[0]]] + x[index[children[-1]]]) / 2
+            parent = parent.parent
+        return self
+
+    def update_batch(self, nodes, full_above=16):
+        """
+        Relayout after all of `nodes` were expanded: one update() from the
+        leftmost of them, since nodes created in the same batch are not laid
+        out yet but follow it in preorder. Past `full_above` nodes one full
+        layout pass is cheaper.
+        """
+        index = self.index
+        known = [index[node] for node in nodes if node in index]
+        if len(nodes) > full_above or not known:
+            return self.layout(self.root)
+        return self.update(self.nodes[min(known)])
+
+    def _collect(self, root, base_depth, nodes, depths):
+        # Iterative preorder walk
+        pending = [(root, base_depth)]
+        while pending:
+            node, depth = pending.pop()
+            nodes.append(node)
+            depths.append(depth)
+            for child in reversed(node.children):
+                pending.append((child, depth + 1))
+
+    def _place(self, start, leaves):
+        # Forward pass: leaves take the next slot. Backward pass: parents
+        # are centered over children, which follow them in preorder.
+        nodes, x, index = self.nodes, self.x, self.index
+        spacing = self.node_spacing
+        for i in range(start, len(nodes)):
+            self.leaf_before[i] = leaves
+            if not nodes[i].children:
+                x[i] = leaves * spacing
+                leaves += 1
+        for i in range(len(nodes) - 1, start - 1, -1):
+            children = nodes[i].children
+            if children:
+                x[i] = (x[index[children[0]]] + x[index[children[-1]]]) / 2
+
+    def bounds(self):
+        """(min_x, min_y, max_x, max_y) of all node centers."""
+        if not self.nodes:
+            return (0, 0, 0, 0)
+        return (min(self.x), 0, max(self.x), max(self.y))
+
+class LevelIndex:
+    def __init__(self, layout):
+        """
+        Spatial index over a TreeLayout. Nodes are bucketed by level, and
+        within a level preorder is also left-to-right order, so each bucket
+        is already sorted by x and a rectangle query is one bisect per level.
+        """
+        self.level_height = layout.level_height
+        self.levels = []  # per depth: (xs, node positions in the layout)
+        for i, depth in enumerate(layout.depth):
+            while len(self.levels) <= depth:
+                self.levels.append(([], []))
+            xs, ids = self.levels[depth]
+            xs.append(layout.x[i])
+            ids.append(i)
+
+    def query(self, x0, y0, x1, y1):
+        """Layout positions of the nodes whose centers lie in the rectangle."""
+        if not self.levels or self.level_height <= 0:
+            return []
+        first = max(0, math.ceil(y0 / self.level_height))
+        last = min(len(self.levels) - 1, math.floor(y1 / self.level_height))
+        found = []
+        for depth in range(first, last + 1):
+            xs, ids = self.levels[depth]
+            found.extend(ids[bisect_left(xs, x0):bisect_right(xs, x1)])
+        return found
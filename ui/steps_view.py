@@ -0,0 +1,151 @@
+from tkinter import ttk
+
+COLUMNS = ("Step", "Stack", "Input", "Action")
+CELL_LIMIT = 200  # symbols/characters shown per Stack and Input cell
+
+class VirtualStepsView(ttk.Frame):
+    def __init__(self, parent, **kwargs):
+        """
+        Parsing steps table that only has Treeview items for the rows on
+        screen. Row values are pulled from a ParseTrace (trace.row(i)) as
+        the view scrolls, so a trace of millions of steps costs no more
+        widgets or strings than a screenful of them.
+        """
+        super().__init__(parent, **kwargs)
+        self.trace = None
+        self.count = 0       # rows available (grows while a parse runs)
+        self.top = 0         # index of the first row on screen
+        self.selected = None
+        self.follow = True   # keep the last row in view as rows arrive
+
+        self.tree = ttk.Treeview(self, columns=COLUMNS, show="headings", selectmode='none')
+        for col in COLUMNS: self.tree.heading(col, text=col)
+        self.tree.column("Step", width=50, stretch=False); self.tree.column("Stack", width=150); self.tree.column("Input", width=150); self.tree.column("Action", width=300)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self._on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.tree.tag_configure('selected', background='#5e81ac')
+
+        self.tree.bind('<Configure>', lambda event: self.refresh())
+        self.tree.bind('<MouseWheel>', self._on_wheel)
+        self.tree.bind('<Button-4>', self._on_wheel)
+        self.tree.bind('<Button-5>', self._on_wheel)
+        self.tree.bind('<Button-1>', self._on_click)
+        for key, delta in (('<Up>', -1), ('<Down>', 1), ('<Prior>', 'page_up'), ('<Next>', 'page_down')):
+            self.tree.bind(key, lambda event, d=delta: self._on_key(d))
+
+    def set_source(self, trace, count=0):
+        self.trace = trace
+        self.top = 0
+        self.selected = None
+        self.follow = True
+        self.set_count(count)
+
+    def set_count(self, count):
+        """Makes the first `count` trace steps visible to the view."""
+        self.count = count
+        if self.follow:
+            self.top = max(0, count - self.visible_rows())
+        self.refresh()
+
+    def visible_rows(self):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        header = 25
+        return max(1, (self.tree.winfo_height() - header) // row_height)
+
+    def scroll_to(self, top):
+        rows = self.visible_rows()
+        self.top = max(0, min(top, self.count - rows))
+        self.follow = self.top + rows >= self.count
+        self.refresh()
+
+    def refresh(self):
+        rows = self.visible_rows()
+        items = self.tree.get_children()
+        wanted = min(rows, max(0, self.count - self.top))
+        # Keep a pool of exactly `wanted` items and overwrite their values
+        for item in items[wanted:]:
+            self.tree.delete(item)
+        for _ in range(len(items), wanted):
+            self.tree.insert("", "end", values=())
+        for offset, item in enumerate(self.tree.get_children()):
+            step = self.top + offset
+            tags = ('selected',) if step == self.selected else ()
+            self.tree.item(item, values=self.trace.row(step, CELL_LIMIT), tags=tags)
+
+        if self.count:
+            self.scrollbar.set(self.top / self.count, min(1.0, (self.top + wanted) / self.count))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def jump_to_step(self, step):
+        """Selects 1-based step `step` and scrolls it to the middle of the view."""
+        if not self.count:
+            return False
+        index = max(0, min(step - 1, self.count - 1))
+        self.selected = index
+        self.scroll_to(index - self.visible_rows() // 2)
+        return True
+
+    def jump_to_first_error(self):
+        # A parse stops at its first error, so it can only be the last step
+        if self.trace is None:
+            return False
+        error = self.trace.error_step
+        if error is None or error >= self.count:
+            return False
+        return self.jump_to_step(error + 1)
+
+    def search(self, text, forward=True):
+        """
+        Finds the next (or previous) step whose action text contains `text`,
+        starting after the selected step, and jumps to it.
+        """
+        if not text or self.trace is None or not self.count:
+            return False
+        start = self.selected if self.selected is not None else (-1 if forward else self.count)
+        indices = range(start + 1, self.count) if forward else range(start - 1, -1, -1)
+        for i in indices:
+            if text in self.trace.action_text(i):
+                return self.jump_to_step(i + 1)
+        return False
+
+    def _on_scrollbar(self, *args):
+        rows = self.visible_rows()
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * self.count))
+        elif args[0] == 'scroll':
+            amount = int(args[1]) * (rows if args[2] == 'pages' else 1)
+            self.scroll_to(self.top + amount)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.top - 3)
+        elif event.num == 5 or event.delta < 0:
+            self.scroll_to(self.top + 3)
+        return 'break'
+
+    def _on_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item:
+            self.selected = self.top + self.tree.index(item)
+            self.refresh()
+        self.tree.focus_set()
+        return 'break'
+
+    def _on_key(self, delta):
+        rows = self.visible_rows()
+        if delta == 'page_up':
+            self.scroll_to(self.top - rows)
+        elif delta == 'page_down':
+            self.scroll_to(self.top + rows)
+        else:
+            current = self.selected if self.selected is not None else self.top
+            self.selected = max(0, min(self.count - 1, current + delta))
+            if self.selected < self.top:
+                self.scroll_to(self.selected)
+            elif self.selected >= self.top + rows:
+                self.scroll_to(self.selected - rows + 1)
+            else:
+                self.refresh()
+        return 'break'
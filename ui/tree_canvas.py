@@ -1,5 +1,6 @@
 import tkinter as tk
 from syntax_parser.tree import TreeNode
+from ui.layout import TreeLayout, LevelIndex
 
 class ParseTreeCanvas(tk.Canvas):
     def __init__(self, parent, **kwargs):
@@ -8,10 +9,12 @@ class ParseTreeCanvas(tk.Canvas):
         self.node_radius = 25
         self.level_height = 80
         self.node_spacing = 60
+        self.layout = TreeLayout(self.level_height, self.node_spacing)
         self.colors = {
             'non_terminal': '#5e81ac', # Using Nord colors
             'terminal': '#a3be8c',
             'epsilon': '#d08770',
+            'error': '#bf616a',
             'text': '#eceff4',
             'line': '#4c566a'
         }
@@ -20,13 +23,20 @@ class ParseTreeCanvas(tk.Canvas):
         self.bind('<MouseWheel>', self.on_zoom)
         self.bind('<Button-4>', self.on_zoom)
         self.bind('<Button-5>', self.on_zoom)
-        
+        self.bind('<Configure>', lambda event: self.sync_viewport())
+
         self.scale_factor = 1.0
         self.pan_x = 0
         self.pan_y = 0
         self.drag_start_x = 0
         self.drag_start_y = 0
 
+        # Only nodes near the viewport have canvas items. Node items are
+        # tagged n<i>, the edge into node i is tagged e<i> (i = layout position).
+        self.spatial_index = None
+        self.drawn_nodes = set()
+        self.drawn_edges = set()
+
     def on_click(self, event):
         self.drag_start_x = self.canvasx(event.x)
         self.drag_start_y = self.canvasy(event.y)
@@ -38,92 +48,158 @@ class ParseTreeCanvas(tk.Canvas):
         self.pan_y += dy
         self.drag_start_x = self.canvasx(event.x)
         self.drag_start_y = self.canvasy(event.y)
-        self.draw_tree()
+        # Shift the existing items, then only draw what scrolled into view
+        self.move('all', dx, dy)
+        self.sync_viewport()
 
     def on_zoom(self, event):
         # Respond to Linux (event.num) or Windows (event.delta) wheel event
         if event.num == 4 or event.delta > 0:
-            self.scale_factor *= 1.1
+            factor = 1.1
         elif event.num == 5 or event.delta < 0:
-            self.scale_factor *= 0.9
-        self.draw_tree()
+            factor = 0.9
+        else:
+            return
+        # Zoom around the pointer by scaling the existing items in place
+        cx, cy = self.canvasx(event.x), self.canvasy(event.y)
+        self.scale_factor *= factor
+        self.pan_x = cx + (self.pan_x - cx) * factor
+        self.pan_y = cy + (self.pan_y - cy) * factor
+        self.scale('all', cx, cy, factor, factor)
+        width = self._line_width()
+        self.itemconfigure('edge', width=width)
+        self.itemconfigure('oval', width=width)
+        self.itemconfigure('label', font=self._label_font())
+        self.sync_viewport()
 
     def set_tree(self, tree_root):
+        same_tree = tree_root is not None and tree_root is self.tree_root
         self.tree_root = tree_root
         if tree_root:
-            # Reset view before drawing a new tree
-            self.scale_factor = 1.0
-            self.pan_x = self.winfo_width() / 4 # Initial centering
-            self.pan_y = 50
+            if not same_tree:
+                # Reset view before drawing a new tree
+                self.scale_factor = 1.0
+                self.pan_x = self.winfo_width() / 4 # Initial centering
+                self.pan_y = 50
             self.calculate_positions(self.tree_root)
             self.draw_tree()
         else:
-            self.delete("all")
-
-    def calculate_positions(self, node, level=0, position=0):
-        if not node:
-            return 0
-        
-        node.y = level * self.level_height
-        
-        if node.is_leaf():
-            node.x = position * self.node_spacing
-            return position + 1
-        
-        # Calculate positions for children first
-        child_positions_x = []
-        current_pos = position
-        for child in node.children:
-            current_pos = self.calculate_positions(child, level + 1, current_pos)
-            child_positions_x.append(child.x)
-        
-        # Center parent over its children
-        if child_positions_x:
-            node.x = (min(child_positions_x) + max(child_positions_x)) / 2
-        else:
-            node.x = position * self.node_spacing
-        
-        return current_pos
+            self.layout.layout(None)
+            self.spatial_index = None
+            self.clear_items()
 
-    def draw_tree(self):
+    def nodes_expanded(self, nodes):
+        """
+        Relayouts after the parser expanded `nodes` (in that order) and
+        redraws once (see TreeLayout.update_batch).
+        """
+        if not nodes:
+            return
+        self.layout.update_batch(nodes)
+        self.spatial_index = None
+        self.draw_tree()
+
+    def calculate_positions(self, node):
+        self.layout.level_height = self.level_height
+        self.layout.node_spacing = self.node_spacing
+        self.layout.layout(node)
+        self.spatial_index = None
+
+    def clear_items(self):
         self.delete("all")
+        self.drawn_nodes.clear()
+        self.drawn_edges.clear()
+
+    def draw_tree(self):
+        # Layout positions changed: drop all items and redraw the viewport
+        self.clear_items()
         if not self.tree_root:
             return
-        
-        self.draw_node(self.tree_root)
+        self.sync_viewport()
 
-    def draw_node(self, node):
-        if not node or not hasattr(node, 'x'):
+    def visible_nodes(self):
+        """Layout positions of the nodes in (or just around) the viewport."""
+        if not self.tree_root or not len(self.layout):
+            return []
+        if self.spatial_index is None:
+            self.spatial_index = LevelIndex(self.layout)
+        scale = self.scale_factor
+        width, height = self.winfo_width(), self.winfo_height()
+        margin = self.node_radius * scale + max(width, height) / 4
+        return self.spatial_index.query(
+            (-margin - self.pan_x) / scale, (-margin - self.pan_y) / scale,
+            (width + margin - self.pan_x) / scale, (height + margin - self.pan_y) / scale,
+        )
+
+    def sync_viewport(self):
+        """Creates items for nodes entering the viewport and drops the rest."""
+        if not self.tree_root:
             return
-        
-        # Apply transformations for pan and zoom
-        x = node.x * self.scale_factor + self.pan_x
-        y = node.y * self.scale_factor + self.pan_y
+        layout = self.layout
+        nodes, index = layout.nodes, layout.index
+        visible = set(self.visible_nodes())
+
+        edges = set()
+        for i in visible:
+            node = nodes[i]
+            if node.parent is not None:
+                edges.add(i)
+            for child in node.children:
+                edges.add(index[child])
+
+        for i in self.drawn_nodes - visible:
+            self.delete(f"n{i}")
+        for i in self.drawn_edges - edges:
+            self.delete(f"e{i}")
+
+        new_edges = edges - self.drawn_edges
+        for i in new_edges:
+            self.draw_edge(i)
+        for i in visible - self.drawn_nodes:
+            self.draw_node(i)
+        if new_edges:
+            self.tag_lower('edge')  # connections stay below the nodes
+
+        self.drawn_nodes = visible
+        self.drawn_edges = edges
+
+    def _screen(self, i):
+        layout = self.layout
+        return (layout.x[i] * self.scale_factor + self.pan_x,
+                layout.y[i] * self.scale_factor + self.pan_y)
+
+    def _line_width(self):
+        return max(1, 2 * self.scale_factor)
+
+    def _label_font(self):
+        return ('Segoe UI', max(6, int(12 * self.scale_factor)), 'bold')
+
+    def draw_edge(self, i):
+        parent = self.layout.index[self.layout.nodes[i].parent]
+        x, y = self._screen(parent)
+        child_x, child_y = self._screen(i)
+        self.create_line(x, y, child_x, child_y, fill=self.colors['line'], width=self._line_width(),
+                         tags=('edge', f"e{i}"))
+
+    def draw_node(self, i):
+        node = self.layout.nodes[i]
+        x, y = self._screen(i)
         radius = self.node_radius * self.scale_factor
-        
-        # Draw connections to children first (so they are layered below the nodes)
-        for child in node.children:
-            if hasattr(child, 'x'):
-                child_x = child.x * self.scale_factor + self.pan_x
-                child_y = child.y * self.scale_factor + self.pan_y
-                self.create_line(x, y, child_x, child_y, fill=self.colors['line'], width=max(1, 2 * self.scale_factor))
-        
-        # Recursively draw children nodes
-        for child in node.children:
-            self.draw_node(child)
 
         # Choose color based on node type from your color scheme
         if node.value == 'ε':
             color = self.colors['epsilon']
+        elif node.value == '✗':  # left by error recovery
+            color = self.colors['error']
         elif node.is_terminal:
             color = self.colors['terminal']
         else:
             color = self.colors['non_terminal']
-        
+
         # Draw the node oval and its text
-        self.create_oval(x - radius, y - radius, x + radius, y + radius, 
-                           fill=color, outline=self.colors['line'], width=max(1, 2 * self.scale_factor))
-        
-        font_size = max(6, int(12 * self.scale_factor))
-        self.create_text(x, y, text=node.value, fill=self.colors['text'], 
-                           font=('Segoe UI', font_size, 'bold'))
+        self.create_oval(x - radius, y - radius, x + radius, y + radius,
+                           fill=color, outline=self.colors['line'], width=self._line_width(),
+                           tags=('oval', f"n{i}"))
+
+        self.create_text(x, y, text=node.value, fill=self.colors['text'],
+                           font=self._label_font(), tags=('label', f"n{i}"))